@@ -1,10 +1,139 @@
+import json
+import logging
+
+import aiohttp
 from dls_servbase_api.aiohttp_client import AiohttpClient as DlsServbaseAiohttpClient
+from dls_servbase_api.exceptions import (
+    ClientConnectorError as DlsServbaseClientConnectorError,
+)
+from dls_utilpack.callsign import callsign
+from dls_utilpack.explain import explain
+from dls_utilpack.import_class import import_classname_from_modulename
+
+from xchembku_api.wire_encodings import (
+    WireEncodings,
+    decode_wire,
+    encode_wire,
+    resolve_wire_encoding,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # ------------------------------------------------------------------------------------------
 class AiohttpClient(DlsServbaseAiohttpClient):
     """
     Object representing a client which makes aiohttp requests.
+
+    The aiohttp_specification may give an encoding of json (the default) or orjson.
+    With orjson, protocolj requests are encoded, and their responses decoded,
+    with the faster codec, but the bodies are the same json.
     """
 
-    pass
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, aiohttp_specification):
+        DlsServbaseAiohttpClient.__init__(self, aiohttp_specification)
+
+        self.__wire_encoding = resolve_wire_encoding(
+            aiohttp_specification.get("encoding", WireEncodings.JSON)
+        )
+
+        # The base class has filled in the client endpoint if it was not given.
+        endpoint = self.callsign()
+        if endpoint.startswith("http"):
+            self.__protocolj_url = f"{endpoint}/protocolj"
+        else:
+            # The base class's session connects through the unix socket.
+            self.__protocolj_url = "http://unixconnector/protocolj"
+
+    # ----------------------------------------------------------------------------------------
+    def wire_encoding(self) -> str:
+        """
+        The encoding requests and responses are being coded in.
+        """
+
+        return self.__wire_encoding
+
+    # ----------------------------------------------------------------------------------------
+    async def client_protocolj(
+        self,
+        request_object,
+        cookies=None,
+        headers=None,
+    ):
+        """
+        Send a protocolj request and give its response.
+
+        The base class always codes the bodies with the standard json codec,
+        so with orjson the request is posted, and its response read, here.
+        """
+
+        if self.__wire_encoding != WireEncodings.ORJSON:
+            return await DlsServbaseAiohttpClient.client_protocolj(
+                self, request_object, cookies=cookies, headers=headers
+            )
+
+        await self._establish_client_session()
+
+        request_headers = {"Content-Type": "application/json"}
+        if headers is not None:
+            request_headers.update(headers)
+
+        try:
+            async with self._client_session.post(
+                self.__protocolj_url,
+                data=encode_wire(WireEncodings.ORJSON, request_object),
+                cookies=cookies,
+                headers=request_headers,
+            ) as response:
+                body = await response.read()
+                response_cookies = response.cookies
+                status = response.status
+        except aiohttp.ClientConnectorError as exception:
+            raise DlsServbaseClientConnectorError(
+                explain(exception, f"connecting to {callsign(self)}")
+            )
+
+        if status != 200:
+            raise self.__compose_exception(status, body.decode(errors="replace"))
+
+        response_json = decode_wire(WireEncodings.ORJSON, body)
+        if cookies is not None:
+            if response_json is None:
+                response_json = {}
+            response_json["__cookies"] = response_cookies
+
+        return response_json
+
+    # ----------------------------------------------------------------------------------------
+    def __compose_exception(self, status: int, text: str) -> Exception:
+        """
+        Make the exception which the server reported, as the base class does.
+
+        Falls back to a RuntimeError when the response doesn't name an exception we can import.
+        """
+
+        exception_class = RuntimeError
+        exception_message = "server responded with status %d: %s" % (status, text)
+
+        try:
+            response_dict = json.loads(text)
+
+            if "exception" in response_dict:
+                qualname = response_dict["exception"].get("qualname")
+                exception_message = response_dict["exception"].get(
+                    "message", "no message"
+                )
+                try:
+                    modulename = ".".join(qualname.split(".")[:-1])
+                    classname = qualname.split(".")[-1]
+                    exception_class = import_classname_from_modulename(
+                        classname, modulename
+                    )
+                except Exception:
+                    exception_class = RuntimeError
+                    exception_message = f"{qualname}: {exception_message}"
+        except Exception:
+            pass
+
+        return exception_class(exception_message)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 
 class Interface(ABC):
@@ -36,3 +36,23 @@ class Interface(ABC):
         crystal_well_record: Dict,
     ) -> Tuple[Optional[int], Optional[int]]:
         pass
+
+    # ----------------------------------------------------------------------------------------
+    @abstractmethod
+    def compute_drop_locations_microns(
+        self,
+        confirmed_targets_x: Sequence[Optional[float]],
+        confirmed_targets_y: Sequence[Optional[float]],
+        well_centroids_x: Sequence[float],
+        well_centroids_y: Sequence[float],
+    ) -> Tuple[List[Optional[int]], List[Optional[int]]]:
+        """
+        Converts the confirmed targets of many wells of this plate type to microns at once.
+
+        The sequences are parallel, one entry per well.
+
+        Returns:
+            Tuple[List[Optional[int]], List[Optional[int]]]: x and y microns per well,
+                None for a well which has no confirmed target
+        """
+        pass
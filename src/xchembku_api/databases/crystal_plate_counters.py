@@ -0,0 +1,97 @@
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Counters kept per plate in the crystal_plate_counters table.
+COUNTER_FIELDS = [
+    "collected_count",
+    "chimped_count",
+    "decided_count",
+    "decided_usable_count",
+    "exported_count",
+    "undecided_crystals_count",
+]
+
+# Largest number of plate uuids given in a single IN clause.
+CHUNK_SIZE = 500
+
+
+# ----------------------------------------------------------------------------------------
+def build_counters_select(where: str = "") -> str:
+    """
+    Build the query which counts the wells of each plate in a single pass.
+
+    The wells are joined once to their autolocation and droplocation,
+    and each counter is a conditional sum over the joined rows.
+
+    Args:
+        where (str): optional WHERE clause restricting the wells, applied before the counting
+
+    Returns:
+        str: sql giving one row per plate with the crystal_plate_uuid and all the COUNTER_FIELDS
+    """
+
+    return (
+        "SELECT"
+        "\n  crystal_wells.crystal_plate_uuid AS crystal_plate_uuid,"
+        "\n  COUNT(*) AS collected_count,"
+        "\n  COUNT(crystal_well_autolocations.uuid) AS chimped_count,"
+        "\n  SUM(CASE WHEN crystal_well_droplocations.is_usable IS NOT NULL THEN 1 ELSE 0 END) AS decided_count,"
+        "\n  SUM(CASE WHEN crystal_well_droplocations.is_usable = True THEN 1 ELSE 0 END) AS decided_usable_count,"
+        "\n  SUM(CASE WHEN crystal_well_droplocations.is_exported_to_soakdb3 = True THEN 1 ELSE 0 END) AS exported_count,"
+        "\n  SUM(CASE WHEN crystal_well_autolocations.number_of_crystals > 0"
+        " AND crystal_well_droplocations.is_usable IS NULL THEN 1 ELSE 0 END) AS undecided_crystals_count"
+        "\nFROM crystal_wells"
+        "\nLEFT JOIN crystal_well_autolocations ON crystal_well_autolocations.crystal_well_uuid = crystal_wells.uuid"
+        "\nLEFT JOIN crystal_well_droplocations ON crystal_well_droplocations.crystal_well_uuid = crystal_wells.uuid"
+        f"{where}"
+        "\nGROUP BY crystal_wells.crystal_plate_uuid"
+    )
+
+
+# ----------------------------------------------------------------------------------------
+async def refresh_crystal_plate_counters(
+    database,
+    crystal_plate_uuids: Optional[List[str]] = None,
+    why=None,
+) -> None:
+    """
+    Recount the counters of the given plates from their wells.
+
+    Only the wells of the given plates are read, so the cost follows the size of the plates
+    and not the size of the database.  Callers do this in the same transaction as the
+    well, autolocation or droplocation writes which changed the counts.
+
+    Args:
+        database: object with the dls_normsql execute method, either the database or the dataface
+        crystal_plate_uuids (List[str]): plates to recount, or None to rebuild the whole table
+        why (str): reason for logging
+    """
+
+    insert = "INSERT INTO crystal_plate_counters (crystal_plate_uuid, %s)\n" % (
+        ", ".join(COUNTER_FIELDS)
+    )
+
+    if crystal_plate_uuids is None:
+        await database.execute("DELETE FROM crystal_plate_counters", why=why)
+        await database.execute(insert + build_counters_select(), why=why)
+        return
+
+    crystal_plate_uuids = list(dict.fromkeys(crystal_plate_uuids))
+    for i in range(0, len(crystal_plate_uuids), CHUNK_SIZE):
+        chunk = crystal_plate_uuids[i : i + CHUNK_SIZE]
+        qmarks = ", ".join(["?"] * len(chunk))
+        await database.execute(
+            f"DELETE FROM crystal_plate_counters WHERE crystal_plate_uuid IN ({qmarks})",
+            subs=chunk,
+            why=why,
+        )
+        await database.execute(
+            insert
+            + build_counters_select(
+                f"\nWHERE crystal_wells.crystal_plate_uuid IN ({qmarks})"
+            ),
+            subs=chunk,
+            why=why,
+        )
@@ -1,11 +1,27 @@
 import logging
+from typing import Dict, List, Optional
+
+# Database types.
+from dls_normsql.constants import ClassTypes
+
+# Per-plate counters.
+from xchembku_api.databases.crystal_plate_counters import (
+    refresh_crystal_plate_counters,
+)
 
 # All the tables.
 from xchembku_api.databases.table_definitions import (
+    UNIQUE_KEY_TYPES,
+    CrystalPlateCountersTable,
     CrystalPlatesTable,
+    CrystalWellAutolocationLeasesTable,
     CrystalWellAutolocationsTable,
+    CrystalWellChangesTable,
     CrystalWellDroplocationsTable,
+    CrystalWellPendingAutolocationsTable,
     CrystalWellsTable,
+    Soakdb3ExportedCrystalWellsTable,
+    Soakdb3VisitSyncsTable,
 )
 
 logger = logging.getLogger(__name__)
@@ -19,12 +35,19 @@ class DatabaseDefinition:
     """
 
     # ----------------------------------------------------------------------------------------
-    def __init__(self):
+    def __init__(self, database_type: Optional[str] = None):
         """
         Construct object.  Do not connect to database.
+
+        Args:
+            database_type (str): the dls_normsql class type, used where revision sql differs by dialect
         """
 
-        self.LATEST_REVISION = 5
+        if database_type is None:
+            database_type = ClassTypes.AIOSQLITE
+        self.__database_type = database_type
+
+        self.LATEST_REVISION = 11
 
     # ----------------------------------------------------------------------------------------
     async def apply_revision(self, database, revision):
@@ -71,6 +94,165 @@ class DatabaseDefinition:
                 why="revision {revision}: new column",
             )
 
+        if revision == 6:
+            # Upsert keys become unique so upserts can be a single atomic statement.
+            # Plates go first since removing duplicate plates re-points their wells.
+            await self.__make_unique(
+                database,
+                "crystal_plates",
+                "formulatrix__plate__id",
+                {"crystal_wells": "crystal_plate_uuid"},
+                revision,
+            )
+            # Wells go before droplocations since removing duplicate wells re-points their droplocations.
+            await self.__make_unique(
+                database,
+                "crystal_wells",
+                "filename",
+                {
+                    "crystal_well_autolocations": "crystal_well_uuid",
+                    "crystal_well_droplocations": "crystal_well_uuid",
+                },
+                revision,
+            )
+            await self.__make_unique(
+                database,
+                "crystal_well_droplocations",
+                "crystal_well_uuid",
+                {},
+                revision,
+            )
+
+        if revision == 7:
+            # Add the per-plate counters table and count the existing wells into it.
+            await database.create_table("crystal_plate_counters")
+            await refresh_crystal_plate_counters(
+                database,
+                why=f"revision {revision}: count existing wells",
+            )
+
+        if revision == 8:
+            # Add the table of wells claimed by autolocation workers.
+            await database.create_table("crystal_well_autolocation_leases")
+
+        if revision == 9:
+            # Add the queue of wells needing autolocation and fill it with the existing ones.
+            await database.create_table("crystal_well_pending_autolocations")
+            await database.execute(
+                "INSERT INTO crystal_well_pending_autolocations (crystal_well_uuid, created_on)"
+                "\n  SELECT crystal_wells.uuid, crystal_wells.created_on"
+                "\n  FROM crystal_wells"
+                "\n  LEFT JOIN crystal_well_autolocations"
+                " ON crystal_wells.uuid = crystal_well_autolocations.crystal_well_uuid"
+                "\n  WHERE crystal_well_autolocations.uuid IS NULL",
+                why=f"revision {revision}: queue wells needing autolocation",
+            )
+
+        if revision == 10:
+            # Add the tables which let soakdb3 injection skip the full body scan.
+            # They start empty, so the first injection for each visit reconciles.
+            await database.create_table("soakdb3_visit_syncs")
+            await database.create_table("soakdb3_exported_crystal_wells")
+
+        if revision == 11:
+            # Add the log which orders the change feed, and log the existing records into it.
+            await database.create_table("crystal_well_changes")
+            for table_name in [
+                "crystal_wells",
+                "crystal_well_autolocations",
+                "crystal_well_droplocations",
+            ]:
+                await database.execute(
+                    "INSERT INTO crystal_well_changes (table_name, record_uuid, created_on)"
+                    f"\n  SELECT '{table_name}', uuid, created_on FROM {table_name}"
+                    "\n  ORDER BY created_on, uuid",
+                    why=f"revision {revision}: log existing {table_name}",
+                )
+
+    # ----------------------------------------------------------------------------------------
+    async def __make_unique(
+        self,
+        database,
+        table_name: str,
+        field_name: str,
+        referencing_tables: Dict[str, str],
+        revision: int,
+    ) -> None:
+        """
+        Replace the plain index on a table's field with a unique index.
+
+        Existing duplicates are removed first, keeping the earliest record for each value.
+        Records in other tables which refer to a removed duplicate are re-pointed to the kept one.
+
+        Args:
+            database: the dls_normsql database object
+            table_name (str): table holding the field
+            field_name (str): field to become unique
+            referencing_tables (Dict[str, str]): table name to field name which refers to this table's uuid
+            revision (int): revision number for logging
+        """
+
+        why = f"revision {revision}: unique {table_name}.{field_name}"
+
+        # Find the values which are duplicated.
+        records = await database.query(
+            f"SELECT {field_name} FROM {table_name}"
+            f" WHERE {field_name} IS NOT NULL"
+            f" GROUP BY {field_name} HAVING COUNT(*) > 1",
+            why=why,
+        )
+
+        for record in records:
+            duplicates = await database.query(
+                f"SELECT uuid FROM {table_name} WHERE {field_name} = ?"
+                " ORDER BY created_on, uuid",
+                subs=[record[field_name]],
+                why=why,
+            )
+            kept_uuid = duplicates[0]["uuid"]
+            removed_uuids: List[str] = [
+                duplicate["uuid"] for duplicate in duplicates[1:]
+            ]
+            logger.warning(
+                f"{why}: keeping {kept_uuid} and removing {len(removed_uuids)} duplicates"
+                f" for {field_name} {record[field_name]}"
+            )
+
+            qmarks = ", ".join(["?"] * len(removed_uuids))
+            for referencing_table, referencing_field in referencing_tables.items():
+                await database.execute(
+                    f"UPDATE {referencing_table} SET {referencing_field} = ?"
+                    f" WHERE {referencing_field} IN ({qmarks})",
+                    subs=[kept_uuid] + removed_uuids,
+                    why=why,
+                )
+            await database.execute(
+                f"DELETE FROM {table_name} WHERE uuid IN ({qmarks})",
+                subs=removed_uuids,
+                why=why,
+            )
+
+        index_name = f"{table_name}_{field_name}"
+        if self.__database_type == ClassTypes.AIOMYSQL:
+            await database.execute(
+                f"DROP INDEX {index_name} ON {table_name}",
+                why=why,
+            )
+            # Mysql cannot put a unique index on an unbounded TEXT column.
+            await database.execute(
+                f"ALTER TABLE {table_name} MODIFY {field_name} {UNIQUE_KEY_TYPES[index_name]}",
+                why=why,
+            )
+        else:
+            await database.execute(
+                f"DROP INDEX {index_name}",
+                why=why,
+            )
+            await database.execute(
+                f"CREATE UNIQUE INDEX {index_name} ON {table_name}({field_name})",
+                why=why,
+            )
+
     # ----------------------------------------------------------------------------------------
     async def add_table_definitions(self, database):
         """
@@ -82,3 +264,9 @@ class DatabaseDefinition:
         database.add_table_definition(CrystalWellsTable())
         database.add_table_definition(CrystalWellAutolocationsTable())
         database.add_table_definition(CrystalWellDroplocationsTable())
+        database.add_table_definition(CrystalPlateCountersTable())
+        database.add_table_definition(CrystalWellAutolocationLeasesTable())
+        database.add_table_definition(CrystalWellPendingAutolocationsTable())
+        database.add_table_definition(Soakdb3VisitSyncsTable())
+        database.add_table_definition(Soakdb3ExportedCrystalWellsTable())
+        database.add_table_definition(CrystalWellChangesTable(self.__database_type))
@@ -1,11 +1,12 @@
 import logging
 
-# Fieldnames common to all databases.
-from dls_normsql.constants import CommonFieldnames
+# Database types, and fieldnames common to all databases.
+from dls_normsql.constants import ClassTypes, CommonFieldnames
 
 # Base class for table definitions.
 from dls_normsql.table_definition import TableDefinition
 
+from xchembku_api.databases.crystal_plate_counters import COUNTER_FIELDS
 from xchembku_api.models.crystal_plate_model import CrystalPlateModel
 from xchembku_api.models.crystal_well_autolocation_model import (
     CrystalWellAutolocationModel,
@@ -17,6 +18,15 @@ from xchembku_api.models.crystal_well_model import CrystalWellModel
 
 logger = logging.getLogger(__name__)
 
+# Column types for the upsert keys, which carry a unique constraint.
+# These are declared as bounded types so that mysql can index them.
+UNIQUE_KEY_TYPES = {
+    "crystal_plates_formulatrix__plate__id": "INTEGER UNIQUE",
+    "crystal_wells_filename": "VARCHAR(512) UNIQUE",
+    "crystal_well_droplocations_crystal_well_uuid": "VARCHAR(64) UNIQUE",
+    "soakdb3_visit_syncs_visitid": "VARCHAR(512) UNIQUE",
+}
+
 
 # ----------------------------------------------------------------------------------------
 class CrystalPlatesTable(TableDefinition):
@@ -50,8 +60,12 @@ class CrystalPlatesTable(TableDefinition):
 
                 self.fields[field_name] = {"type": sql_type}
 
+        # Upsert key is unique.
+        self.fields["formulatrix__plate__id"] = {
+            "type": UNIQUE_KEY_TYPES["crystal_plates_formulatrix__plate__id"]
+        }
+
         # Add indexes.
-        self.fields["formulatrix__plate__id"]["index"] = True
         self.fields["formulatrix__experiment__name"]["index"] = True
         self.fields["barcode"]["index"] = True
         self.fields["visit"]["index"] = True
@@ -91,9 +105,11 @@ class CrystalWellsTable(TableDefinition):
 
                 self.fields[field_name] = {"type": sql_type}
 
+        # Upsert key is unique.
+        self.fields["filename"] = {"type": UNIQUE_KEY_TYPES["crystal_wells_filename"]}
+
         # Add indexes.
         self.fields["position"]["index"] = True
-        self.fields["filename"]["index"] = True
         self.fields["crystal_plate_uuid"]["index"] = True
         self.fields[CommonFieldnames.CREATED_ON]["index"] = True
 
@@ -171,8 +187,147 @@ class CrystalWellDroplocationsTable(TableDefinition):
 
                 self.fields[field_name] = {"type": sql_type}
 
+        # Upsert key is unique.
+        self.fields["crystal_well_uuid"] = {
+            "type": UNIQUE_KEY_TYPES["crystal_well_droplocations_crystal_well_uuid"]
+        }
+
         # Add indexes.
-        self.fields["crystal_well_uuid"]["index"] = True
         self.fields["is_usable"]["index"] = True
         self.fields["is_exported_to_soakdb3"]["index"] = True
         self.fields[CommonFieldnames.CREATED_ON]["index"] = True
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalPlateCountersTable(TableDefinition):
+    """
+    Well counts per plate, kept up to date as wells, autolocations and droplocations are written.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self):
+        table_name = "crystal_plate_counters"
+
+        TableDefinition.__init__(self, table_name)
+
+        # One record per plate, keyed by the plate's uuid.
+        self.fields["crystal_plate_uuid"] = {"type": "TEXT PRIMARY KEY"}
+
+        for field_name in COUNTER_FIELDS:
+            self.fields[field_name] = {"type": "INTEGER"}
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellAutolocationLeasesTable(TableDefinition):
+    """
+    Wells claimed by a worker for autolocation, until the lease expires.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self):
+        table_name = "crystal_well_autolocation_leases"
+
+        TableDefinition.__init__(self, table_name)
+
+        # A well is claimed by at most one worker at a time.
+        self.fields["crystal_well_uuid"] = {"type": "TEXT PRIMARY KEY"}
+        self.fields["claimant"] = {"type": "TEXT"}
+        self.fields["expires_on"] = {"type": "TEXT", "index": True}
+        self.fields[CommonFieldnames.CREATED_ON] = {"type": "TEXT"}
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellPendingAutolocationsTable(TableDefinition):
+    """
+    Queue of wells which have been inserted but not yet given an autolocation.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self):
+        table_name = "crystal_well_pending_autolocations"
+
+        TableDefinition.__init__(self, table_name)
+
+        self.fields["crystal_well_uuid"] = {"type": "TEXT PRIMARY KEY"}
+
+        # Queue is taken in order of arrival.
+        self.fields[CommonFieldnames.CREATED_ON] = {"type": "TEXT", "index": True}
+
+
+# ----------------------------------------------------------------------------------------
+class Soakdb3VisitSyncsTable(TableDefinition):
+    """
+    How far the soakdb3 body table of each visit has been seen by the injector.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self):
+        table_name = "soakdb3_visit_syncs"
+
+        TableDefinition.__init__(self, table_name)
+
+        # One record per visit, keyed by the soakdb3 visitid.
+        self.fields["visitid"] = {
+            "type": UNIQUE_KEY_TYPES["soakdb3_visit_syncs_visitid"]
+        }
+
+        # Highest body ID seen, rows above it have not been seen yet.
+        self.fields["body_id_watermark"] = {"type": "INTEGER"}
+
+        # Json list of the blank body IDs at or below the watermark.
+        self.fields["blank_row_ids"] = {"type": "TEXT"}
+
+        # Incremental injections since the last full reconciliation.
+        self.fields["incremental_count"] = {"type": "INTEGER"}
+        self.fields["reconciled_on"] = {"type": "TEXT"}
+        self.fields[CommonFieldnames.CREATED_ON] = {"type": "TEXT"}
+
+
+# ----------------------------------------------------------------------------------------
+class Soakdb3ExportedCrystalWellsTable(TableDefinition):
+    """
+    Plate/well pairs known to be in the soakdb3 body table of each visit.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self):
+        table_name = "soakdb3_exported_crystal_wells"
+
+        TableDefinition.__init__(self, table_name)
+
+        # These are declared as bounded types so that mysql can index them.
+        self.fields["visitid"] = {"type": "VARCHAR(128)", "index": True}
+        self.fields["crystal_plate"] = {"type": "VARCHAR(128)"}
+        self.fields["crystal_well"] = {"type": "VARCHAR(64)"}
+
+        # Each plate/well pair is recorded once per visit.
+        # Normsql only indexes single fields, so the unique key follows the last field as a table constraint.
+        self.fields[CommonFieldnames.CREATED_ON] = {
+            "type": "TEXT,\n  UNIQUE (visitid, crystal_plate, crystal_well)"
+        }
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellChangesTable(TableDefinition):
+    """
+    Log of the wells, autolocations and droplocations inserted, in the order they were written.
+
+    The sequence is assigned by the database, so it only ever increases,
+    whatever created_on the records were given.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, database_type: str):
+        table_name = "crystal_well_changes"
+
+        TableDefinition.__init__(self, table_name)
+
+        if database_type == ClassTypes.AIOMYSQL:
+            self.fields["sequence"] = {"type": "INTEGER PRIMARY KEY AUTO_INCREMENT"}
+        else:
+            self.fields["sequence"] = {"type": "INTEGER PRIMARY KEY AUTOINCREMENT"}
+
+        # Table and uuid of the inserted record.
+        self.fields["table_name"] = {"type": "TEXT"}
+        self.fields["record_uuid"] = {"type": "TEXT"}
+        self.fields[CommonFieldnames.CREATED_ON] = {"type": "TEXT"}
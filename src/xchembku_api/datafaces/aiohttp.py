@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from soakdb3_api.models.crystal_well_model import (
     CrystalWellModel as Soakdb3CrystalWellModel,
@@ -8,14 +8,24 @@ from soakdb3_api.models.crystal_well_model import (
 # Class for an aiohttp client.
 from xchembku_api.aiohttp_client import AiohttpClient
 
+# Batches of calls sent in one request.
+from xchembku_api.datafaces.batch import Batch, batch_position
+
 # Dataface protocolj things.
 from xchembku_api.datafaces.constants import Commands, Keywords
+from xchembku_api.models.compact_rows import (
+    CrystalPlateReportRow,
+    CrystalPlateRow,
+    CrystalWellNeedingDroplocationRow,
+    load_compact_rows,
+)
 from xchembku_api.models.crystal_plate_filter_model import CrystalPlateFilterModel
 from xchembku_api.models.crystal_plate_model import CrystalPlateModel
 from xchembku_api.models.crystal_plate_report_model import CrystalPlateReportModel
 from xchembku_api.models.crystal_well_autolocation_model import (
     CrystalWellAutolocationModel,
 )
+from xchembku_api.models.crystal_well_changes_model import CrystalWellChangesModel
 from xchembku_api.models.crystal_well_droplocation_model import (
     CrystalWellDroplocationModel,
 )
@@ -128,6 +138,23 @@ class Aiohttp(AiohttpClient):
 
         return models
 
+    # ----------------------------------------------------------------------------------------
+    async def fetch_crystal_plates_rows(
+        self,
+        filter: CrystalPlateFilterModel,
+        why: Optional[str] = None,
+    ) -> List[CrystalPlateRow]:
+        """"""
+
+        records = await self.__send_protocolj(
+            "fetch_crystal_plates_serialized",
+            filter=filter.dict(),
+            why=why,
+        )
+
+        # Dicts are returned, so make them into compact rows.
+        return load_compact_rows(CrystalPlateRow, records)
+
     # ----------------------------------------------------------------------------------------
     async def report_crystal_plates(
         self,
@@ -147,6 +174,23 @@ class Aiohttp(AiohttpClient):
 
         return models
 
+    # ----------------------------------------------------------------------------------------
+    async def report_crystal_plates_rows(
+        self,
+        filter: CrystalPlateFilterModel,
+        why: Optional[str] = None,
+    ) -> List[CrystalPlateReportRow]:
+        """"""
+
+        records = await self.__send_protocolj(
+            "report_crystal_plates_serialized",
+            filter=filter.dict(),
+            why=why,
+        )
+
+        # Dicts are returned, so make them into compact rows.
+        return load_compact_rows(CrystalPlateReportRow, records)
+
     # ----------------------------------------------------------------------------------------
     async def fetch_crystal_wells_filenames(
         self,
@@ -166,21 +210,38 @@ class Aiohttp(AiohttpClient):
 
         return models
 
+    # ----------------------------------------------------------------------------------------
+    async def fetch_crystal_wells_filenames_columns(
+        self,
+        limit: int = 1,
+        why: Optional[str] = None,
+    ) -> Dict[str, List]:
+        """"""
+
+        # Columns are returned as they are, for the caller to put into arrays.
+        columns = await self.__send_protocolj(
+            "fetch_crystal_wells_filenames_columns_serialized",
+            limit=limit,
+            why=why,
+        )
+
+        return columns
+
     # ----------------------------------------------------------------------------------------
     async def upsert_crystal_wells(
         self,
         models: List[CrystalWellModel],
-    ) -> None:
+    ) -> Dict:
         """"""
 
         records: List[Dict] = [model.dict() for model in models]
-        await self.__send_protocolj(
+        result = await self.__send_protocolj(
             "upsert_crystal_wells_serialized",
             records,
             as_transaction=True,
         )
 
-        return None
+        return result
 
     # ----------------------------------------------------------------------------------------
     async def update_crystal_wells(
@@ -216,6 +277,66 @@ class Aiohttp(AiohttpClient):
 
         return models
 
+    # ----------------------------------------------------------------------------------------
+    async def claim_crystal_wells_needing_autolocation(
+        self,
+        claimant: str,
+        limit: int = 1,
+        lease_seconds: float = 300.0,
+        why: Optional[str] = None,
+    ) -> List[CrystalWellModel]:
+        """"""
+
+        records = await self.__send_protocolj(
+            "claim_crystal_wells_needing_autolocation_serialized",
+            claimant,
+            limit=limit,
+            lease_seconds=lease_seconds,
+            why=why,
+            as_transaction=True,
+        )
+
+        # Dicts are returned, so parse them into models.
+        models = [CrystalWellModel(**record) for record in records]
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    async def renew_crystal_well_autolocation_leases(
+        self,
+        claimant: str,
+        crystal_well_uuids: List[str],
+        lease_seconds: float = 300.0,
+        why: Optional[str] = None,
+    ) -> Dict:
+        """"""
+
+        return await self.__send_protocolj(
+            "renew_crystal_well_autolocation_leases_serialized",
+            claimant,
+            crystal_well_uuids,
+            lease_seconds=lease_seconds,
+            why=why,
+            as_transaction=True,
+        )
+
+    # ----------------------------------------------------------------------------------------
+    async def release_crystal_well_autolocation_leases(
+        self,
+        claimant: str,
+        crystal_well_uuids: List[str],
+        why: Optional[str] = None,
+    ) -> None:
+        """"""
+
+        await self.__send_protocolj(
+            "release_crystal_well_autolocation_leases_serialized",
+            claimant,
+            crystal_well_uuids,
+            why=why,
+            as_transaction=True,
+        )
+
     # ----------------------------------------------------------------------------------------
     async def fetch_crystal_wells_needing_droplocation(
         self,
@@ -235,6 +356,40 @@ class Aiohttp(AiohttpClient):
 
         return models
 
+    # ----------------------------------------------------------------------------------------
+    async def fetch_crystal_wells_needing_droplocation_rows(
+        self,
+        filter: CrystalWellFilterModel,
+        why: Optional[str] = None,
+    ) -> List[CrystalWellNeedingDroplocationRow]:
+        """"""
+
+        records = await self.__send_protocolj(
+            "fetch_crystal_wells_needing_droplocation_serialized",
+            filter.dict(),
+            why=why,
+        )
+
+        # Dicts are returned, so make them into compact rows.
+        return load_compact_rows(CrystalWellNeedingDroplocationRow, records)
+
+    # ----------------------------------------------------------------------------------------
+    async def fetch_crystal_wells_needing_droplocation_columns(
+        self,
+        filter: CrystalWellFilterModel,
+        why: Optional[str] = None,
+    ) -> Dict[str, List]:
+        """"""
+
+        # Columns are returned as they are, for the caller to put into arrays.
+        columns = await self.__send_protocolj(
+            "fetch_crystal_wells_needing_droplocation_columns_serialized",
+            filter.dict(),
+            why=why,
+        )
+
+        return columns
+
     # ----------------------------------------------------------------------------------------
     async def originate_crystal_well_autolocations(
         self, models: List[CrystalWellAutolocationModel]
@@ -256,11 +411,11 @@ class Aiohttp(AiohttpClient):
         models: List[CrystalWellDroplocationModel],
         only_fields: Optional[List[str]] = None,
         why: Optional[str] = None,
-    ) -> None:
+    ) -> Dict:
         """"""
 
         records: List[Dict] = [model.dict() for model in models]
-        await self.__send_protocolj(
+        result = await self.__send_protocolj(
             "upsert_crystal_well_droplocations_serialized",
             records,
             only_fields=only_fields,
@@ -268,13 +423,14 @@ class Aiohttp(AiohttpClient):
             as_transaction=True,
         )
 
-        return None
+        return result
 
     # ----------------------------------------------------------------------------------------
     async def inject_soakdb3_crystal_wells(
         self,
         visitid: str,
         models: List[Soakdb3CrystalWellModel],
+        reconcile: bool = False,
         why: Optional[str] = None,
     ) -> Dict:
         """"""
@@ -284,11 +440,50 @@ class Aiohttp(AiohttpClient):
             "inject_soakdb3_crystal_wells_serialized",
             visitid,
             records,
+            reconcile=reconcile,
             why=why,
             as_transaction=True,
         )
         return result
 
+    # ----------------------------------------------------------------------------------------
+    async def inject_soakdb3_crystal_wells_for_visits(
+        self,
+        models_by_visitid: Dict[str, List[Soakdb3CrystalWellModel]],
+        concurrency: Optional[int] = None,
+        reconcile: bool = False,
+        why: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        """"""
+
+        records_by_visitid: Dict[str, List[Dict]] = {
+            visitid: [model.dict() for model in models]
+            for visitid, models in models_by_visitid.items()
+        }
+        result = await self.__send_protocolj(
+            "inject_soakdb3_crystal_wells_for_visits_serialized",
+            records_by_visitid,
+            concurrency=concurrency,
+            reconcile=reconcile,
+            why=why,
+        )
+        return result
+
+    # ----------------------------------------------------------------------------------------
+    async def invalidate_soakdb3_head_rows(
+        self,
+        visitid: Optional[str] = None,
+        why: Optional[str] = None,
+    ) -> Dict:
+        """"""
+
+        result = await self.__send_protocolj(
+            "invalidate_soakdb3_head_rows_serialized",
+            visitid=visitid,
+            why=why,
+        )
+        return result
+
     # ----------------------------------------------------------------------------------------
     async def fetch_soakdb3_crystal_wells(
         self,
@@ -309,16 +504,147 @@ class Aiohttp(AiohttpClient):
         return models
 
     # ----------------------------------------------------------------------------------------
-    async def __send_protocolj(self, function, *args, **kwargs):
+    async def fetch_soakdb3_crystal_well_fields(
+        self,
+        visitid: str,
+        fields: List[str],
+        why: Optional[str] = None,
+    ) -> List[Dict]:
+        """"""
+
+        # Records are returned as they are.
+        return await self.__send_protocolj(
+            "fetch_soakdb3_crystal_well_fields_serialized",
+            visitid,
+            fields,
+            why=why,
+        )
+
+    # ----------------------------------------------------------------------------------------
+    async def rebuild_crystal_plate_counters(
+        self,
+        why: Optional[str] = None,
+    ) -> Dict:
         """"""
 
+        result = await self.__send_protocolj(
+            "rebuild_crystal_plate_counters_serialized",
+            why=why,
+            as_transaction=True,
+        )
+        return result
+
+    # ----------------------------------------------------------------------------------------
+    async def fetch_crystal_well_changes(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        why: Optional[str] = None,
+    ) -> CrystalWellChangesModel:
+        """"""
+
+        record = await self.__send_protocolj(
+            "fetch_crystal_well_changes_serialized",
+            cursor,
+            limit=limit,
+            why=why,
+        )
+
+        # Dict is returned, so parse it into a model.
+        return CrystalWellChangesModel(**record)
+
+    # ----------------------------------------------------------------------------------------
+    async def wait_for_crystal_well_changes(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        timeout_seconds: float = 30.0,
+        why: Optional[str] = None,
+    ) -> CrystalWellChangesModel:
+        """
+        Long poll the service until there are changes after the cursor, or the timeout.
+        """
+
+        record = await self.__send_protocolj(
+            "wait_for_crystal_well_changes_serialized",
+            cursor,
+            limit=limit,
+            timeout_seconds=timeout_seconds,
+            why=why,
+        )
+
+        # Dict is returned, so parse it into a model.
+        return CrystalWellChangesModel(**record)
+
+    # ----------------------------------------------------------------------------------------
+    async def iterate_crystal_well_changes(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        timeout_seconds: float = 30.0,
+        why: Optional[str] = None,
+    ) -> AsyncIterator[CrystalWellChangesModel]:
+        """
+        Give the changes after the cursor as they arrive, forever.
+
+        Each change model has the cursor which would resume after it.
+        """
+
+        while True:
+            model = await self.wait_for_crystal_well_changes(
+                cursor, limit=limit, timeout_seconds=timeout_seconds, why=why
+            )
+            cursor = model.cursor
+            if not model.is_empty():
+                yield model
+
+    # ----------------------------------------------------------------------------------------
+    def batch(self, as_transaction: bool = False) -> Batch:
+        """
+        Context manager which queues calls and sends them together when it exits.
+
+        Please see the Batch class for how to use it.
+        """
+
+        return Batch(self, as_transaction=as_transaction)
+
+    # ----------------------------------------------------------------------------------------
+    async def send_protocolj_batch(
+        self, calls: List[Dict], as_transaction: bool = False
+    ) -> List:
+        """
+        Send the calls in one request, getting back the list of their responses.
+        """
+
         return await self.client_protocolj(
             {
-                Keywords.COMMAND: Commands.EXECUTE,
+                Keywords.COMMAND: Commands.BATCH,
                 Keywords.PAYLOAD: {
-                    "function": function,
-                    "args": args,
-                    "kwargs": kwargs,
+                    "calls": calls,
+                    "as_transaction": as_transaction,
                 },
             },
         )
+
+    # ----------------------------------------------------------------------------------------
+    async def __send_protocolj(self, function, *args, **kwargs):
+        """"""
+
+        call = {
+            "function": function,
+            "args": args,
+            "kwargs": kwargs,
+        }
+
+        # Inside a batch, the call is queued to be sent along with the others.
+        position = batch_position.get()
+        if position is not None:
+            batch, index = position
+            return await batch.queue_protocolj(index, call)
+
+        return await self.client_protocolj(
+            {
+                Keywords.COMMAND: Commands.EXECUTE,
+                Keywords.PAYLOAD: call,
+            },
+        )
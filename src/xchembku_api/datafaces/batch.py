@@ -0,0 +1,185 @@
+import asyncio
+import contextvars
+import inspect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The batch and position of the call being queued by the task running it, if any.
+batch_position: contextvars.ContextVar[
+    Optional[Tuple["Batch", int]]
+] = contextvars.ContextVar("xchembku_batch_position", default=None)
+
+
+# ------------------------------------------------------------------------------------------
+class Batch:
+    """
+    Queues client calls and sends them to the server together, as a single request.
+
+    Use it as an async context manager from the client's batch() method.
+    Each call made on the batch returns a task straight away,
+    whose result is the same as the client method would have given,
+    available once the context has been left.
+
+        async with dataface.batch(as_transaction=True) as batch:
+            batch.upsert_crystal_plates(plate_models)
+            batch.upsert_crystal_wells(well_models)
+            fetched = batch.fetch_crystal_plates(filter)
+        plate_models = fetched.result()
+
+    The server runs the calls in the order they were made.
+    As a transaction, the calls are all committed or all rolled back.
+    Otherwise each is committed as it completes, and the batch stops at the first failure.
+    Either way, a failure is raised when leaving the context.
+
+    Only client methods which send a single request can be batched.
+    A call which tries to send a second request fails.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, client, as_transaction: bool = False):
+        self.__client = client
+        self.__as_transaction = as_transaction
+
+        self.__tasks: List[asyncio.Task] = []
+
+        # Per position, done once the task has queued its call or finished without one.
+        self.__queued: List[asyncio.Future] = []
+
+        # Calls by position, each with the future the waiting task gets its response from.
+        self.__calls: Dict[int, Tuple[Dict, asyncio.Future]] = {}
+
+        # No more calls can be made once flushing starts, nor queued once the batch is sent.
+        self.__is_flushed = False
+        self.__is_sent = False
+
+    # ----------------------------------------------------------------------------------------
+    def __getattr__(self, name: str):
+        """
+        Wrap the client method of the same name so calling it queues the call.
+        """
+
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        method = getattr(self.__client, name)
+
+        # Anything else, such as an async generator, would not finish with a single request.
+        if not inspect.iscoroutinefunction(method):
+            raise RuntimeError(f"{name} is not a client method which can be batched")
+
+        def queue(*args, **kwargs) -> asyncio.Task:
+            if self.__is_flushed:
+                raise RuntimeError(f"batch has already been sent, cannot queue {name}")
+
+            queued = asyncio.get_running_loop().create_future()
+
+            # The task copies the context now, so its call is queued at this position.
+            token = batch_position.set((self, len(self.__tasks)))
+            try:
+                task = asyncio.ensure_future(method(*args, **kwargs))
+            finally:
+                batch_position.reset(token)
+
+            # A task which finishes without queuing a call has nothing to wait for.
+            def on_done(task: asyncio.Task) -> None:
+                if not queued.done():
+                    queued.set_result(None)
+
+            task.add_done_callback(on_done)
+
+            self.__tasks.append(task)
+            self.__queued.append(queued)
+
+            return task
+
+        return queue
+
+    # ----------------------------------------------------------------------------------------
+    async def queue_protocolj(self, position: int, call: Dict) -> Any:
+        """
+        Called by the client in place of sending the call.
+
+        Returns the call's response once the batch has been sent.
+
+        Raises:
+            RuntimeError: the batched method is sending a second request
+        """
+
+        function = call["function"]
+        if self.__is_sent:
+            raise RuntimeError(
+                f"batched call {function} cannot send after the batch has been sent"
+            )
+        if position in self.__calls:
+            raise RuntimeError(f"batched call {function} cannot send twice")
+
+        future = asyncio.get_running_loop().create_future()
+        self.__calls[position] = (call, future)
+        self.__queued[position].set_result(None)
+
+        return await future
+
+    # ----------------------------------------------------------------------------------------
+    async def flush(self) -> None:
+        """
+        Send the queued calls and give each task its response.
+        """
+
+        self.__is_flushed = True
+
+        if len(self.__tasks) == 0:
+            return
+
+        # Wait for each task to queue its call, or finish without one.
+        await asyncio.gather(*self.__queued)
+
+        self.__is_sent = True
+
+        positions = sorted(self.__calls.keys())
+        try:
+            responses = await self.__client.send_protocolj_batch(
+                [self.__calls[position][0] for position in positions],
+                as_transaction=self.__as_transaction,
+            )
+        except Exception as exception:
+            for position in positions:
+                self.__calls[position][1].set_exception(exception)
+            # Collect the tasks so their exceptions are not reported as never retrieved.
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+            raise
+
+        for position, response in zip(positions, responses):
+            self.__calls[position][1].set_result(response)
+
+        # Let each task finish making its result from the response.
+        await asyncio.gather(*self.__tasks)
+
+    # ----------------------------------------------------------------------------------------
+    async def cancel(self) -> None:
+        """
+        Drop the queued calls without sending them.
+        """
+
+        self.__is_flushed = True
+
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+
+    # ----------------------------------------------------------------------------------------
+    async def __aenter__(self) -> "Batch":
+        """ """
+
+        return self
+
+    # ----------------------------------------------------------------------------------------
+    async def __aexit__(self, type, value, traceback) -> None:
+        """ """
+
+        # Nothing is sent when the block raised.
+        if type is not None:
+            await self.cancel()
+        else:
+            await self.flush()
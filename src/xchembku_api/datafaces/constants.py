@@ -5,6 +5,7 @@ class Keywords:
 
 class Commands:
     EXECUTE = "xchembku_datafaces::commands::execute"
+    BATCH = "xchembku_datafaces::commands::batch"
 
 
 class Types:
@@ -0,0 +1,144 @@
+import logging
+import operator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from pydantic import BaseModel
+
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+from xchembku_api.models.crystal_plate_report_model import CrystalPlateReportModel
+from xchembku_api.models.crystal_well_needing_droplocation_model import (
+    CrystalWellNeedingDroplocationModel,
+)
+from xchembku_api.models.trusted_loader import TrustedLoader, get_trusted_loader
+
+logger = logging.getLogger(__name__)
+
+CompactRowType = TypeVar("CompactRowType", bound="CompactRow")
+
+
+# ----------------------------------------------------------------------------------------
+class CompactRow(tuple):
+    """
+    Immutable row holding the same fields as a pydantic model, in the same order.
+
+    The row is a tuple, so has no per-instance dict and costs a fraction
+    of the memory and construction time of the pydantic model.
+    Fields are read as attributes, and the model is made only when asked for.
+
+    Subclasses give the model class they stand for as a class keyword.
+    """
+
+    __slots__ = ()
+
+    model_class: ClassVar[Type[BaseModel]]
+    _fields: ClassVar[Tuple[str, ...]]
+    _loader: ClassVar[TrustedLoader]
+
+    # ----------------------------------------------------------------------------------------
+    def __init_subclass__(cls, model_class: Type[BaseModel], **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        cls.model_class = model_class
+        cls._fields = tuple(model_class.__fields__)
+        cls._loader = get_trusted_loader(model_class)
+
+        # Each field reads its item of the tuple, as in a named tuple.
+        for index, field_name in enumerate(cls._fields):
+            setattr(cls, field_name, property(operator.itemgetter(index)))
+
+    # ----------------------------------------------------------------------------------------
+    @classmethod
+    def _make(cls: Type[CompactRowType], values: Iterable) -> CompactRowType:
+        """
+        Make a row from the field values, in the model's field order.
+        """
+        return tuple.__new__(cls, values)
+
+    # ----------------------------------------------------------------------------------------
+    def dict(self) -> Dict:
+        """
+        Same dict as the model's dict() would give.
+        """
+        return dict(zip(self._fields, self))
+
+    # ----------------------------------------------------------------------------------------
+    def to_model(self) -> BaseModel:
+        """
+        Make the pydantic model from the row.
+        """
+        return self._loader.load(self.dict())
+
+    # ----------------------------------------------------------------------------------------
+    def __repr__(self) -> str:
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join(
+                f"{field_name}={value!r}"
+                for field_name, value in zip(self._fields, self)
+            ),
+        )
+
+    if TYPE_CHECKING:
+        # The field attributes are made with the subclass, out of sight of the type checker.
+        def __getattr__(self, name: str) -> Any:
+            ...
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellNeedingDroplocationRow(
+    CompactRow, model_class=CrystalWellNeedingDroplocationModel
+):
+    """
+    Compact immutable row of a CrystalWellNeedingDroplocationModel.
+    """
+
+    __slots__ = ()
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalPlateRow(CompactRow, model_class=CrystalPlateModel):
+    """
+    Compact immutable row of a CrystalPlateModel.
+    """
+
+    __slots__ = ()
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalPlateReportRow(CompactRow, model_class=CrystalPlateReportModel):
+    """
+    Compact immutable row of a CrystalPlateReportModel.
+    """
+
+    __slots__ = ()
+
+
+# ----------------------------------------------------------------------------------------
+def load_compact_rows(
+    row_class: Type[CompactRowType], records: List[Dict]
+) -> List[CompactRowType]:
+    """
+    Build compact rows from records which came out of our own database, or our own server.
+
+    Args:
+        row_class: one of the compact row classes
+        records (List[Dict]): the rows from the query or the response
+
+    Returns:
+        List: one compact row per record
+    """
+
+    normalize = row_class._loader.normalize
+    make = row_class._make
+
+    return [make(normalize(record).values()) for record in records]
@@ -1,8 +1,16 @@
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel
 
 
+class CrystalPlateReportSourceEnum(str, Enum):
+    # Counts kept up to date in the crystal_plate_counters table.
+    COUNTERS = "counters"
+    # Counts computed from the wells of the selected plates at query time.
+    LIVE = "live"
+
+
 class CrystalPlateFilterModel(BaseModel):
     """
     Model containing crystal plate query filter.
@@ -20,3 +28,4 @@ class CrystalPlateFilterModel(BaseModel):
 
     # These choices are only used in the report query.
     needing_intervention: Optional[bool] = None
+    report_source: Optional[CrystalPlateReportSourceEnum] = None
@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from xchembku_api.models.crystal_well_autolocation_model import (
+    CrystalWellAutolocationModel,
+)
+from xchembku_api.models.crystal_well_droplocation_model import (
+    CrystalWellDroplocationModel,
+)
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+
+
+class CrystalWellChangesModel(BaseModel):
+    """
+    Model containing the wells, autolocations and droplocations inserted since a cursor.
+
+    Typically this structure is returned by the change feed.
+    """
+
+    crystal_wells: List[CrystalWellModel] = []
+    crystal_well_autolocations: List[CrystalWellAutolocationModel] = []
+    crystal_well_droplocations: List[CrystalWellDroplocationModel] = []
+
+    # Position after these changes, to be given back when asking for the next ones.
+    # This is opaque to the caller, and None means from the beginning.
+    cursor: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        """
+        True if there are no changes at all.
+        """
+        return (
+            len(self.crystal_wells) == 0
+            and len(self.crystal_well_autolocations) == 0
+            and len(self.crystal_well_droplocations) == 0
+        )
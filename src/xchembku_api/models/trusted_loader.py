@@ -0,0 +1,169 @@
+import logging
+from typing import Any, Dict, List, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+ModelType = TypeVar("ModelType", bound=BaseModel)
+
+
+# ----------------------------------------------------------------------------------------
+class TrustedLoader:
+    """
+    Builds models from database rows without running the pydantic validation.
+
+    Only for rows which come from our own database, whose columns already hold the right types.
+    The few conversions the database drivers need are still done:
+    sqlite gives booleans as 0 or 1 and mysql gives sums as decimals.
+    Columns in the row which are not fields of the model are left out,
+    and fields missing from the row get their default.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, model_class: Type[BaseModel]):
+        self.__model_class = model_class
+
+        # Name and default of each field, worked out once per model class.
+        self.__defaults: List[Tuple[str, Any]] = []
+
+        # Fields whose values may need converting to the field's type.
+        self.__conversions: List[Tuple[str, Type]] = []
+
+        for field_name, field in model_class.__fields__.items():
+            self.__defaults.append((field_name, field.default))
+            if field.type_ is bool or field.type_ is int:
+                self.__conversions.append((field_name, field.type_))
+
+    # ----------------------------------------------------------------------------------------
+    def normalize(self, record: Dict) -> Dict:
+        """
+        Make a database row into the same dict as the model's dict() would give.
+        """
+
+        get = record.get
+        values = {
+            field_name: get(field_name, default)
+            for field_name, default in self.__defaults
+        }
+
+        for field_name, field_type in self.__conversions:
+            value = values[field_name]
+            if value is not None and value.__class__ is not field_type:
+                values[field_name] = field_type(value)
+
+        return values
+
+    # ----------------------------------------------------------------------------------------
+    def columnize(self, records: List[Dict]) -> Dict[str, List]:
+        """
+        Make database rows into one list of values per field, in the model's field order.
+
+        Each list has one value per row, the same as the models' dict() would give.
+        """
+
+        columns = {
+            field_name: [record.get(field_name, default) for record in records]
+            for field_name, default in self.__defaults
+        }
+
+        for field_name, field_type in self.__conversions:
+            columns[field_name] = [
+                value
+                if value is None or value.__class__ is field_type
+                else field_type(value)
+                for value in columns[field_name]
+            ]
+
+        return columns
+
+    # ----------------------------------------------------------------------------------------
+    def load(self, record: Dict) -> BaseModel:
+        """
+        Build one model from a database row.
+        """
+
+        values = self.normalize(record)
+
+        # This is what pydantic's construct does, less its handling of aliases and extras.
+        model = self.__model_class.__new__(self.__model_class)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__fields_set__", set(values))
+
+        return model
+
+
+# Loaders are kept since working out the fields costs more than loading a row.
+__loaders: Dict[Type[BaseModel], TrustedLoader] = {}
+
+
+# ----------------------------------------------------------------------------------------
+def get_trusted_loader(model_class: Type[BaseModel]) -> TrustedLoader:
+    """
+    Get the loader for the model class, making it the first time.
+    """
+
+    loader = __loaders.get(model_class)
+    if loader is None:
+        loader = TrustedLoader(model_class)
+        __loaders[model_class] = loader
+
+    return loader
+
+
+# ----------------------------------------------------------------------------------------
+def load_trusted(model_class: Type[ModelType], records: List[Dict]) -> List[ModelType]:
+    """
+    Build models from rows which came out of our own database.
+
+    Args:
+        model_class: the pydantic model class
+        records (List[Dict]): the rows from the query
+
+    Returns:
+        List: one model per row
+    """
+
+    load = get_trusted_loader(model_class).load
+    return [load(record) for record in records]  # type: ignore
+
+
+# ----------------------------------------------------------------------------------------
+def normalize_trusted(model_class: Type[BaseModel], records: List[Dict]) -> List[Dict]:
+    """
+    Make rows which came out of our own database into the dicts the models would give,
+    without making the models.
+
+    This is for serializing query results straight into a response.
+
+    Args:
+        model_class: the pydantic model class
+        records (List[Dict]): the rows from the query
+
+    Returns:
+        List[Dict]: one dict per row
+    """
+
+    normalize = get_trusted_loader(model_class).normalize
+    return [normalize(record) for record in records]
+
+
+# ----------------------------------------------------------------------------------------
+def columnize_trusted(
+    model_class: Type[BaseModel], records: List[Dict]
+) -> Dict[str, List]:
+    """
+    Make rows which came out of our own database into columns, without making the models.
+
+    This is for bulk consumers, where a list per field is much smaller
+    to send and to parse than a dict per row.
+
+    Args:
+        model_class: the pydantic model class
+        records (List[Dict]): the rows from the query
+
+    Returns:
+        Dict[str, List]: one list of values per model field, each with one value per row
+    """
+
+    return get_trusted_loader(model_class).columnize(records)
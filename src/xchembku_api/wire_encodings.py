@@ -0,0 +1,68 @@
+import json
+import logging
+from typing import Any, Union
+
+# Faster json, if installed.
+try:
+    import orjson
+
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+
+class WireEncodings:
+    """
+    Codecs for the protocolj request and response bodies.
+
+    Both are the same json on the wire, ORJSON is only the faster codec.
+    """
+
+    JSON = "json"
+    ORJSON = "orjson"
+
+
+# ----------------------------------------------------------------------------------------
+def resolve_wire_encoding(encoding: str) -> str:
+    """
+    Give the encoding to use for the one asked for,
+    falling back to plain json when orjson is not installed.
+
+    Raises:
+        RuntimeError: the encoding is not one we know
+    """
+
+    if encoding not in [WireEncodings.JSON, WireEncodings.ORJSON]:
+        raise RuntimeError(f'unknown wire encoding "{encoding}"')
+
+    if encoding == WireEncodings.ORJSON and not HAVE_ORJSON:
+        encoding = WireEncodings.JSON
+
+    return encoding
+
+
+# ----------------------------------------------------------------------------------------
+def encode_wire(encoding: str, value: Any) -> bytes:
+    """
+    Encode a value into a body.
+    """
+
+    if encoding == WireEncodings.ORJSON:
+        # Allow keys which aren't strings, the same as json.dumps does.
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(value).encode()
+
+
+# ----------------------------------------------------------------------------------------
+def decode_wire(encoding: str, body: Union[bytes, str]) -> Any:
+    """
+    Decode a body.
+    """
+
+    if encoding == WireEncodings.ORJSON:
+        return orjson.loads(body)
+
+    return json.loads(body)
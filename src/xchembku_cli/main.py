@@ -8,6 +8,7 @@ import multiprocessing
 from dls_mainiac_lib.mainiac import Mainiac
 
 # The subcommands.
+from xchembku_cli.subcommands.rebuild_counters import RebuildCounters
 from xchembku_cli.subcommands.service import Service
 
 # The package version.
@@ -29,6 +30,9 @@ class Main(Mainiac):
         if self._args.subcommand == "service":
             Service(self._args, self).run()
 
+        elif self._args.subcommand == "rebuild_counters":
+            RebuildCounters(self._args, self).run()
+
         else:
             raise RuntimeError("unhandled subcommand %s" % (self._args.subcommand))
 
@@ -64,6 +68,13 @@ class Main(Mainiac):
         subparser = subparsers.add_parser("service", help="Run service (blocking).")
         Service.add_arguments(subparser)
 
+        # --------------------------------------------------------------------
+        subparser = subparsers.add_parser(
+            "rebuild_counters",
+            help="Recount the per-plate counters used by the crystal plate report.",
+        )
+        RebuildCounters.add_arguments(subparser)
+
         return parser
 
     # --------------------------------------------------------------------------
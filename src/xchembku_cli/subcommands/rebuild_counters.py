@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+
+# Use standard logging in this module.
+import logging
+
+from dls_utilpack.require import require
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Base class for cli subcommands.
+from xchembku_cli.subcommands.base import ArgKeywords, Base
+
+logger = logging.getLogger()
+
+
+# --------------------------------------------------------------
+class RebuildCounters(Base):
+    """
+    Recount the per-plate counters used by the crystal plate report.
+    """
+
+    def __init__(self, args, mainiac):
+        super().__init__(args)
+
+    # ----------------------------------------------------------------------------------------
+    def run(self):
+        """ """
+
+        # Run in asyncio event loop.
+        asyncio.run(self.__run_coro())
+
+    # ----------------------------------------------------------
+    async def __run_coro(self):
+        """
+        Rebuild the counters as an asyncio coro.
+        """
+
+        # Load the configuration.
+        multiconf_object = self.get_multiconf(vars(self._args))
+        # Resolve the symbols and give configuration as a dict.
+        multiconf_dict = await multiconf_object.load()
+
+        # Get the specfication we want by keyword in the full configuration.
+        specification = require(
+            "configuration",
+            multiconf_dict,
+            "xchembku_dataface_specification",
+        )
+
+        # Make the xchembku client context from the specification in the configuration.
+        # This talks to the running service, or to the database directly if so configured.
+        context = XchembkuDatafaceClientContext(specification)
+
+        async with context as dataface:
+            result = await dataface.rebuild_crystal_plate_counters()
+
+        logger.info(f"rebuilt counters for {result['plate_count']} plates")
+
+    # ----------------------------------------------------------
+    @staticmethod
+    def add_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        """
+        Add arguments for this subcommand.
+
+        This is a static method called from the main program.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser object which has been created already.
+
+        """
+
+        parser.add_argument(
+            "--configuration",
+            "-c",
+            help="Configuration file.",
+            type=str,
+            metavar="filename.yaml",
+            default=None,
+            dest=ArgKeywords.CONFIGURATION,
+        )
+
+        return parser
@@ -1,14 +1,111 @@
 import logging
 
+import aiohttp.web
+from dls_servbase_api.constants import Keywords
 from dls_servbase_lib.base_aiohttp import BaseAiohttp as DlsServbaseBaseAiohttp
+from dls_servbase_lib.base_aiohttp import Opaque
+
+from xchembku_api.wire_encodings import (
+    WireEncodings,
+    decode_wire,
+    encode_wire,
+    resolve_wire_encoding,
+)
 
 logger = logging.getLogger(__name__)
 
+# Responses this small fit in a network packet or two, so compressing them saves no time.
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+
 
 # ------------------------------------------------------------------------------------------
 class BaseAiohttp(DlsServbaseBaseAiohttp):
     """
     Object representing a a process which receives requests from aiohttp.
+
+    The aiohttp_specification may give an encoding of orjson,
+    in which case protocolj requests are decoded, and their responses encoded,
+    with the faster json codec.
+
+    Responses larger than the compression_threshold in the aiohttp_specification
+    are compressed by aiohttp, in whichever coding the client's Accept-Encoding allows.
+    A compression_threshold of None turns compression off.
     """
 
-    pass
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, aiohttp_specification, calling_file=None):
+        DlsServbaseBaseAiohttp.__init__(
+            self, aiohttp_specification, calling_file=calling_file
+        )
+
+        self.__wire_encoding = resolve_wire_encoding(
+            aiohttp_specification.get("encoding", WireEncodings.JSON)
+        )
+
+        self.__compression_threshold = aiohttp_specification.get(
+            "compression_threshold", DEFAULT_COMPRESSION_THRESHOLD
+        )
+
+    # ----------------------------------------------------------------------------------------
+    def __should_compress(self, web_response) -> bool:
+        """
+        True if the response is large enough to be worth compressing.
+        """
+
+        if self.__compression_threshold is None or web_response.status != 200:
+            return False
+
+        body = web_response.body
+        return isinstance(body, bytes) and len(body) > self.__compression_threshold
+
+    # ------------------------------------------------------------------------------------------
+    # Handle generic protocolj request.
+    async def _route_protocolj(self, web_request):
+        if self.__wire_encoding == WireEncodings.ORJSON:
+            web_response = await self.__route_protocolj_orjson(web_request)
+        else:
+            web_response = await DlsServbaseBaseAiohttp._route_protocolj(
+                self, web_request
+            )
+
+        # Aiohttp leaves the response alone if the client accepts no compression.
+        if self.__should_compress(web_response):
+            web_response.enable_compression()
+
+        return web_response
+
+    # ------------------------------------------------------------------------------------------
+    async def __route_protocolj_orjson(self, web_request):
+        """
+        Handle the request as the base class does, but with the faster json codec both ways.
+
+        The base class always encodes its response with the standard json codec,
+        so it can't be used for this.
+        """
+
+        try:
+            # Make an object to identify this transaction.
+            opaque = Opaque()
+
+            # Read the full body of the request and parse as json.
+            content = decode_wire(WireEncodings.ORJSON, await web_request.read())
+
+            await self.register_cookies(
+                opaque, web_request, content.get(Keywords.ENABLE_COOKIES, [])
+            )
+
+            # Dispatch the request to be handled per business logic.
+            response_dict = await self.dispatch(content, opaque)
+
+            # Make a response object, the same json as the base class would give.
+            web_response = aiohttp.web.Response(
+                body=encode_wire(WireEncodings.ORJSON, response_dict),
+                content_type="application/json",
+            )
+
+            # Flush all cookies.
+            await self.flush_cookies(opaque, web_response)
+
+            return web_response
+        except Exception as exception:
+            return self._compose_standard_exception(exception)
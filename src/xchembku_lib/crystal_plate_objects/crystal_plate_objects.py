@@ -1,6 +1,6 @@
 # Use standard logging in this module.
 import logging
-from typing import List
+from typing import Dict, List
 
 # Class managing list of things.
 from dls_utilpack.things import Things
@@ -24,6 +24,9 @@ class CrystalPlateObjects(Things):
     List of available crystal plate object types.
     """
 
+    # Plate objects hold no state, so one instance per type can be shared.
+    __cached_objects: Dict[str, CrystalPlateInterface] = {}
+
     # ----------------------------------------------------------------------------------------
     def __init__(self, name=None):
         Things.__init__(self, name)
@@ -54,6 +57,19 @@ class CrystalPlateObjects(Things):
 
         return object_instance
 
+    # ----------------------------------------------------------------------------------------
+    def build_cached_object(self, thing_type: str) -> CrystalPlateInterface:
+        """
+        Return the shared plate object for the given type, building it the first time.
+        """
+
+        object_instance = CrystalPlateObjects.__cached_objects.get(thing_type)
+        if object_instance is None:
+            object_instance = self.build_object({"type": thing_type})
+            CrystalPlateObjects.__cached_objects[thing_type] = object_instance
+
+        return object_instance
+
     # ----------------------------------------------------------------------------------------
     def lookup_class(self, class_type):
         """
@@ -1,6 +1,6 @@
 import logging
 import re
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 # Base class for generic things.
 from dls_utilpack.thing import Thing
@@ -87,3 +87,38 @@ class Swiss3(Thing, Interface):
         )
 
         return (x, y)
+
+    # ----------------------------------------------------------------------------------------
+    def compute_drop_locations_microns(
+        self,
+        confirmed_targets_x: Sequence[Optional[float]],
+        confirmed_targets_y: Sequence[Optional[float]],
+        well_centroids_x: Sequence[float],
+        well_centroids_y: Sequence[float],
+    ) -> Tuple[List[Optional[int]], List[Optional[int]]]:
+        """
+        Converts the confirmed targets of many wells to microns at once.
+
+        Each well is converted by compute_drop_location_microns, so the two always agree.
+        """
+
+        xs: List[Optional[int]] = []
+        ys: List[Optional[int]] = []
+        for target_x, target_y, centroid_x, centroid_y in zip(
+            confirmed_targets_x,
+            confirmed_targets_y,
+            well_centroids_x,
+            well_centroids_y,
+        ):
+            x, y = self.compute_drop_location_microns(
+                {
+                    "confirmed_target_x": target_x,
+                    "confirmed_target_y": target_y,
+                    "well_centroid_x": centroid_x,
+                    "well_centroid_y": centroid_y,
+                }
+            )
+            xs.append(x)
+            ys.append(y)
+
+        return (xs, ys)
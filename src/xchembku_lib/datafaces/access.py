@@ -0,0 +1,70 @@
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class AccessTypes:
+    READ_ONLY = "read_only"
+    MUTATING = "mutating"
+    REMOTE = "remote"
+
+
+# Attribute put on the decorated function.
+ACCESS_ATTRIBUTE = "xchembku_access"
+
+
+# ----------------------------------------------------------------------------------------
+def read_only(function: Callable) -> Callable:
+    """
+    Decorator marking a dataface method as one which never changes the database.
+
+    The server may run these concurrently on a reader connection.
+    """
+
+    setattr(function, ACCESS_ATTRIBUTE, AccessTypes.READ_ONLY)
+    return function
+
+
+# ----------------------------------------------------------------------------------------
+def mutating(function: Callable) -> Callable:
+    """
+    Decorator marking a dataface method as one which changes the database.
+
+    The server runs these one at a time on the writer connection.
+    """
+
+    setattr(function, ACCESS_ATTRIBUTE, AccessTypes.MUTATING)
+    return function
+
+
+# ----------------------------------------------------------------------------------------
+def remote(function: Callable) -> Callable:
+    """
+    Decorator marking a dataface method which spends its time waiting on another service,
+    and which changes the database only in short writes at the end.
+
+    The server runs these concurrently on a reader connection,
+    and lends them the writer for just their writes.
+    """
+
+    setattr(function, ACCESS_ATTRIBUTE, AccessTypes.REMOTE)
+    return function
+
+
+# ----------------------------------------------------------------------------------------
+def get_access(function: Callable) -> str:
+    """
+    Get the access type of a dataface method.
+
+    Methods which are not marked are presumed to be mutating, which is the safe choice.
+
+    Args:
+        function (Callable): the method, bound or not
+
+    Returns:
+        str: one of the AccessTypes
+    """
+
+    return getattr(function, ACCESS_ATTRIBUTE, AccessTypes.MUTATING)
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import multiprocessing
 import threading
+import time
 
 # Utilities.
 from dls_utilpack.callsign import callsign
@@ -17,9 +18,11 @@ from xchembku_api.datafaces.constants import Commands, Keywords
 # Base class for an aiohttp server.
 from xchembku_lib.base_aiohttp import BaseAiohttp
 
-# Types of xchembku_dataface.
-# Global xchembku_dataface.
-from xchembku_lib.datafaces.datafaces import Datafaces
+# Pool of local xchembku_datafaces, each with its own database connection.
+from xchembku_lib.datafaces.connection_pool import ConnectionPool
+
+# Tables given by the change feed.
+from xchembku_lib.datafaces.direct_crystal_well_changes import CHANGES_TABLE_NAMES
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +43,10 @@ class Aiohttp(Thing, BaseAiohttp):
             specification["type_specific_tbd"]["aiohttp_specification"],
         )
 
-        self.__actual_dataface = None
+        self.__connection_pool = None
+
+        # Set when a write finishes, then replaced, to wake those waiting for changes.
+        self.__changed_event = None
 
     # ----------------------------------------------------------------------------------------
     def callsign(self):
@@ -84,19 +90,19 @@ class Aiohttp(Thing, BaseAiohttp):
             # No special routes, we will use protocolj dispathcing only
             route_tuples = []
 
-            # Build a local xchembku_dataface for our back-end.
-            self.__actual_dataface = Datafaces().build_object(
-                self.specification()["type_specific_tbd"][
-                    "actual_xchembku_dataface_specification"
-                ]
+            actual_xchembku_dataface_specification = self.specification()[
+                "type_specific_tbd"
+            ]["actual_xchembku_dataface_specification"]
+
+            # Build a pool of local xchembku_datafaces for our back-end.
+            self.__connection_pool = ConnectionPool(
+                actual_xchembku_dataface_specification
             )
 
-            # Use a lock around all transaction-based requests.
-            # TODO: Remove aiohttp transaction lock and instead use connection pool.
-            self.__request_lock = asyncio.Lock()
+            # Get the local implementations started.
+            await self.__connection_pool.start()
 
-            # Get the local implementation started.
-            await self.__actual_dataface.start()
+            self.__changed_event = asyncio.Event()
 
             await self.activate_coro_base(route_tuples)
 
@@ -107,8 +113,9 @@ class Aiohttp(Thing, BaseAiohttp):
     async def direct_shutdown(self):
         """"""
         try:
-            # Disconnect our local dataface connection, i.e. the one which holds the database connection.
-            await self.__actual_dataface.disconnect()
+            # Disconnect our local dataface connections, i.e. the ones which hold the database connections.
+            if self.__connection_pool is not None:
+                await self.__connection_pool.disconnect()
 
         except Exception as exception:
             logger.warning(
@@ -120,6 +127,22 @@ class Aiohttp(Thing, BaseAiohttp):
         # Let the base class stop the server listener.
         await self.base_direct_shutdown()
 
+    # ----------------------------------------------------------------------------------------
+    def __get_function(self, actual_dataface, name: str):
+        """
+        Get the dataface method which a request names.
+
+        Raises:
+            RuntimeError: the name is of a private method, which is only for the dataface's own use
+        """
+
+        if name.startswith("_"):
+            raise RuntimeError(
+                f"dataface method {name} cannot be called from a request"
+            )
+
+        return getattr(actual_dataface, name)
+
     # ----------------------------------------------------------------------------------------
     async def __do_actually(self, function, args, kwargs):
         """"""
@@ -128,36 +151,134 @@ class Aiohttp(Thing, BaseAiohttp):
         # logger.info(describe("args", args))
         # logger.info(describe("kwargs", kwargs))
 
-        # Get the function which the caller wants executed.
-        function = getattr(self.__actual_dataface, function)
+        # Caller wants the function wrapped in a transaction?
+        if "as_transaction" in kwargs:
+            as_transaction = kwargs["as_transaction"]
+            # Take the keyword out of the kwargs because the functions don't have it.
+            kwargs.pop("as_transaction")
+        else:
+            as_transaction = False
 
-        # Lock out all other requests from running at the same time.
-        async with self.__request_lock:
+        # Reads, and calls waiting on other services, run concurrently on the readers.
+        # Everything else goes one at a time through the writer.
+        if not as_transaction and self.__connection_pool.runs_on_reader(function):
+            acquire = self.__connection_pool.acquire_reader
+        else:
+            acquire = self.__connection_pool.acquire_writer
 
-            # Caller wants the function wrapped in a transaction?
-            if "as_transaction" in kwargs:
-                as_transaction = kwargs["as_transaction"]
-                # Take the keyword out of the kwargs because the functions don't have it.
-                kwargs.pop("as_transaction")
-            else:
-                as_transaction = False
+        async with acquire() as actual_dataface:
+            # Get the function which the caller wants executed.
+            function = self.__get_function(actual_dataface, function)
 
-            if as_transaction:
-                # Make sure we have an actual connection.
-                await self.__actual_dataface.establish_database_connection()
+            # Make sure we have an actual connection.
+            await actual_dataface.establish_database_connection()
 
+            if as_transaction:
                 try:
-                    await self.__actual_dataface.begin()
+                    await actual_dataface.begin()
                     response = await function(*args, **kwargs)
-                    await self.__actual_dataface.commit()
+                    await actual_dataface.commit()
                 except Exception:
-                    await self.__actual_dataface.rollback()
+                    await actual_dataface.rollback()
                     raise
             else:
-                response = await function(*args, **kwargs)
+                try:
+                    response = await function(*args, **kwargs)
+                except Exception:
+                    # Don't leave a failed call's writes for the next commit to publish.
+                    await actual_dataface.rollback()
+                    raise
+                # Leave no transaction open, so anything written is visible to the other connections.
+                await actual_dataface.commit()
+
+        # Wake anyone waiting for changes after a write.
+        if acquire == self.__connection_pool.acquire_writer:
+            self.__changed_event.set()
+            self.__changed_event = asyncio.Event()
 
         return response
 
+    # ----------------------------------------------------------------------------------------
+    async def __do_batch(self, calls, as_transaction):
+        """
+        Run an ordered list of calls, giving the list of their responses.
+
+        As a transaction, the calls all run on the writer and are committed or rolled back together.
+        Otherwise each call is routed and committed as if it had come on its own,
+        and the batch stops at the first which fails.
+        """
+
+        for call in calls:
+            if call["function"] == "wait_for_crystal_well_changes_serialized":
+                raise RuntimeError("cannot wait for crystal well changes in a batch")
+
+        responses = []
+
+        if not as_transaction:
+            for call in calls:
+                responses.append(
+                    await self.__do_actually(
+                        call["function"], call["args"], call["kwargs"]
+                    )
+                )
+            return responses
+
+        async with self.__connection_pool.acquire_writer() as actual_dataface:
+            # Make sure we have an actual connection.
+            await actual_dataface.establish_database_connection()
+
+            try:
+                await actual_dataface.begin()
+                for call in calls:
+                    # The whole batch is the transaction, so the calls don't need their own.
+                    kwargs = dict(call["kwargs"])
+                    kwargs.pop("as_transaction", None)
+
+                    function = self.__get_function(actual_dataface, call["function"])
+                    responses.append(await function(*call["args"], **kwargs))
+                await actual_dataface.commit()
+            except Exception:
+                await actual_dataface.rollback()
+                raise
+
+        # Wake anyone waiting for changes after a write.
+        self.__changed_event.set()
+        self.__changed_event = asyncio.Event()
+
+        return responses
+
+    # ----------------------------------------------------------------------------------------
+    async def __wait_for_crystal_well_changes(self, args, kwargs):
+        """
+        Long poll for changes.
+
+        No database connection is held while waiting,
+        instead the changes are fetched again each time a write finishes.
+        """
+
+        timeout_seconds = kwargs.pop("timeout_seconds", 30.0)
+        timeout_time = time.time() + timeout_seconds
+
+        while True:
+            # Take the event before looking, so a write finishing meanwhile is not missed.
+            changed_event = self.__changed_event
+
+            response = await self.__do_actually(
+                "fetch_crystal_well_changes_serialized", args, dict(kwargs)
+            )
+
+            is_empty = all(
+                len(response[table_name]) == 0 for table_name in CHANGES_TABLE_NAMES
+            )
+            remaining_seconds = timeout_time - time.time()
+            if not is_empty or remaining_seconds <= 0:
+                return response
+
+            try:
+                await asyncio.wait_for(changed_event.wait(), remaining_seconds)
+            except asyncio.TimeoutError:
+                pass
+
     # ----------------------------------------------------------------------------------------
     async def dispatch(self, request_dict, opaque):
         """"""
@@ -168,8 +289,19 @@ class Aiohttp(Thing, BaseAiohttp):
 
         if command == Commands.EXECUTE:
             payload = require("request json", request_dict, Keywords.PAYLOAD)
-            response = await self.__do_actually(
-                payload["function"], payload["args"], payload["kwargs"]
+            # Waiting for changes is done here so it doesn't hold a connection.
+            if payload["function"] == "wait_for_crystal_well_changes_serialized":
+                response = await self.__wait_for_crystal_well_changes(
+                    payload["args"], payload["kwargs"]
+                )
+            else:
+                response = await self.__do_actually(
+                    payload["function"], payload["args"], payload["kwargs"]
+                )
+        elif command == Commands.BATCH:
+            payload = require("request json", request_dict, Keywords.PAYLOAD)
+            response = await self.__do_batch(
+                payload["calls"], payload.get("as_transaction", False)
             )
         else:
             raise RuntimeError("invalid command %s" % (command))
@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import copy
+import logging
+from typing import AsyncIterator, List, Optional
+
+# Database types.
+from dls_normsql.constants import ClassTypes
+
+# Utilities.
+from dls_utilpack.callsign import callsign
+from dls_utilpack.explain import explain
+
+# Read/write classification of the dataface methods.
+from xchembku_lib.datafaces.access import AccessTypes, get_access
+
+# Types of xchembku_dataface.
+from xchembku_lib.datafaces.datafaces import Datafaces
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------------------------
+class ConnectionPool:
+    """
+    Pool of local xchembku_dataface objects, each holding its own database connection.
+
+    The first connection is the writer, which is used by one request at a time.
+    The rest are readers, shared among the read-only and remote requests which run concurrently.
+    The readers are lent the writer for the short writes which the remote requests make.
+    A request checks out its connection for its whole duration,
+    so a transaction stays on a single connection.
+    """
+
+    # Number of connections when the specification doesn't say.
+    DEFAULT_SIZE = 4
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, specification):
+        """
+        Args:
+            specification (dict): the actual_xchembku_dataface_specification,
+                which may contain connection_pool_size and, for sqlite, journal_mode
+        """
+
+        self.__specification = specification
+
+        self.__size = int(specification.get("connection_pool_size", self.DEFAULT_SIZE))
+        if self.__size < 1:
+            raise RuntimeError(
+                f"configuration error: connection_pool_size {self.__size} is less than 1"
+            )
+
+        # Sqlite journal mode, such as WAL which lets readers proceed while the writer commits.
+        self.__journal_mode: Optional[str] = specification.get("journal_mode")
+
+        self.__writer = None
+        self.__writer_lock = asyncio.Lock()
+
+        self.__readers: List = []
+        self.__available_readers: asyncio.Queue = asyncio.Queue()
+
+    # ----------------------------------------------------------------------------------------
+    def callsign(self):
+        """"""
+        return f"ConnectionPool[{self.__size}]"
+
+    # ----------------------------------------------------------------------------------------
+    def size(self) -> int:
+        """"""
+        return self.__size
+
+    # ----------------------------------------------------------------------------------------
+    async def start(self):
+        """
+        Build and connect all the datafaces in the pool.
+
+        Only the writer applies schema revisions and possibly drops the database.
+        """
+
+        self.__writer = Datafaces().build_object(self.__specification)
+        await self.__writer.start()
+
+        database_type = self.__specification.get("database", {}).get("type")
+        if self.__journal_mode is not None and database_type == ClassTypes.AIOSQLITE:
+            # Journal mode can't change inside the transaction left open by starting.
+            await self.__writer.commit()
+            # The pragma returns a row, so use query to consume it.
+            records = await self.__writer.query(
+                f"PRAGMA journal_mode={self.__journal_mode}",
+                why=f"{callsign(self)} journal mode",
+            )
+            logger.debug(
+                f"{callsign(self)} journal mode is {records[0]['journal_mode']}"
+            )
+
+        # The readers must not drop the database the writer just made.
+        specification = copy.deepcopy(self.__specification)
+        specification.pop("should_drop_database", None)
+
+        for _ in range(1, self.__size):
+            dataface = Datafaces().build_object(specification)
+            await dataface.establish_database_connection()
+            # Remote requests on the reader make their writes on the writer.
+            dataface._lend_writer(self.write_transaction)
+            self.__readers.append(dataface)
+            self.__available_readers.put_nowait(dataface)
+
+        logger.debug(f"{callsign(self)} started with {len(self.__readers)} readers")
+
+    # ----------------------------------------------------------------------------------------
+    def runs_on_reader(self, function_name: str) -> bool:
+        """
+        Look up whether the named dataface method is marked as read-only or remote.
+
+        Args:
+            function_name (str): name of the method on the pooled dataface class
+
+        Returns:
+            bool: True if the method can run on a reader
+        """
+
+        function = getattr(type(self.__writer), function_name, None)
+        if function is None:
+            raise RuntimeError(
+                f"{callsign(self)} dataface has no method {function_name}"
+            )
+
+        return get_access(function) in [AccessTypes.READ_ONLY, AccessTypes.REMOTE]
+
+    # ----------------------------------------------------------------------------------------
+    @contextlib.asynccontextmanager
+    async def acquire_writer(self) -> AsyncIterator:
+        """
+        Check out the writer for exclusive use, waiting until it is free.
+        """
+
+        async with self.__writer_lock:
+            yield self.__writer
+
+    # ----------------------------------------------------------------------------------------
+    @contextlib.asynccontextmanager
+    async def write_transaction(self) -> AsyncIterator:
+        """
+        Check out the writer, then commit what was written on it, or roll it back on error.
+        """
+
+        async with self.acquire_writer() as dataface:
+            # Make sure we have an actual connection.
+            await dataface.establish_database_connection()
+
+            try:
+                yield dataface
+            except Exception:
+                await dataface.rollback()
+                raise
+
+            await dataface.commit()
+
+    # ----------------------------------------------------------------------------------------
+    @contextlib.asynccontextmanager
+    async def acquire_reader(self) -> AsyncIterator:
+        """
+        Check out a reader for exclusive use, waiting until one is free.
+
+        A pool of size 1 has no readers, so reads share the writer.
+        """
+
+        if len(self.__readers) == 0:
+            async with self.acquire_writer() as dataface:
+                yield dataface
+            return
+
+        dataface = await self.__available_readers.get()
+        try:
+            yield dataface
+        finally:
+            self.__available_readers.put_nowait(dataface)
+
+    # ----------------------------------------------------------------------------------------
+    async def disconnect(self):
+        """
+        Disconnect all the datafaces in the pool.
+        """
+
+        datafaces = list(self.__readers)
+        if self.__writer is not None:
+            datafaces.append(self.__writer)
+
+        for dataface in datafaces:
+            try:
+                await dataface.disconnect()
+            except Exception as exception:
+                logger.warning(
+                    callsign(self, explain(exception, "disconnecting pooled dataface"))
+                )
+
+        self.__writer = None
+        self.__readers = []
+        self.__available_readers = asyncio.Queue()
@@ -1,10 +1,19 @@
 import logging
 
 from xchembku_lib.datafaces.direct_base import DirectBase
+from xchembku_lib.datafaces.direct_crystal_plate_counters import (
+    DirectCrystalPlateCounters,
+)
 from xchembku_lib.datafaces.direct_crystal_plates import DirectCrystalPlates
+from xchembku_lib.datafaces.direct_crystal_well_autolocation_leases import (
+    DirectCrystalWellAutolocationLeases,
+)
 from xchembku_lib.datafaces.direct_crystal_well_autolocations import (
     DirectCrystalWellAutolocations,
 )
+from xchembku_lib.datafaces.direct_crystal_well_changes import (
+    DirectCrystalWellChanges,
+)
 from xchembku_lib.datafaces.direct_crystal_well_droplocations import (
     DirectCrystalWellDroplocations,
 )
@@ -20,8 +29,11 @@ class Direct(
     DirectCrystalPlates,
     DirectCrystalWells,
     DirectCrystalWellAutolocations,
+    DirectCrystalWellAutolocationLeases,
     DirectCrystalWellDroplocations,
+    DirectCrystalWellChanges,
     DirectSoakdb3CrystalWells,
+    DirectCrystalPlateCounters,
     DirectBase,
 ):
     """ """
@@ -29,4 +41,6 @@ class Direct(
     # ----------------------------------------------------------------------------------------
     def __init__(self, specification=None):
         DirectBase.__init__(self, specification)
-        DirectCrystalWellDroplocations.__init__(self, specification)
+        DirectCrystalPlateCounters.__init__(self, specification)
+        DirectCrystalWellAutolocationLeases.__init__(self, specification)
+        DirectSoakdb3CrystalWells.__init__(self, specification)
@@ -1,7 +1,9 @@
 import logging
-from typing import Dict
+from datetime import datetime
+from typing import Dict, List, Optional
 
 # Database manager.
+from dls_normsql.constants import ClassTypes, CommonFieldnames
 from dls_normsql.databases import Databases
 from dls_utilpack.callsign import callsign
 
@@ -10,6 +12,9 @@ from dls_utilpack.thing import Thing
 
 from xchembku_api.databases.database_definition import DatabaseDefinition
 
+# Read/write classification of the dataface methods.
+from xchembku_lib.datafaces.access import mutating, read_only
+
 logger = logging.getLogger(__name__)
 
 thing_type = "xchembku_lib.xchembku_datafaces.direct"
@@ -25,7 +30,12 @@ class DirectBase(Thing):
         # For testing, caller might want to drop the database on connection.
         self.__should_drop_database = specification.get("should_drop_database")
 
-        self.__database_definition_object = DatabaseDefinition()
+        # Some sql, like upsert, is different between database types.
+        self.__database_type = specification.get("database", {}).get("type")
+
+        self.__database_definition_object = DatabaseDefinition(
+            database_type=self.__database_type
+        )
 
         self.__database = None
 
@@ -72,6 +82,7 @@ class DirectBase(Thing):
         return self
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def backup(self):
         """"""
         await self.establish_database_connection()
@@ -79,6 +90,7 @@ class DirectBase(Thing):
         return await self.__database.backup()
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def restore(self, nth):
         """"""
         await self.establish_database_connection()
@@ -86,6 +98,8 @@ class DirectBase(Thing):
         return await self.__database.restore(nth)
 
     # ----------------------------------------------------------------------------------------
+    # The sql is the caller's, and could write, so it must go to the writer.
+    @mutating
     async def query(self, sql, subs=None, why=None):
         """"""
 
@@ -96,6 +110,7 @@ class DirectBase(Thing):
         return records
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def execute(self, sql, subs=None, why=None):
         """"""
         await self.establish_database_connection()
@@ -103,6 +118,7 @@ class DirectBase(Thing):
         return await self.__database.execute(sql, subs=subs, why=why)
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def insert(self, table_name, records, why=None) -> None:
         """"""
         await self.establish_database_connection()
@@ -110,6 +126,84 @@ class DirectBase(Thing):
         return await self.__database.insert(table_name, records, why=why)
 
     # ----------------------------------------------------------------------------------------
+    @mutating
+    async def upsert(
+        self,
+        table_name: str,
+        records: List[Dict],
+        key_field: str,
+        update_fields: Optional[List[str]] = None,
+        why=None,
+    ) -> None:
+        """
+        Insert the records in a single statement, or update them where the key already exists.
+
+        This relies on the key field having a unique index.
+        The first record is expected to define the fields for all records.
+        Only the update_fields are changed on records which already exist,
+        and if update_fields is None then all fields except uuid, created_on and the key are changed.
+        """
+
+        if len(records) == 0:
+            return
+
+        await self.establish_database_connection()
+
+        if why is None:
+            why = f"upsert {table_name} records"
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+        fields = list(records[0].keys())
+        if CommonFieldnames.CREATED_ON not in fields:
+            fields.append(CommonFieldnames.CREATED_ON)
+
+        if update_fields is None:
+            update_fields = [
+                field
+                for field in fields
+                if field
+                not in [CommonFieldnames.UUID, CommonFieldnames.CREATED_ON, key_field]
+            ]
+
+        subs = []
+        for record in records:
+            values = []
+            for field in fields:
+                value = record.get(field)
+                if field == CommonFieldnames.CREATED_ON and value is None:
+                    value = now
+                values.append(value)
+            subs.append(values)
+
+        sql = "INSERT INTO %s\n  (%s)\n  VALUES (%s)" % (
+            table_name,
+            ", ".join(fields),
+            ", ".join(["?"] * len(fields)),
+        )
+
+        if self.__database_type == ClassTypes.AIOMYSQL:
+            if len(update_fields) == 0:
+                # Assigning the key to itself is the mysql way to do nothing.
+                update_fields = [key_field]
+            sql += "\n  ON DUPLICATE KEY UPDATE %s" % (
+                ", ".join([f"{field} = VALUES({field})" for field in update_fields])
+            )
+        else:
+            if len(update_fields) == 0:
+                sql += f"\n  ON CONFLICT({key_field}) DO NOTHING"
+            else:
+                sql += f"\n  ON CONFLICT({key_field}) DO UPDATE SET %s" % (
+                    ", ".join(
+                        [f"{field} = excluded.{field}" for field in update_fields]
+                    )
+                )
+
+        # Subs as a list of lists makes this an executemany.
+        await self.__database.execute(sql, subs=subs, why=why)
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
     async def update(self, table_name, record, where, subs=None, why=None) -> Dict:
         """"""
         await self.establish_database_connection()
@@ -125,6 +219,7 @@ class DirectBase(Thing):
         }
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def begin(self, why=None) -> None:
         """"""
         await self.establish_database_connection()
@@ -132,6 +227,7 @@ class DirectBase(Thing):
         return await self.__database.begin()
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def commit(self, why=None) -> None:
         """"""
         await self.establish_database_connection()
@@ -139,6 +235,7 @@ class DirectBase(Thing):
         return await self.__database.commit()
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def rollback(self, why=None) -> None:
         """"""
         await self.establish_database_connection()
@@ -146,6 +243,7 @@ class DirectBase(Thing):
         return await self.__database.rollback()
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def report_health(self):
         """"""
 
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+from xchembku_api.databases.crystal_plate_counters import (
+    CHUNK_SIZE,
+    refresh_crystal_plate_counters,
+)
+from xchembku_lib.datafaces.access import mutating
+from xchembku_lib.datafaces.direct_base import DirectBase
+
+logger = logging.getLogger(__name__)
+
+
+class DirectCrystalPlateCounters(DirectBase):
+    """
+    Keeps the per-plate counters in step with the wells.
+
+    A recount deletes and re-inserts the plate's counters row, so two recounts must not interleave.
+    The lock only covers callers sharing this one dataface, as when it is used directly.
+    It serializes nothing across processes, connections or transactions:
+    behind the server, correctness relies on every mutating call going one at a time
+    through the single writer of the connection pool.
+    """
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, specification=None):
+
+        # Keep recounts by concurrent callers of this same dataface from interleaving.
+        self.__refresh_lock = asyncio.Lock()
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def rebuild_crystal_plate_counters_serialized(self, why=None) -> Dict:
+        # Return the method doing the work.
+        return await self.rebuild_crystal_plate_counters(why=why)
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def rebuild_crystal_plate_counters(
+        self,
+        why="rebuild_crystal_plate_counters",
+    ) -> Dict:
+        """
+        Recount the counters of all plates from scratch.
+
+        The counters are normally kept up to date as wells, autolocations and droplocations are written.
+        This is for repairing them should the database have been changed some other way.
+        """
+
+        async with self.__refresh_lock:
+            await refresh_crystal_plate_counters(self, why=why)
+
+        records = await self.query(
+            "SELECT COUNT(*) AS count FROM crystal_plate_counters",
+            why=why,
+        )
+
+        return {"plate_count": records[0]["count"]}
+
+    # ----------------------------------------------------------------------------------------
+    async def _refresh_crystal_plate_counters_for_plates(
+        self,
+        crystal_plate_uuids: List[str],
+        why=None,
+    ) -> None:
+        """
+        Recount the counters of the given plates.
+
+        Called by the upserts which change the plates' wells, not through the server.
+        """
+
+        async with self.__refresh_lock:
+            await refresh_crystal_plate_counters(self, crystal_plate_uuids, why=why)
+
+    # ----------------------------------------------------------------------------------------
+    async def _refresh_crystal_plate_counters_for_wells(
+        self,
+        crystal_well_uuids: List[str],
+        why=None,
+    ) -> None:
+        """
+        Recount the counters of the plates holding the given wells.
+
+        Called by the upserts which change the wells, not through the server.
+        """
+
+        crystal_well_uuids = list(dict.fromkeys(crystal_well_uuids))
+
+        crystal_plate_uuids: List[str] = []
+        for i in range(0, len(crystal_well_uuids), CHUNK_SIZE):
+            chunk = crystal_well_uuids[i : i + CHUNK_SIZE]
+            records = await self.query(
+                "SELECT DISTINCT crystal_plate_uuid FROM crystal_wells WHERE uuid IN (%s)"
+                % (", ".join(["?"] * len(chunk))),
+                subs=chunk,
+                why=why,
+            )
+            crystal_plate_uuids.extend(
+                [record["crystal_plate_uuid"] for record in records]
+            )
+
+        await self._refresh_crystal_plate_counters_for_plates(
+            crystal_plate_uuids, why=why
+        )
@@ -1,12 +1,20 @@
-import copy
 import logging
 from typing import Dict, List, Union
 
-from dls_normsql.constants import CommonFieldnames
-
-from xchembku_api.models.crystal_plate_filter_model import CrystalPlateFilterModel
+from xchembku_api.databases.crystal_plate_counters import build_counters_select
+from xchembku_api.models.compact_rows import (
+    CrystalPlateReportRow,
+    CrystalPlateRow,
+    load_compact_rows,
+)
+from xchembku_api.models.crystal_plate_filter_model import (
+    CrystalPlateFilterModel,
+    CrystalPlateReportSourceEnum,
+)
 from xchembku_api.models.crystal_plate_model import CrystalPlateModel
 from xchembku_api.models.crystal_plate_report_model import CrystalPlateReportModel
+from xchembku_api.models.trusted_loader import load_trusted, normalize_trusted
+from xchembku_lib.datafaces.access import mutating, read_only
 from xchembku_lib.datafaces.direct_base import DirectBase
 
 logger = logging.getLogger(__name__)
@@ -15,7 +23,15 @@ logger = logging.getLogger(__name__)
 class DirectCrystalPlates(DirectBase):
     """ """
 
+    # Report expressions used in both the fields and the where clause.
+    __usable_unexported_count = (
+        "(COALESCE(counters.decided_usable_count, 0)"
+        " - COALESCE(counters.exported_count, 0))"
+    )
+    __undecided_crystals_count = "COALESCE(counters.undecided_crystals_count, 0)"
+
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def upsert_crystal_plates_serialized(
         self,
         records: List[Dict],
@@ -27,6 +43,7 @@ class DirectCrystalPlates(DirectBase):
         return await self.upsert_crystal_plates(models, why=why)
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def upsert_crystal_plates(
         self,
         models: List[CrystalPlateModel],
@@ -37,42 +54,56 @@ class DirectCrystalPlates(DirectBase):
 
         We don't insert the same formulatrix__plate__id twice.
 
-        TODO: Find more efficient way to upsert_crystal_plates in batch.
+        The whole batch is written by a single upsert statement keyed on the unique formulatrix__plate__id.
+        The existing ids are looked up once beforehand only to give the counts.
         """
 
-        inserted_count = 0
-        updated_count = 0
-
-        # Loop over all the models to be upserted.
-        for model in models:
-            # Find any existing record for this model object.
+        if len(models) == 0:
+            return {
+                "updated_count": 0,
+                "inserted_count": 0,
+            }
+
+        # Find which of the plate ids already have a record.
+        plate_ids = list(
+            dict.fromkeys(
+                [
+                    model.formulatrix__plate__id
+                    for model in models
+                    if model.formulatrix__plate__id is not None
+                ]
+            )
+        )
+        existing_plate_ids = set()
+        if len(plate_ids) > 0:
             records = await self.query(
-                "SELECT * FROM crystal_plates WHERE formulatrix__plate__id = ?",
-                subs=[model.formulatrix__plate__id],
+                "SELECT formulatrix__plate__id FROM crystal_plates"
+                " WHERE formulatrix__plate__id IN (%s)"
+                % (", ".join(["?"] * len(plate_ids))),
+                subs=plate_ids,
                 why=why,
             )
+            existing_plate_ids = set(
+                record["formulatrix__plate__id"] for record in records
+            )
 
-            if len(records) > 0:
-                # Make a copy of the model record and remove some fields not to update.
-                model_copy = copy.deepcopy(model.dict())
-                model_copy.pop(CommonFieldnames.UUID)
-                model_copy.pop(CommonFieldnames.CREATED_ON)
-                model_copy.pop("formulatrix__plate__id")
-                result = await self.update(
-                    "crystal_plates",
-                    model_copy,
-                    "(formulatrix__plate__id = ?)",
-                    subs=[model.formulatrix__plate__id],
-                    why=why,
-                )
-                updated_count += result.get("count", 0)
+        inserted_count = 0
+        updated_count = 0
+        for model in models:
+            if model.formulatrix__plate__id in existing_plate_ids:
+                updated_count += 1
             else:
-                await self.insert(
-                    "crystal_plates",
-                    [model.dict()],
-                    why=why,
-                )
                 inserted_count += 1
+                # A null plate id never matches, so is always an insert.
+                if model.formulatrix__plate__id is not None:
+                    existing_plate_ids.add(model.formulatrix__plate__id)
+
+        await self.upsert(
+            "crystal_plates",
+            [model.dict() for model in models],
+            "formulatrix__plate__id",
+            why=why,
+        )
 
         return {
             "updated_count": updated_count,
@@ -80,6 +111,7 @@ class DirectCrystalPlates(DirectBase):
         }
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_plates_serialized(
         self, filter: Dict, why=None
     ) -> List[Dict]:
@@ -88,17 +120,16 @@ class DirectCrystalPlates(DirectBase):
         Returns records from the database.
         """
 
-        # Get the models from the direct call.
-        models = await self.fetch_crystal_plates(
+        # Get the database rows, without making models.
+        records = await self.__query_crystal_plates(
             CrystalPlateFilterModel(**filter), why=why
         )
 
-        # Serialize models into dicts to give to the response.
-        records = [model.dict() for model in models]
-
-        return records
+        # Serialize the rows straight into the dicts the models would give.
+        return normalize_trusted(CrystalPlateModel, records)
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_plates(
         self, filter: CrystalPlateFilterModel, why=None
     ) -> List[CrystalPlateModel]:
@@ -106,15 +137,43 @@ class DirectCrystalPlates(DirectBase):
         Plates need a droplocation if they have an autolocation but no droplocation.
         """
 
+        records = await self.__query_crystal_plates(filter, why=why)
+
+        # Parse the records returned by sql into models, trusting our own database.
+        models = load_trusted(CrystalPlateModel, records)
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_plates_rows(
+        self, filter: CrystalPlateFilterModel, why=None
+    ) -> List[CrystalPlateRow]:
+        """
+        Same plates as fetch_crystal_plates, but as compact rows.
+        """
+
+        records = await self.__query_crystal_plates(filter, why=why)
+
+        return load_compact_rows(CrystalPlateRow, records)
+
+    # ----------------------------------------------------------------------------------------
+    async def __query_crystal_plates(
+        self, filter: CrystalPlateFilterModel, why=None
+    ) -> List[Dict]:
+        """
+        Database rows for the plates selected by the filter.
+        """
+
         if why is None:
             why = "API fetch_crystal_plates"
 
         # Build the individual pieces of the SQL query.
         subs: List[Union[str, int]] = []
         orderby = self.__build_orderby(filter)
-        where = self.__build_where(filter, subs)
         fields = self.__build_fields(filter)
-        joins = self.__build_joins(filter)
+        joins = self.__build_joins(filter, subs)
+        where = self.__build_where(filter, subs)
 
         # Glue them together.
         main_query = "\nSELECT" + fields + joins + where + "\n" + orderby
@@ -124,12 +183,10 @@ class DirectCrystalPlates(DirectBase):
 
         records = await self.query(main_query, subs=subs, why=why)
 
-        # Parse the records returned by sql into models.
-        models = [CrystalPlateModel(**record) for record in records]
-
-        return models
+        return records
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def report_crystal_plates_serialized(
         self, filter: Dict, why=None
     ) -> List[Dict]:
@@ -138,33 +195,65 @@ class DirectCrystalPlates(DirectBase):
         Returns records from the database.
         """
 
-        # Get the models from the direct call.
-        models = await self.report_crystal_plates(
+        # Get the database rows, without making models.
+        records = await self.__query_crystal_plate_reports(
             CrystalPlateFilterModel(**filter), why=why
         )
 
-        # Serialize models into dicts to give to the response.
-        records = [model.dict() for model in models]
-
-        return records
+        # Serialize the rows straight into the dicts the models would give.
+        return normalize_trusted(CrystalPlateReportModel, records)
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def report_crystal_plates(
         self, filter: CrystalPlateFilterModel, why=None
     ) -> List[CrystalPlateReportModel]:
         """
-        Plates need a droplocation if they have an autolocation but no droplocation.
+        Plates with their well counts.
+
+        The counts come from the crystal_plate_counters table,
+        or if the filter asks for the live report source,
+        are counted from the wells of the selected plates at query time.
+        """
+
+        records = await self.__query_crystal_plate_reports(filter, why=why)
+
+        # Parse the records returned by sql into models, trusting our own database.
+        models = load_trusted(CrystalPlateReportModel, records)
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def report_crystal_plates_rows(
+        self, filter: CrystalPlateFilterModel, why=None
+    ) -> List[CrystalPlateReportRow]:
+        """
+        Same report as report_crystal_plates, but as compact rows.
+        """
+
+        records = await self.__query_crystal_plate_reports(filter, why=why)
+
+        return load_compact_rows(CrystalPlateReportRow, records)
+
+    # ----------------------------------------------------------------------------------------
+    async def __query_crystal_plate_reports(
+        self, filter: CrystalPlateFilterModel, why=None
+    ) -> List[Dict]:
+        """
+        Database rows for the plates selected by the filter, with their well counts.
         """
 
         if why is None:
             why = "API report_crystal_plates"
 
         # Build the individual pieces of the SQL query.
+        # The joins come before the where in the sql, so also their substitutions.
         subs: List[Union[str, int]] = []
         orderby = self.__build_orderby(filter, is_for_report=True)
-        where = self.__build_where(filter, subs, is_for_report=True)
         fields = self.__build_fields(filter, is_for_report=True)
-        joins = self.__build_joins(filter, is_for_report=True)
+        joins = self.__build_joins(filter, subs, is_for_report=True)
+        where = self.__build_where(filter, subs, is_for_report=True)
 
         # Glue them together.
         main_query = "\nSELECT" + fields + joins + where + "\n" + orderby
@@ -174,10 +263,7 @@ class DirectCrystalPlates(DirectBase):
 
         records = await self.query(main_query, subs=subs, why=why)
 
-        # Parse the records returned by sql into models.
-        models = [CrystalPlateReportModel(**record) for record in records]
-
-        return models
+        return records
 
     # ----------------------------------------------------------------------------------------
     def __build_fields(
@@ -191,23 +277,20 @@ class DirectCrystalPlates(DirectBase):
 
         fields = ["crystal_plates.*"]
 
-        self.__usable_unexported_count = (
-            "(COALESCE(decided_usable.count, 0) - COALESCE(exported.count, 0))"
-        )
-        self.__undecided_crystals_count = "COALESCE(undecided_crystals.count, 0)"
-
         if is_for_report:
-            fields.append("COALESCE(collected.count, 0) AS collected_count")
-            fields.append("COALESCE(chimped.count, 0) AS chimped_count")
+            fields.append("COALESCE(counters.collected_count, 0) AS collected_count")
+            fields.append("COALESCE(counters.chimped_count, 0) AS chimped_count")
             fields.append(
-                "COALESCE(chimped.count, 0) - COALESCE(decided.count, 0) AS undecided_count"
+                "COALESCE(counters.chimped_count, 0) - COALESCE(counters.decided_count, 0) AS undecided_count"
             )
-            fields.append("COALESCE(decided.count, 0) AS decided_count")
-            fields.append("COALESCE(decided_usable.count, 0) AS decided_usable_count")
+            fields.append("COALESCE(counters.decided_count, 0) AS decided_count")
             fields.append(
-                "COALESCE(decided.count, 0) - COALESCE(decided_usable.count, 0) AS decided_unusable_count"
+                "COALESCE(counters.decided_usable_count, 0) AS decided_usable_count"
             )
-            fields.append("COALESCE(exported.count, 0) AS exported_count")
+            fields.append(
+                "COALESCE(counters.decided_count, 0) - COALESCE(counters.decided_usable_count, 0) AS decided_unusable_count"
+            )
+            fields.append("COALESCE(counters.exported_count, 0) AS exported_count")
             fields.append(
                 f"{self.__usable_unexported_count} AS usable_unexported_count"
             )
@@ -221,6 +304,7 @@ class DirectCrystalPlates(DirectBase):
     def __build_joins(
         self,
         filter: CrystalPlateFilterModel,
+        subs: List[Union[str, int]],
         is_for_report: bool = False,
     ) -> str:
         """
@@ -230,39 +314,26 @@ class DirectCrystalPlates(DirectBase):
         joins = ["crystal_plates"]
 
         if is_for_report:
-            all = "SELECT crystal_plate_uuid, COUNT(*) AS count FROM crystal_wells"
-            chimped = f"{all} JOIN crystal_well_autolocations ON crystal_well_autolocations.crystal_well_uuid = crystal_wells.uuid"
-            viewed = f"{all} JOIN crystal_well_droplocations ON crystal_well_droplocations.crystal_well_uuid = crystal_wells.uuid"
-            both = (
-                f"{all}"
-                "\n  JOIN crystal_well_autolocations ON crystal_well_autolocations.crystal_well_uuid = crystal_wells.uuid"
-                "\n  LEFT JOIN crystal_well_droplocations ON crystal_well_droplocations.crystal_well_uuid = crystal_wells.uuid"
-                "\n  WHERE (number_of_crystals > 0) AND (is_usable is NULL) "
-            )
-            joins.append(
-                f"LEFT JOIN ({all} GROUP BY crystal_plate_uuid) AS collected"
-                f"\n    ON collected.crystal_plate_uuid = crystal_plates.uuid"
-            )
-            joins.append(
-                f"LEFT JOIN ({chimped} GROUP BY crystal_plate_uuid) AS chimped"
-                f"\n    ON chimped.crystal_plate_uuid = crystal_plates.uuid"
-            )
-            joins.append(
-                f"LEFT JOIN ({viewed} WHERE (is_usable IS NOT NULL) GROUP BY crystal_plate_uuid) AS decided"
-                f"\n    ON decided.crystal_plate_uuid = crystal_plates.uuid"
-            )
-            joins.append(
-                f"LEFT JOIN ({viewed} WHERE (is_usable = True) GROUP BY crystal_plate_uuid) AS decided_usable"
-                f"\n    ON decided_usable.crystal_plate_uuid = crystal_plates.uuid"
-            )
-            joins.append(
-                f"LEFT JOIN ({viewed} WHERE (is_exported_to_soakdb3 = True) GROUP BY crystal_plate_uuid) AS exported"
-                f"\n    ON exported.crystal_plate_uuid = crystal_plates.uuid"
-            )
-            joins.append(
-                f"LEFT JOIN ({both} GROUP BY crystal_plate_uuid) AS undecided_crystals"
-                f"\n    ON undecided_crystals.crystal_plate_uuid = crystal_plates.uuid"
-            )
+            if filter.report_source == CrystalPlateReportSourceEnum.LIVE:
+                # Count in a single pass over the wells of only those plates the filter selects.
+                conditions = self.__build_plate_conditions(filter, subs)
+                restriction = ""
+                if len(conditions) > 0:
+                    restriction = (
+                        "\nWHERE crystal_wells.crystal_plate_uuid IN"
+                        " (SELECT uuid FROM crystal_plates WHERE %s)"
+                        % (" AND ".join(conditions))
+                    )
+                joins.append(
+                    f"LEFT JOIN ({build_counters_select(restriction)}) AS counters"
+                    "\n    ON counters.crystal_plate_uuid = crystal_plates.uuid"
+                )
+            else:
+                # The counters are kept up to date as the wells are written, so are a single keyed read here.
+                joins.append(
+                    "LEFT JOIN crystal_plate_counters AS counters"
+                    "\n    ON counters.crystal_plate_uuid = crystal_plates.uuid"
+                )
 
         return "\nFROM " + "\n  ".join(joins)
 
@@ -280,44 +351,57 @@ class DirectCrystalPlates(DirectBase):
         where = "WHERE"
         sql = ""
 
+        for condition in self.__build_plate_conditions(filter, subs):
+            sql += f"\n{where} {condition}"
+            where = "AND"
+
+        if filter.needing_intervention is not None:
+            if filter.needing_intervention is True:
+                sql += "\n/* Those needing intervention. */"
+                sql += f"\n{where} ({self.__undecided_crystals_count} > 0 OR {self.__usable_unexported_count} > 0)"
+            else:
+                sql += "\n/* Those NOT needing intervention. */"
+                sql += f"\n{where} ({self.__undecided_crystals_count} = 0 AND {self.__usable_unexported_count} = 0)"
+
+        return sql
+
+    # ----------------------------------------------------------------------------------------
+    def __build_plate_conditions(
+        self,
+        filter: CrystalPlateFilterModel,
+        subs: List[Union[str, int]],
+    ) -> List[str]:
+        """
+        Conditions on the crystal_plates fields alone.
+        """
+
+        conditions = []
+
         if filter.uuid is not None:
-            sql += f"\n{where} uuid = ?"
+            conditions.append("uuid = ?")
             subs.append(filter.uuid)
-            where = "AND"
 
         if filter.visit is not None:
-            sql += f"\n{where} visit = ?"
+            conditions.append("visit = ?")
             subs.append(filter.visit)
-            where = "AND"
 
         if filter.barcode is not None:
-            sql += f"\n{where} barcode = ?"
+            conditions.append("barcode = ?")
             subs.append(filter.barcode)
-            where = "AND"
 
         if filter.barcode is None:
             # Default, if not specified, is to exclude plates with errors.
             if filter.include_errors is None or filter.include_errors is False:
-                sql += f"\n{where} error IS NULL"
-                where = "AND"
+                conditions.append("error IS NULL")
 
         if filter.from_formulatrix__plate__id is not None:
             if filter.direction == -1:
-                sql += f"\n{where} formulatrix__plate__id < ?"
+                conditions.append("formulatrix__plate__id < ?")
             else:
-                sql += f"\n{where} formulatrix__plate__id > ?"
+                conditions.append("formulatrix__plate__id > ?")
             subs.append(filter.from_formulatrix__plate__id)
-            where = "AND"
-
-        if filter.needing_intervention is not None:
-            if filter.needing_intervention is True:
-                sql += "\n/* Those needing intervention. */"
-                sql += f"\n{where} ({self.__undecided_crystals_count} > 0 OR {self.__usable_unexported_count} > 0)"
-            else:
-                sql += "\n/* Those NOT needing intervention. */"
-                sql += f"\n{where} ({self.__undecided_crystals_count} = 0 AND {self.__usable_unexported_count} = 0)"
 
-        return sql
+        return conditions
 
     # ----------------------------------------------------------------------------------------
     def __build_orderby(
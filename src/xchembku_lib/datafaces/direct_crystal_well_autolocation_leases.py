@@ -0,0 +1,233 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from dls_normsql.constants import CommonFieldnames
+
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+from xchembku_api.models.trusted_loader import load_trusted
+from xchembku_lib.datafaces.access import mutating
+from xchembku_lib.datafaces.direct_base import DirectBase
+
+logger = logging.getLogger(__name__)
+
+# How long a worker has to originate the autolocations of the wells it claims.
+DEFAULT_LEASE_SECONDS = 300.0
+
+
+class DirectCrystalWellAutolocationLeases(DirectBase):
+    """ """
+
+    # Largest number of crystal well uuids given in a single IN clause.
+    __CHUNK_SIZE = 500
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, specification=None):
+
+        # Lock keeps concurrent claims from selecting the same wells before either leases them.
+        self.__claim_lock = asyncio.Lock()
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def claim_crystal_wells_needing_autolocation_serialized(
+        self,
+        claimant: str,
+        limit: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        why=None,
+    ) -> List[Dict]:
+        """ """
+
+        # Get the models from the direct call.
+        models = await self.claim_crystal_wells_needing_autolocation(
+            claimant, limit=limit, lease_seconds=lease_seconds, why=why
+        )
+
+        # Serialize models into dicts to give to the response.
+        records = [model.dict() for model in models]
+
+        return records
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def claim_crystal_wells_needing_autolocation(
+        self,
+        claimant: str,
+        limit: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        why=None,
+    ) -> List[CrystalWellModel]:
+        """
+        Claim the oldest wells which need an autolocation and are not already claimed.
+
+        The claimed wells are leased to the claimant until the lease expires,
+        so other workers claiming at the same time get a disjoint batch.
+        Wells whose lease has expired without an autolocation can be claimed again.
+
+        The select and the lease are made under a lock,
+        and should be in the same transaction, as the client does by calling with as_transaction.
+
+        Args:
+            claimant (str): name of the worker claiming the wells, used to renew and release
+            limit (int): most number of wells to claim
+            lease_seconds (float): time after which the claim lapses
+        """
+
+        if why is None:
+            why = "API claim_crystal_wells_needing_autolocation"
+
+        async with self.__claim_lock:
+            now = datetime.now()
+
+            records = await self.query(
+                "SELECT crystal_wells.*"
+                "\n  FROM crystal_well_pending_autolocations"
+                "\n  JOIN crystal_wells"
+                " ON crystal_wells.uuid = crystal_well_pending_autolocations.crystal_well_uuid"
+                "\n  LEFT JOIN crystal_well_autolocation_leases"
+                " ON crystal_wells.uuid = crystal_well_autolocation_leases.crystal_well_uuid"
+                "\n  WHERE crystal_well_autolocation_leases.crystal_well_uuid IS NULL"
+                " OR crystal_well_autolocation_leases.expires_on < ?"
+                f"\n  ORDER BY crystal_well_pending_autolocations.{CommonFieldnames.CREATED_ON}"
+                f"\n  LIMIT {int(limit)}",
+                subs=[self.__format_time(now)],
+                why=why,
+            )
+
+            # Parse the records returned by sql into models, trusting our own database.
+            models = load_trusted(CrystalWellModel, records)
+
+            # Lease the wells, taking over any expired leases.
+            expires_on = self.__format_time(now + timedelta(seconds=lease_seconds))
+            await self.upsert(
+                "crystal_well_autolocation_leases",
+                [
+                    {
+                        "crystal_well_uuid": model.uuid,
+                        "claimant": claimant,
+                        "expires_on": expires_on,
+                    }
+                    for model in models
+                ],
+                "crystal_well_uuid",
+                update_fields=["claimant", "expires_on"],
+                why=why,
+            )
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def renew_crystal_well_autolocation_leases_serialized(
+        self,
+        claimant: str,
+        crystal_well_uuids: List[str],
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        why=None,
+    ) -> Dict:
+        # Return the method doing the work.
+        return await self.renew_crystal_well_autolocation_leases(
+            claimant, crystal_well_uuids, lease_seconds=lease_seconds, why=why
+        )
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def renew_crystal_well_autolocation_leases(
+        self,
+        claimant: str,
+        crystal_well_uuids: List[str],
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        why=None,
+    ) -> Dict:
+        """
+        Extend the leases which the claimant holds on the given wells.
+
+        Returns the count of leases renewed.
+        A lease which has since been claimed by another worker is not renewed,
+        so a count short of the number of wells tells the claimant it has lost some.
+        """
+
+        if why is None:
+            why = "API renew_crystal_well_autolocation_leases"
+
+        if len(crystal_well_uuids) == 0:
+            return {"count": 0}
+
+        expires_on = self.__format_time(
+            datetime.now() + timedelta(seconds=lease_seconds)
+        )
+
+        # Remove duplicates but keep order.
+        crystal_well_uuids = list(dict.fromkeys(crystal_well_uuids))
+
+        # The list is given in chunks to keep the statements a reasonable size.
+        count = 0
+        for i in range(0, len(crystal_well_uuids), self.__CHUNK_SIZE):
+            chunk = crystal_well_uuids[i : i + self.__CHUNK_SIZE]
+            result = await self.update(
+                "crystal_well_autolocation_leases",
+                {"expires_on": expires_on},
+                "claimant = ? AND crystal_well_uuid IN (%s)"
+                % (", ".join(["?"] * len(chunk))),
+                subs=[claimant] + chunk,
+                why=why,
+            )
+            count += result["count"]
+
+        return {"count": count}
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def release_crystal_well_autolocation_leases_serialized(
+        self,
+        claimant: str,
+        crystal_well_uuids: List[str],
+        why=None,
+    ) -> None:
+        # Return the method doing the work.
+        return await self.release_crystal_well_autolocation_leases(
+            claimant, crystal_well_uuids, why=why
+        )
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def release_crystal_well_autolocation_leases(
+        self,
+        claimant: str,
+        crystal_well_uuids: List[str],
+        why=None,
+    ) -> None:
+        """
+        Give up the leases which the claimant holds on the given wells.
+
+        The wells can then be claimed straight away by any worker.
+        """
+
+        if why is None:
+            why = "API release_crystal_well_autolocation_leases"
+
+        if len(crystal_well_uuids) == 0:
+            return
+
+        # Remove duplicates but keep order.
+        crystal_well_uuids = list(dict.fromkeys(crystal_well_uuids))
+
+        # The list is given in chunks to keep the statements a reasonable size.
+        for i in range(0, len(crystal_well_uuids), self.__CHUNK_SIZE):
+            chunk = crystal_well_uuids[i : i + self.__CHUNK_SIZE]
+            await self.execute(
+                "DELETE FROM crystal_well_autolocation_leases"
+                " WHERE claimant = ? AND crystal_well_uuid IN (%s)"
+                % (", ".join(["?"] * len(chunk))),
+                subs=[claimant] + chunk,
+                why=why,
+            )
+
+    # ----------------------------------------------------------------------------------------
+    def __format_time(self, moment: datetime) -> str:
+        """
+        Format a time the same as the created_on fields, so they compare as strings.
+        """
+
+        return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
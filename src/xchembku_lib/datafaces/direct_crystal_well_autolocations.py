@@ -4,6 +4,7 @@ from typing import Dict, List
 from xchembku_api.models.crystal_well_autolocation_model import (
     CrystalWellAutolocationModel,
 )
+from xchembku_lib.datafaces.access import mutating
 from xchembku_lib.datafaces.direct_base import DirectBase
 
 logger = logging.getLogger(__name__)
@@ -12,7 +13,11 @@ logger = logging.getLogger(__name__)
 class DirectCrystalWellAutolocations(DirectBase):
     """ """
 
+    # Largest number of crystal well uuids given in a single IN clause.
+    __CHUNK_SIZE = 500
+
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def originate_crystal_well_autolocations_serialized(
         self, records: List[Dict]
     ) -> None:
@@ -22,6 +27,7 @@ class DirectCrystalWellAutolocations(DirectBase):
         return await self.originate_crystal_well_autolocations(models)
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def originate_crystal_well_autolocations(
         self, models: List[CrystalWellAutolocationModel]
     ) -> None:
@@ -29,11 +35,44 @@ class DirectCrystalWellAutolocations(DirectBase):
         Caller provides the records containing fields to be created.
         """
 
+        why = "originate_crystal_well_autolocations"
+
         # We're being given models, serialize them into dicts for the sql.
         records = [model.dict() for model in models]
 
-        return await self.insert(
+        await self.insert(
             "crystal_well_autolocations",
             records,
-            why="originate_crystal_well_autolocations",
+            why=why,
+        )
+
+        # New autolocations go into the change feed.
+        await self._record_crystal_well_changes(
+            "crystal_well_autolocations",
+            [model.uuid for model in models],
+            why=why,
+        )
+
+        # Wells with an autolocation are taken off the queue and no longer need their leases.
+        # The list is given in chunks to keep the statements a reasonable size.
+        crystal_well_uuids = list(
+            dict.fromkeys([model.crystal_well_uuid for model in models])
+        )
+        for i in range(0, len(crystal_well_uuids), self.__CHUNK_SIZE):
+            chunk = crystal_well_uuids[i : i + self.__CHUNK_SIZE]
+            qmarks = ", ".join(["?"] * len(chunk))
+            for table_name in [
+                "crystal_well_pending_autolocations",
+                "crystal_well_autolocation_leases",
+            ]:
+                await self.execute(
+                    f"DELETE FROM {table_name} WHERE crystal_well_uuid IN ({qmarks})",
+                    subs=chunk,
+                    why=why,
+                )
+
+        # Keep the per-plate counters in step with the autolocations.
+        await self._refresh_crystal_plate_counters_for_wells(
+            crystal_well_uuids,
+            why=why,
         )
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+from xchembku_api.models.crystal_well_autolocation_model import (
+    CrystalWellAutolocationModel,
+)
+from xchembku_api.models.crystal_well_changes_model import CrystalWellChangesModel
+from xchembku_api.models.crystal_well_droplocation_model import (
+    CrystalWellDroplocationModel,
+)
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+from xchembku_lib.datafaces.access import read_only
+from xchembku_lib.datafaces.direct_base import DirectBase
+
+logger = logging.getLogger(__name__)
+
+# Tables whose new records are given by the change feed.
+CHANGES_TABLE_NAMES = [
+    "crystal_wells",
+    "crystal_well_autolocations",
+    "crystal_well_droplocations",
+]
+
+# How often to look for changes when waiting without a server to tell us.
+POLL_SECONDS = 1.0
+
+
+class DirectCrystalWellChanges(DirectBase):
+    """ """
+
+    # Largest number of record uuids given in a single IN clause.
+    __CHUNK_SIZE = 500
+
+    # ----------------------------------------------------------------------------------------
+    async def _record_crystal_well_changes(
+        self,
+        table_name: str,
+        record_uuids: List[str],
+        why=None,
+    ) -> None:
+        """
+        Log newly inserted records so the change feed gives them.
+
+        Called by the upserts in the same transaction as their inserts,
+        so a record is in the log exactly when it is in its table.
+        It is not for the server to call, so nothing else can write to the log.
+        """
+
+        await self.insert(
+            "crystal_well_changes",
+            [
+                {"table_name": table_name, "record_uuid": record_uuid}
+                for record_uuid in record_uuids
+            ],
+            why=why,
+        )
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_well_changes_serialized(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        why=None,
+    ) -> Dict:
+        """ """
+
+        # Get the model from the direct call.
+        model = await self.fetch_crystal_well_changes(cursor, limit=limit, why=why)
+
+        # Serialize model into dict to give to the response.
+        return model.dict()
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_well_changes(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        why=None,
+    ) -> CrystalWellChangesModel:
+        """
+        Get the wells, autolocations and droplocations inserted after the cursor.
+
+        The feed is insert-only: updates to existing records,
+        such as a droplocation being confirmed, are not part of it.
+
+        Inserts are logged with a sequence number assigned by the database,
+        so the cursor is the last sequence number seen.  Unlike created_on,
+        which callers can give and clocks can skew, the sequence only increases,
+        so no insert can land behind a cursor which has already passed.
+        This relies on the inserts being committed in the order they are made,
+        as they are when all writes go through the server's single writer.
+
+        Args:
+            cursor (str): cursor returned by the previous call, or None to start from the beginning
+            limit (int): most number of records to return, over all the tables
+
+        Raises:
+            RuntimeError: the cursor is not one given by this feed
+        """
+
+        if why is None:
+            why = "API fetch_crystal_well_changes"
+
+        sequence = 0
+        if cursor is not None:
+            try:
+                sequence = int(cursor)
+            except ValueError:
+                raise RuntimeError(f'invalid crystal well changes cursor "{cursor}"')
+
+        changes = await self.query(
+            "SELECT sequence, table_name, record_uuid FROM crystal_well_changes"
+            "\n  WHERE sequence > ?"
+            "\n  ORDER BY sequence"
+            f"\n  LIMIT {int(limit)}",
+            subs=[sequence],
+            why=why,
+        )
+
+        if len(changes) > 0:
+            sequence = changes[-1]["sequence"]
+
+        records_by_table: Dict[str, List[Dict]] = {}
+        for table_name in CHANGES_TABLE_NAMES:
+            record_uuids = [
+                change["record_uuid"]
+                for change in changes
+                if change["table_name"] == table_name
+            ]
+            records_by_table[table_name] = await self.__fetch_by_uuids(
+                table_name, record_uuids, why=why
+            )
+
+        return CrystalWellChangesModel(
+            crystal_wells=[
+                CrystalWellModel(**record)
+                for record in records_by_table["crystal_wells"]
+            ],
+            crystal_well_autolocations=[
+                CrystalWellAutolocationModel(**record)
+                for record in records_by_table["crystal_well_autolocations"]
+            ],
+            crystal_well_droplocations=[
+                CrystalWellDroplocationModel(**record)
+                for record in records_by_table["crystal_well_droplocations"]
+            ],
+            cursor=str(sequence),
+        )
+
+    # ----------------------------------------------------------------------------------------
+    async def __fetch_by_uuids(
+        self,
+        table_name: str,
+        record_uuids: List[str],
+        why=None,
+    ) -> List[Dict]:
+        """
+        Fetch the records of a table with the given uuids, in the order of the uuids.
+
+        The list is given in chunks to keep the statements a reasonable size.
+        """
+
+        # Remove duplicates but keep order.
+        record_uuids = list(dict.fromkeys(record_uuids))
+
+        records_by_uuid: Dict[str, Dict] = {}
+        for i in range(0, len(record_uuids), self.__CHUNK_SIZE):
+            chunk = record_uuids[i : i + self.__CHUNK_SIZE]
+            records = await self.query(
+                f"SELECT * FROM {table_name} WHERE uuid IN (%s)"
+                % (", ".join(["?"] * len(chunk))),
+                subs=chunk,
+                why=why,
+            )
+            for record in records:
+                records_by_uuid[record["uuid"]] = record
+
+        # A record deleted since it was inserted is left out.
+        return [
+            records_by_uuid[record_uuid]
+            for record_uuid in record_uuids
+            if record_uuid in records_by_uuid
+        ]
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def wait_for_crystal_well_changes_serialized(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        timeout_seconds: float = 30.0,
+        why=None,
+    ) -> Dict:
+        """ """
+
+        # Get the model from the direct call.
+        model = await self.wait_for_crystal_well_changes(
+            cursor, limit=limit, timeout_seconds=timeout_seconds, why=why
+        )
+
+        # Serialize model into dict to give to the response.
+        return model.dict()
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def wait_for_crystal_well_changes(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        timeout_seconds: float = 30.0,
+        why=None,
+    ) -> CrystalWellChangesModel:
+        """
+        Like fetch_crystal_well_changes, but wait until there are some changes or the timeout.
+
+        The returned model is empty if the timeout passed with no changes.
+
+        Called directly, this looks for changes every POLL_SECONDS.
+        The service instead waits until one of its writes has finished before looking again.
+        """
+
+        timeout_time = time.time() + timeout_seconds
+        while True:
+            model = await self.fetch_crystal_well_changes(cursor, limit=limit, why=why)
+
+            remaining_seconds = timeout_time - time.time()
+            if not model.is_empty() or remaining_seconds <= 0:
+                return model
+
+            await asyncio.sleep(min(POLL_SECONDS, remaining_seconds))
+
+    # ----------------------------------------------------------------------------------------
+    async def iterate_crystal_well_changes(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        timeout_seconds: float = 30.0,
+        why=None,
+    ) -> AsyncIterator[CrystalWellChangesModel]:
+        """
+        Give the changes after the cursor as they arrive, forever.
+
+        Each change model has the cursor which would resume after it.
+        """
+
+        while True:
+            model = await self.wait_for_crystal_well_changes(
+                cursor, limit=limit, timeout_seconds=timeout_seconds, why=why
+            )
+            cursor = model.cursor
+            if not model.is_empty():
+                yield model
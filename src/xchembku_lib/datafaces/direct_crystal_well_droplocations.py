@@ -1,4 +1,3 @@
-import asyncio
 import copy
 import logging
 from typing import Dict, List, Optional
@@ -10,6 +9,7 @@ from xchembku_api.models.crystal_well_droplocation_model import (
     CrystalWellDroplocationModel,
 )
 from xchembku_lib.crystal_plate_objects.crystal_plate_objects import CrystalPlateObjects
+from xchembku_lib.datafaces.access import mutating
 from xchembku_lib.datafaces.direct_base import DirectBase
 
 logger = logging.getLogger(__name__)
@@ -18,13 +18,11 @@ logger = logging.getLogger(__name__)
 class DirectCrystalWellDroplocations(DirectBase):
     """ """
 
-    # ----------------------------------------------------------------------------------------
-    def __init__(self, specification=None):
-
-        # Lock allows only one coroutine to acquire it at a time.
-        self.__upsert_lock = asyncio.Lock()
+    # Largest number of crystal well uuids given in a single IN clause.
+    __CHUNK_SIZE = 500
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def upsert_crystal_well_droplocations_serialized(
         self,
         records: List[Dict],
@@ -41,50 +39,114 @@ class DirectCrystalWellDroplocations(DirectBase):
         )
 
     # ----------------------------------------------------------------------------------------
-    async def __add_confirmed_microns(self, model_dict: Dict, why=None) -> None:
-
-        if why is not None:
-            why = f"[CONFMIC] {why}"
+    async def __fetch_by_crystal_well_uuids(
+        self,
+        sql: str,
+        crystal_well_uuids: List[str],
+        why=None,
+    ) -> Dict[str, Dict]:
+        """
+        Run a query having a placeholder for a list of crystal well uuids.
 
-        # Input model not updating confirmed target?
-        if (
-            "confirmed_target_x" not in model_dict
-            or "confirmed_target_y" not in model_dict
-        ):
-            return
+        The list is given in chunks to keep the statements a reasonable size.
 
-        from xchembku_api.models.crystal_well_filter_model import CrystalWellFilterModel
+        Returns:
+            Dict[str, Dict]: records keyed by their crystal_well_uuid field
+        """
 
-        filter = CrystalWellFilterModel(anchor=model_dict["crystal_well_uuid"])
+        records_by_uuid: Dict[str, Dict] = {}
 
-        # Get the well record.
-        crystal_well_models = await self.fetch_crystal_wells_needing_droplocation(
-            filter,
-            why=f"(crystal well for adding confirmed microns) {why}",
-        )
+        # Remove duplicates but keep order.
+        crystal_well_uuids = list(dict.fromkeys(crystal_well_uuids))
 
-        if len(crystal_well_models) == 0:
-            raise RuntimeError(
-                "database integrity error: no crystal well for droplocation upsert"
+        for i in range(0, len(crystal_well_uuids), self.__CHUNK_SIZE):
+            chunk = crystal_well_uuids[i : i + self.__CHUNK_SIZE]
+            records = await self.query(
+                sql % (", ".join(["?"] * len(chunk))),
+                subs=chunk,
+                why=why,
             )
-        crystal_well_model = crystal_well_models[0]
-        crystal_well_model.confirmed_target_x = model_dict["confirmed_target_x"]
-        crystal_well_model.confirmed_target_y = model_dict["confirmed_target_y"]
+            for record in records:
+                records_by_uuid[record["crystal_well_uuid"]] = record
 
-        crystal_plate_object = CrystalPlateObjects().build_object(
-            {"type": crystal_well_model.crystal_plate_thing_type}
-        )
+        return records_by_uuid
+
+    # ----------------------------------------------------------------------------------------
+    async def __add_confirmed_microns(
+        self,
+        model_dicts: List[Dict],
+        why=None,
+    ) -> None:
+        """
+        Convert the confirmed targets of all the droplocations to microns.
+
+        The well centroids and plate types are fetched in a single query for the whole batch,
+        then the microns are computed in memory.
+        """
+
+        if why is not None:
+            why = f"[CONFMIC] {why}"
 
-        x, y = crystal_plate_object.compute_drop_location_microns(
-            crystal_well_model.dict()
+        # Input models not updating confirmed target?
+        model_dicts = [
+            model_dict
+            for model_dict in model_dicts
+            if "confirmed_target_x" in model_dict and "confirmed_target_y" in model_dict
+        ]
+
+        if len(model_dicts) == 0:
+            return
+
+        # Get what the conversion needs to know about each well.
+        contexts = await self.__fetch_by_crystal_well_uuids(
+            "SELECT"
+            "\n  crystal_wells.uuid AS crystal_well_uuid,"
+            "\n  crystal_well_autolocations.well_centroid_x,"
+            "\n  crystal_well_autolocations.well_centroid_y,"
+            "\n  crystal_plates.thing_type AS crystal_plate_thing_type"
+            "\nFROM crystal_wells"
+            "\nJOIN crystal_well_autolocations ON crystal_well_autolocations.crystal_well_uuid = crystal_wells.uuid"
+            "\nLEFT JOIN crystal_plates ON crystal_plates.uuid = crystal_wells.crystal_plate_uuid"
+            "\nWHERE crystal_wells.uuid IN (%s)",
+            [model_dict["crystal_well_uuid"] for model_dict in model_dicts],
+            why=f"(crystal wells for adding confirmed microns) {why}",
         )
 
-        logger.debug(f"{why} x is {x}, y is {y}")
+        # Group the wells by plate type, since each type converts differently.
+        model_dicts_by_thing_type: Dict[str, List[Dict]] = {}
+        for model_dict in model_dicts:
+            context = contexts.get(model_dict["crystal_well_uuid"])
+            if context is None:
+                raise RuntimeError(
+                    "database integrity error: no crystal well for droplocation upsert"
+                )
+            model_dicts_by_thing_type.setdefault(
+                context["crystal_plate_thing_type"], []
+            ).append(model_dict)
+
+        for thing_type, typed_model_dicts in model_dicts_by_thing_type.items():
+            crystal_plate_object = CrystalPlateObjects().build_cached_object(thing_type)
+
+            # Convert all the wells of this plate type in one call.
+            xs, ys = crystal_plate_object.compute_drop_locations_microns(
+                [model_dict["confirmed_target_x"] for model_dict in typed_model_dicts],
+                [model_dict["confirmed_target_y"] for model_dict in typed_model_dicts],
+                [
+                    contexts[model_dict["crystal_well_uuid"]]["well_centroid_x"]
+                    for model_dict in typed_model_dicts
+                ],
+                [
+                    contexts[model_dict["crystal_well_uuid"]]["well_centroid_y"]
+                    for model_dict in typed_model_dicts
+                ],
+            )
 
-        model_dict["confirmed_microns_x"] = x
-        model_dict["confirmed_microns_y"] = y
+            for model_dict, x, y in zip(typed_model_dicts, xs, ys):
+                model_dict["confirmed_microns_x"] = x
+                model_dict["confirmed_microns_y"] = y
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def upsert_crystal_well_droplocations(
         self,
         models: List[CrystalWellDroplocationModel],
@@ -96,83 +158,124 @@ class DirectCrystalWellDroplocations(DirectBase):
 
         We don't insert for the same crystal_well_uuid twice.
 
-        TODO: Find more efficient way to upsert_crystal_well_droplocations in batch.
+        The whole batch is written by a single upsert statement keyed on the unique crystal_well_uuid,
+        so concurrent upserts for the same well, such as a double-click, cannot make two records.
+        The existing records are looked up once beforehand to give the counts
+        and to know which need their confirmed microns computed.
         """
 
         if why is None:
             why = "upsert_crystal_well_droplocations"
 
+        if len(models) == 0:
+            return {
+                "updated_count": 0,
+                "inserted_count": 0,
+            }
+
+        is_debug = logger.isEnabledFor(logging.DEBUG)
+
+        # A model without a well can't match an existing record.
+        crystal_well_uuids = [
+            model.crystal_well_uuid
+            for model in models
+            if model.crystal_well_uuid is not None
+        ]
+
+        # Find any existing records for these model objects.
+        existing_records = await self.__fetch_by_crystal_well_uuids(
+            "SELECT * FROM crystal_well_droplocations WHERE crystal_well_uuid IN (%s)",
+            crystal_well_uuids,
+            why=why,
+        )
+
+        if is_debug:
+            for record in existing_records.values():
+                logger.debug(
+                    describe("crystal_well_droplocation record before update", record)
+                )
+
+        model_dicts = [copy.deepcopy(model.dict()) for model in models]
+
+        # Fields which get changed on an existing record.
+        # Don't update the crystal_well_uuid since it is used as the key.
+        # All models have the same fields, so these are the same for the whole batch.
+        update_fields = [
+            field
+            for field in model_dicts[0].keys()
+            if field
+            not in [
+                CommonFieldnames.UUID,
+                CommonFieldnames.CREATED_ON,
+                "crystal_well_uuid",
+            ]
+            and (only_fields is None or field in only_fields)
+        ]
+
+        is_updating_target = (
+            "confirmed_target_x" in update_fields
+            and "confirmed_target_y" in update_fields
+        )
+
+        # Microns follow the confirmed target when it is being updated.
+        if is_updating_target:
+            for field in ["confirmed_microns_x", "confirmed_microns_y"]:
+                if field not in update_fields:
+                    update_fields.append(field)
+
         inserted_count = 0
         updated_count = 0
+        seen_uuids = set(existing_records.keys())
+        inserted_uuids = []
+        needing_microns = []
+        for model_dict in model_dicts:
+            crystal_well_uuid = model_dict["crystal_well_uuid"]
+            if crystal_well_uuid in seen_uuids:
+                updated_count += 1
+            else:
+                inserted_count += 1
+                inserted_uuids.append(model_dict[CommonFieldnames.UUID])
+                # Same well later in the batch becomes an update.
+                seen_uuids.add(crystal_well_uuid)
+
+            # Convert confirmed target to microns for new records, or when the target is changing.
+            if crystal_well_uuid not in existing_records or is_updating_target:
+                needing_microns.append(model_dict)
+
+        await self.__add_confirmed_microns(needing_microns, why=why)
+
+        await self.upsert(
+            "crystal_well_droplocations",
+            model_dicts,
+            "crystal_well_uuid",
+            update_fields=update_fields,
+            why=why,
+        )
+
+        # New droplocations go into the change feed.
+        await self._record_crystal_well_changes(
+            "crystal_well_droplocations",
+            inserted_uuids,
+            why=why,
+        )
 
-        # Loop over all the models to be upserted.
-        for model in models:
-            # Need to lock because of possible long time between query and eventual insert, user might double-click to send two droplocations quite quickly.
-            # TODO: Reconsider direct_crystal_well_droplocations upsert logic to be tolerant of multiple processes possibly doing concurrent insert.
-            # TODO: Add unit test for concurrent direct_crystal_well_droplocations upsert.
-            async with self.__upsert_lock:
-                model_dict = copy.deepcopy(model.dict())
-
-                # Find any existing record for this model object.
-                records = await self.query(
-                    "SELECT * FROM crystal_well_droplocations WHERE crystal_well_uuid = ?",
-                    subs=[model.crystal_well_uuid],
-                    why=why,
+        # Verify the updates, but only if anyone will see it.
+        if is_debug and len(existing_records) > 0:
+            records = await self.__fetch_by_crystal_well_uuids(
+                "SELECT * FROM crystal_well_droplocations WHERE crystal_well_uuid IN (%s)",
+                list(existing_records.keys()),
+                why=why,
+            )
+            for record in records.values():
+                logger.debug(
+                    describe("crystal_well_droplocation record after update", record)
                 )
 
-                if len(records) > 0:
-                    logger.debug(
-                        describe(
-                            "crystal_well_droplocation record before update", records[0]
-                        )
-                    )
-                    # Make a copy of the model record and remove some fields not to update.
-                    model_dict.pop(CommonFieldnames.UUID)
-                    model_dict.pop(CommonFieldnames.CREATED_ON)
-                    if only_fields is not None:
-                        for field in list(model_dict.keys()):
-                            if field not in only_fields:
-                                model_dict.pop(field)
-
-                    # Convert confirmed target to microns and store in the dict.
-                    await self.__add_confirmed_microns(model_dict, why=why)
-
-                    # Don't update the crystal_well_uuid since it is used as the key.
-                    if "crystal_well_uuid" in model_dict:
-                        model_dict.pop("crystal_well_uuid")
-
-                    result = await self.update(
-                        "crystal_well_droplocations",
-                        model_dict,
-                        "(crystal_well_uuid = ?)",
-                        subs=[model.crystal_well_uuid],
-                        why=why,
-                    )
-                    updated_count += result.get("count", 0)
-
-                    # Find any existing record for this model object.
-                    records = await self.query(
-                        "SELECT * FROM crystal_well_droplocations WHERE crystal_well_uuid = ?",
-                        subs=[model.crystal_well_uuid],
-                        why=why,
-                    )
-                    logger.debug(
-                        describe(
-                            "crystal_well_droplocation record after update", records[0]
-                        )
-                    )
-
-                else:
-
-                    # Convert confirmed target to microns and store in the dict.
-                    await self.__add_confirmed_microns(model_dict, why=why)
-
-                    await self.insert(
-                        "crystal_well_droplocations",
-                        [model_dict],
-                        why=why,
-                    )
-                    inserted_count += 1
+        # Keep the per-plate counters in step with the droplocations.
+        await self._refresh_crystal_plate_counters_for_wells(
+            crystal_well_uuids,
+            why=why,
+        )
 
         return {
             "updated_count": updated_count,
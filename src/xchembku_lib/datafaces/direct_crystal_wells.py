@@ -1,9 +1,12 @@
-import copy
 import logging
 from typing import Any, Dict, List
 
 from dls_normsql.constants import CommonFieldnames
 
+from xchembku_api.models.compact_rows import (
+    CrystalWellNeedingDroplocationRow,
+    load_compact_rows,
+)
 from xchembku_api.models.crystal_well_filter_model import (
     CrystalWellFilterModel,
     CrystalWellFilterSortbyEnum,
@@ -12,6 +15,12 @@ from xchembku_api.models.crystal_well_model import CrystalWellModel
 from xchembku_api.models.crystal_well_needing_droplocation_model import (
     CrystalWellNeedingDroplocationModel,
 )
+from xchembku_api.models.trusted_loader import (
+    columnize_trusted,
+    load_trusted,
+    normalize_trusted,
+)
+from xchembku_lib.datafaces.access import mutating, read_only
 from xchembku_lib.datafaces.direct_base import DirectBase
 
 logger = logging.getLogger(__name__)
@@ -20,7 +29,11 @@ logger = logging.getLogger(__name__)
 class DirectCrystalWells(DirectBase):
     """ """
 
+    # Sort key for the number of crystals, where missing sorts below zero as it does in sql.
+    __number_of_crystals = "COALESCE(crystal_well_autolocations.number_of_crystals, -1)"
+
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def upsert_crystal_wells_serialized(
         self,
         records: List[Dict],
@@ -32,6 +45,7 @@ class DirectCrystalWells(DirectBase):
         return await self.upsert_crystal_wells(models, why=why)
 
     # ----------------------------------------------------------------------------------------
+    @mutating
     async def upsert_crystal_wells(
         self,
         models: List[CrystalWellModel],
@@ -42,45 +56,78 @@ class DirectCrystalWells(DirectBase):
 
         We don't insert the same filename twice.
 
-        TODO: Consider an alternate way besides filename to distinguish duplicate crystal wells in upsert.
+        The whole batch is written by a single upsert statement keyed on the unique filename.
+        The existing filenames are looked up once beforehand to give the counts,
+        to know which wells are new, so they can be queued for autolocation,
+        and to know which plate each existing well stays on.
 
-        TODO: Find more efficient way to upsert_crystal_wells in batch.
+        TODO: Consider an alternate way besides filename to distinguish duplicate crystal wells in upsert.
         """
 
+        if len(models) == 0:
+            return {
+                "updated_count": 0,
+                "inserted_count": 0,
+            }
+
+        # Find which of the filenames already have a record, and on which plate.
+        existing_plate_uuids = await self.__fetch_existing_plate_uuids(
+            [model.filename for model in models],
+            why=why,
+        )
+
         inserted_count = 0
         updated_count = 0
-
-        # Loop over all the models to be upserted.
+        inserted_uuids = []
         for model in models:
-            # Find any existing record for this model object.
-            records = await self.query(
-                "SELECT * FROM crystal_wells WHERE filename = ?",
-                subs=[model.filename],
-                why=why,
-            )
-
-            if len(records) > 0:
-                # Make a copy of the model record and remove some fields not to update.
-                model_copy = copy.deepcopy(model.dict())
-                model_copy.pop(CommonFieldnames.UUID)
-                model_copy.pop(CommonFieldnames.CREATED_ON)
-                model_copy.pop("filename")
-                model_copy.pop("crystal_plate_uuid")
-                result = await self.update(
-                    "crystal_wells",
-                    model_copy,
-                    "(filename = ?)",
-                    subs=[model.filename],
-                    why=why,
-                )
-                updated_count += result.get("count", 0)
+            if model.filename in existing_plate_uuids:
+                updated_count += 1
             else:
-                await self.insert(
-                    "crystal_wells",
-                    [model.dict()],
-                    why=why,
-                )
                 inserted_count += 1
+                inserted_uuids.append(model.uuid)
+                # Same filename later in the batch becomes an update of this one.
+                existing_plate_uuids[model.filename] = model.crystal_plate_uuid
+
+        # Existing records keep their uuid, created_on and plate.
+        await self.upsert(
+            "crystal_wells",
+            [model.dict() for model in models],
+            "filename",
+            update_fields=[
+                field
+                for field in CrystalWellModel.__fields__
+                if field
+                not in [
+                    CommonFieldnames.UUID,
+                    CommonFieldnames.CREATED_ON,
+                    "filename",
+                    "crystal_plate_uuid",
+                ]
+            ],
+            why=why,
+        )
+
+        # New wells go into the change feed.
+        await self._record_crystal_well_changes(
+            "crystal_wells",
+            inserted_uuids,
+            why=why,
+        )
+
+        # New wells join the queue of those needing autolocation.
+        await self.upsert(
+            "crystal_well_pending_autolocations",
+            [{"crystal_well_uuid": uuid} for uuid in inserted_uuids],
+            "crystal_well_uuid",
+            update_fields=[],
+            why=why,
+        )
+
+        # Keep the per-plate counters in step with the wells, on the plates they are actually on.
+        await self._refresh_crystal_plate_counters_for_plates(
+            list(existing_plate_uuids.values()),
+            why=why,
+        )
 
         return {
             "updated_count": updated_count,
@@ -88,20 +135,53 @@ class DirectCrystalWells(DirectBase):
         }
 
     # ----------------------------------------------------------------------------------------
+    async def __fetch_existing_plate_uuids(
+        self,
+        filenames: List[str],
+        why=None,
+    ) -> Dict[str, str]:
+        """
+        Find which of the given filenames already exist in the crystal_wells table,
+        giving the crystal_plate_uuid of each by its filename.
+
+        The lookup is done in chunks to stay under the database's limit on bound parameters.
+        """
+
+        existing_plate_uuids: Dict[str, str] = {}
+
+        # Don't ask for the same filename twice.
+        unique_filenames = list(dict.fromkeys(filenames))
+
+        chunk_size = 500
+        for start in range(0, len(unique_filenames), chunk_size):
+            chunk = unique_filenames[start : start + chunk_size]
+            qmarks = ", ".join(["?"] * len(chunk))
+            records = await self.query(
+                "SELECT filename, crystal_plate_uuid FROM crystal_wells"
+                f" WHERE filename IN ({qmarks})",
+                subs=chunk,
+                why=why,
+            )
+            for record in records:
+                existing_plate_uuids[record["filename"]] = record["crystal_plate_uuid"]
+
+        return existing_plate_uuids
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_wells_filenames_serialized(
         self, limit: int = 1, why=None
     ) -> List[Dict]:
         """ """
 
-        # Get the models from the direct call.
-        models = await self.fetch_crystal_wells_filenames(limit=limit, why=why)
+        # Get the database rows, without making models.
+        records = await self.__query_crystal_wells_filenames(limit=limit, why=why)
 
-        # Serialize models into dicts to give to the response.
-        records = [model.dict() for model in models]
-
-        return records
+        # Serialize the rows straight into the dicts the models would give.
+        return normalize_trusted(CrystalWellModel, records)
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_wells_filenames(
         self, limit: int = 1, why=None
     ) -> List[CrystalWellModel]:
@@ -109,6 +189,46 @@ class DirectCrystalWells(DirectBase):
         Filenams for ALL wells ever.
         """
 
+        records = await self.__query_crystal_wells_filenames(limit=limit, why=why)
+
+        # Parse the records returned by sql into models, trusting our own database.
+        models = load_trusted(CrystalWellModel, records)
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_wells_filenames_columns_serialized(
+        self, limit: int = 1, why=None
+    ) -> Dict[str, List]:
+        """ """
+
+        # Columns are already plain lists, ready for the response.
+        return await self.fetch_crystal_wells_filenames_columns(limit=limit, why=why)
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_wells_filenames_columns(
+        self, limit: int = 1, why=None
+    ) -> Dict[str, List]:
+        """
+        Same wells as fetch_crystal_wells_filenames, but as columns.
+
+        Returns a dict with one list per CrystalWellModel field, each with one value per well.
+        """
+
+        records = await self.__query_crystal_wells_filenames(limit=limit, why=why)
+
+        return columnize_trusted(CrystalWellModel, records)
+
+    # ----------------------------------------------------------------------------------------
+    async def __query_crystal_wells_filenames(
+        self, limit: int = 1, why=None
+    ) -> List[Dict]:
+        """
+        Database rows for the filenames of ALL wells ever.
+        """
+
         if why is None:
             why = "API fetch_crystal_wells_filenames"
         records = await self.query(
@@ -123,54 +243,68 @@ class DirectCrystalWells(DirectBase):
             why=why,
         )
 
-        # Parse the records returned by sql into models.
-        models = [CrystalWellModel(**record) for record in records]
-
-        return models
+        return records
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_wells_needing_autolocation_serialized(
         self, limit: int = 1, why=None
     ) -> List[Dict]:
         """ """
 
-        # Get the models from the direct call.
-        models = await self.fetch_crystal_wells_needing_autolocation(
+        # Get the database rows, without making models.
+        records = await self.__query_crystal_wells_needing_autolocation(
             limit=limit, why=why
         )
 
-        # Serialize models into dicts to give to the response.
-        records = [model.dict() for model in models]
-
-        return records
+        # Serialize the rows straight into the dicts the models would give.
+        return normalize_trusted(CrystalWellModel, records)
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_wells_needing_autolocation(
         self, limit: int = 1, why=None
     ) -> List[CrystalWellModel]:
         """
         Wells need an autolocation if they don't have one yet.
+
+        These are kept in the crystal_well_pending_autolocations queue,
+        so the cost of the query follows the limit and not the number of wells ever made.
+        """
+
+        records = await self.__query_crystal_wells_needing_autolocation(
+            limit=limit, why=why
+        )
+
+        # Parse the records returned by sql into models, trusting our own database.
+        models = load_trusted(CrystalWellModel, records)
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    async def __query_crystal_wells_needing_autolocation(
+        self, limit: int = 1, why=None
+    ) -> List[Dict]:
+        """
+        Database rows for the wells in the queue needing autolocation.
         """
 
         if why is None:
             why = "API fetch_crystal_wells_needing_autolocation"
         records = await self.query(
             "SELECT crystal_wells.*"
-            f"\n  FROM crystal_wells"
-            f"\n  LEFT JOIN crystal_well_autolocations"
-            " ON crystal_wells.uuid = crystal_well_autolocations.crystal_well_uuid"
-            "\n  WHERE crystal_well_autolocations.uuid IS NULL"
-            f"\n  ORDER BY {CommonFieldnames.CREATED_ON}"
+            "\n  FROM crystal_well_pending_autolocations"
+            "\n  JOIN crystal_wells"
+            " ON crystal_wells.uuid = crystal_well_pending_autolocations.crystal_well_uuid"
+            f"\n  ORDER BY crystal_well_pending_autolocations.{CommonFieldnames.CREATED_ON}"
             f"\n  LIMIT {limit}",
             why=why,
         )
 
-        # Parse the records returned by sql into models.
-        models = [CrystalWellModel(**record) for record in records]
-
-        return models
+        return records
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_wells_needing_droplocation_serialized(
         self, filter: Dict, why=None
     ) -> List[Dict]:
@@ -179,17 +313,16 @@ class DirectCrystalWells(DirectBase):
         Returns records from the database.
         """
 
-        # Get the models from the direct call.
-        models = await self.fetch_crystal_wells_needing_droplocation(
+        # Get the database rows, without making models.
+        records = await self.__query_crystal_wells_needing_droplocation(
             CrystalWellFilterModel(**filter), why=why
         )
 
-        # Serialize models into dicts to give to the response.
-        records = [model.dict() for model in models]
-
-        return records
+        # Serialize the rows straight into the dicts the models would give.
+        return normalize_trusted(CrystalWellNeedingDroplocationModel, records)
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_crystal_wells_needing_droplocation(
         self, filter: CrystalWellFilterModel, why=None
     ) -> List[CrystalWellNeedingDroplocationModel]:
@@ -197,21 +330,80 @@ class DirectCrystalWells(DirectBase):
         Wells need a droplocation if they have an autolocation.
         """
 
+        records = await self.__query_crystal_wells_needing_droplocation(filter, why=why)
+
+        # Parse the records returned by sql into models, trusting our own database.
+        models = load_trusted(CrystalWellNeedingDroplocationModel, records)
+
+        return models
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_wells_needing_droplocation_rows(
+        self, filter: CrystalWellFilterModel, why=None
+    ) -> List[CrystalWellNeedingDroplocationRow]:
+        """
+        Same wells as fetch_crystal_wells_needing_droplocation, but as compact rows.
+        """
+
+        records = await self.__query_crystal_wells_needing_droplocation(filter, why=why)
+
+        return load_compact_rows(CrystalWellNeedingDroplocationRow, records)
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_wells_needing_droplocation_columns_serialized(
+        self, filter: Dict, why=None
+    ) -> Dict[str, List]:
+        """
+        Caller provides the filters for selecting which crystal wells.
+        Returns columns from the database.
+        """
+
+        # Columns are already plain lists, ready for the response.
+        return await self.fetch_crystal_wells_needing_droplocation_columns(
+            CrystalWellFilterModel(**filter), why=why
+        )
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_crystal_wells_needing_droplocation_columns(
+        self, filter: CrystalWellFilterModel, why=None
+    ) -> Dict[str, List]:
+        """
+        Same wells as fetch_crystal_wells_needing_droplocation, but as columns.
+
+        Returns a dict with one list per CrystalWellNeedingDroplocationModel field,
+        each with one value per well.
+        """
+
+        records = await self.__query_crystal_wells_needing_droplocation(filter, why=why)
+
+        return columnize_trusted(CrystalWellNeedingDroplocationModel, records)
+
+    # ----------------------------------------------------------------------------------------
+    async def __query_crystal_wells_needing_droplocation(
+        self, filter: CrystalWellFilterModel, why=None
+    ) -> List[Dict]:
+        """
+        Database rows for the wells needing a droplocation.
+        """
+
         # Caller wants results relative to anchor?
         if filter.anchor is not None and filter.direction is not None:
-            return await self.__fetch_crystal_wells_needing_droplocation_hard(
+            return await self.__query_crystal_wells_needing_droplocation_hard(
                 filter, why=why
             )
         # Query can be made easier if there is no anchor with direction involved.
         else:
-            return await self.__fetch_crystal_wells_needing_droplocation_easy(
+            return await self.__query_crystal_wells_needing_droplocation_easy(
                 filter, why=why
             )
 
     # ----------------------------------------------------------------------------------------
-    async def __fetch_crystal_wells_needing_droplocation_easy(
+    async def __query_crystal_wells_needing_droplocation_easy(
         self, filter: CrystalWellFilterModel, why=None
-    ) -> List[CrystalWellNeedingDroplocationModel]:
+    ) -> List[Dict]:
         """
         Wells need a droplocation if they have an autolocation.
         """
@@ -235,30 +427,42 @@ class DirectCrystalWells(DirectBase):
         # Query the database.
         records = await self.query(main_query, subs=subs, why=why)
 
-        # Parse the records returned by sql into models.
-        models = [CrystalWellNeedingDroplocationModel(**record) for record in records]
-
-        return models
+        return records
 
     # ----------------------------------------------------------------------------------------
-    async def __fetch_crystal_wells_needing_droplocation_hard(
+    async def __query_crystal_wells_needing_droplocation_hard(
         self, filter: CrystalWellFilterModel, why=None
-    ) -> List[CrystalWellNeedingDroplocationModel]:
+    ) -> List[Dict]:
         """
         This is the query when we want records relative from an anchor record.
 
-        Since this involves complex subqueries, we limit use of this
-        to when we're looking only at records in a specific visit or plate.
-        """
+        The sort key of the anchor record is looked up first,
+        then the records following it in the sort order are sought by comparing with that key.
+        This is a range scan with a limit, rather than numbering all the records in the filter.
 
-        if filter.visit is None:
-            raise RuntimeError(
-                "programming error: no visit supplied with relative crystal well filter"
-            )
+        The anchor itself need not match the filter.
+        """
 
         if why is None:
             why = "API fetch_crystal_wells_needing_droplocation"
 
+        # Get the sort key of the anchor.
+        anchor_records = await self.query(
+            "SELECT"
+            "\n  crystal_wells.uuid,"
+            "\n  crystal_wells.position,"
+            f"\n  {self.__number_of_crystals} AS number_of_crystals"
+            "\nFROM crystal_wells"
+            "\nLEFT JOIN crystal_well_autolocations ON crystal_well_autolocations.crystal_well_uuid = crystal_wells.uuid"
+            "\nWHERE crystal_wells.uuid = ?",
+            subs=[filter.anchor],
+            why=why,
+        )
+
+        # Nothing follows an anchor which doesn't exist.
+        if len(anchor_records) == 0:
+            return []
+
         # Build the individual pieces of the SQL query.
         subs: List[Any] = []
         orderby = self.__build_orderby(filter)
@@ -266,40 +470,62 @@ class DirectCrystalWells(DirectBase):
         fields = self.__build_fields(filter)
         joins = self.__build_joins(filter)
 
-        # We need the row number to be in both the main and sub query.
-        row_number = f"\n  ROW_NUMBER() OVER ({orderby}) AS ordered_row_number"
-        fields = row_number + "," + fields
-
-        # Main query gets the actual results.
-        main_query = "SELECT" + fields + joins + where
-
-        # Build another "where" since it may add subs.
-        where = self.__build_where(filter, subs)
-
-        # Sub query computes row_numbers under the same filter in the same order as the main query.
-        sub_query = "\nSELECT\n  crystal_wells.uuid," + row_number + joins + where
-
-        # Do the main query, but filter the results by the subquery based on matching row numbers.
-        full_query = (
-            f"\nSELECT * FROM (\n{main_query}\n) AS main_query"
-            f"\n/* Match row_numbers starting from the anchor {filter.anchor}. */"
-            "\nWHERE ordered_row_number >"
-            f"\n  (SELECT ordered_row_number FROM ({sub_query}\n) AS sub_query"
-            f"\n    WHERE sub_query.uuid = ?)"
-            f"\n    ORDER BY ordered_row_number"
+        # Add the seek past the anchor to the other conditions.
+        where += (
+            f"\n/* Seek past the anchor {filter.anchor}. */"
+            f"\n{'AND' if where != '' else 'WHERE'} "
+            + self.__build_seek(filter, anchor_records[0], subs)
         )
-        subs.append(filter.anchor)
+
+        # Glue them together.
+        main_query = "\nSELECT" + fields + joins + where + "\n" + orderby
 
         if filter.limit is not None:
-            full_query += f"\nLIMIT {filter.limit}"
+            main_query += f"\nLIMIT {filter.limit}"
 
         # Do the actual query.
-        records = await self.query(full_query, subs=subs, why=why)
+        records = await self.query(main_query, subs=subs, why=why)
 
-        # Parse the records returned by sql into models.
-        models = [CrystalWellNeedingDroplocationModel(**record) for record in records]
+        return records
 
-        return models
+    # ----------------------------------------------------------------------------------------
+    def __build_seek(
+        self,
+        filter: CrystalWellFilterModel,
+        anchor_record: Dict,
+        subs: List[Any],
+    ) -> str:
+        """
+        Condition for the records which come after the anchor in the sort order.
+
+        The sort key is compared as a tuple, in the same columns and directions as the order by,
+        with the uuid last so that records with the same position are never skipped or repeated.
+        """
+
+        # Sort key columns, with True where the column is ascending when the direction is forward.
+        keys = []
+        if filter.sortby == CrystalWellFilterSortbyEnum.NUMBER_OF_CRYSTALS:
+            keys.append((self.__number_of_crystals, "number_of_crystals", False))
+        keys.append(("crystal_wells.position", "position", True))
+        keys.append(("crystal_wells.uuid", "uuid", True))
+
+        # Build the tuple comparison from the last key outwards.
+        sql = ""
+        seek_subs: List[Any] = []
+        for column, name, is_ascending in reversed(keys):
+            if filter.direction == -1:
+                is_ascending = not is_ascending
+            operator = ">" if is_ascending else "<"
+            if sql == "":
+                sql = f"{column} {operator} ?"
+                seek_subs = [anchor_record[name]]
+            else:
+                sql = f"{column} {operator} ? OR ({column} = ? AND ({sql}))"
+                seek_subs = [anchor_record[name], anchor_record[name]] + seek_subs
+
+        subs.extend(seek_subs)
+
+        return f"({sql})"
 
     # ----------------------------------------------------------------------------------------
     def __build_fields(
@@ -432,22 +658,6 @@ class DirectCrystalWells(DirectBase):
             subs.append(filter.anchor)
             where = "AND"
 
-        # Caller wants those in direction from the anchor record?
-        # This means we ne need the anchor to be in the rows,
-        # no matter if it would have been excluded by other filters.
-        if filter.anchor is not None and filter.direction is not None:
-            # We presume that all previous conjunctions were AND
-            # which have higher operator precedence than OR,
-            # so we can stick an OR on here at the end
-            if where == "AND":
-                where = "OR"
-            sql += (
-                "\n/* Always include the crystal well at the anchor. */"
-                f"\n{where} crystal_wells.uuid = ?"
-            )
-            subs.append(filter.anchor)
-            where = "AND"
-
         return sql
 
     # ----------------------------------------------------------------------------------------
@@ -469,10 +679,13 @@ class DirectCrystalWells(DirectBase):
                 crystals_direction = "ASC"
 
             # If duplicate crystals, use position as tie breaker.
-            order_by = f"crystal_well_autolocations.number_of_crystals {crystals_direction}, crystal_wells.position {position_direction}"
+            order_by = f"{self.__number_of_crystals} {crystals_direction}, crystal_wells.position {position_direction}"
         else:
             order_by = f"crystal_wells.position {position_direction}"
 
+        # Wells on different plates share positions, so the uuid makes the order total for seeking.
+        order_by += f", crystal_wells.uuid {position_direction}"
+
         sql += f"ORDER BY {order_by}"
 
         return sql
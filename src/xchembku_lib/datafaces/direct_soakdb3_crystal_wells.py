@@ -1,8 +1,27 @@
+import asyncio
+import contextlib
+import json
 import logging
-from typing import Dict, List, Optional
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from dls_utilpack.callsign import callsign
 from dls_utilpack.describe import describe
+from dls_utilpack.explain import explain2
 from dls_utilpack.require import require
 
 # Soakdb3 dataface/database.
@@ -12,6 +31,7 @@ from soakdb3_api.models.crystal_well_model import (
     CrystalWellModel as Soakdb3CrystalWellModel,
 )
 
+from xchembku_lib.datafaces.access import mutating, read_only, remote
 from xchembku_lib.datafaces.direct_base import DirectBase
 
 logger = logging.getLogger(__name__)
@@ -20,17 +40,110 @@ logger = logging.getLogger(__name__)
 class DirectSoakdb3CrystalWells(DirectBase):
     """ """
 
+    # Injections which trust the local record before the next full reconciliation.
+    __RECONCILE_EVERY = 20
+
+    # Visits injected at the same time when injecting into several visits.
+    DEFAULT_VISIT_CONCURRENCY = 4
+
+    # How long a visit's head row values are used before being read again.
+    HEAD_ROW_CACHE_SECONDS = 60.0
+
+    # Head row values by soakdb3 service and visitid, with the time they were read.
+    # This is shared by all the datafaces in the process, such as the server's pooled
+    # connections, so they all use the same values and one invalidation reaches them all.
+    __head_rows: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+
+    # One lock per soakdb3 database keeps injections into the same visit in turn,
+    # while injections into different visits can overlap.
+    # The server's readers each run injections, so the locks are shared by the whole process,
+    # and a lock is forgotten once nothing is holding or waiting on it.
+    __visit_locks: "weakref.WeakValueDictionary[Tuple[str, str], asyncio.Lock]" = (
+        weakref.WeakValueDictionary()
+    )
+
+    # ----------------------------------------------------------------------------------------
+    def __init__(self, specification=None):
+
+        # Made when first needed.
+        self.soakdb3_dataface_client: Any = None
+
+        # Identifies the soakdb3 service, made with the client.
+        self.__soakdb3_key = ""
+
+        # Lent by the server's connection pool when this dataface is one of its readers.
+        self.__write_transaction: Optional[Callable[[], AsyncContextManager]] = None
+
+    # ----------------------------------------------------------------------------------------
+    def _lend_writer(self, write_transaction: Callable[[], AsyncContextManager]) -> None:
+        """
+        Have the bookkeeping of injections written on the server's writer.
+
+        Called by the server's connection pool for each of its readers.
+
+        Args:
+            write_transaction: gives a context which checks out the writer and commits on exit
+        """
+
+        self.__write_transaction = write_transaction
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def invalidate_soakdb3_head_rows_serialized(
+        self,
+        visitid: Optional[str] = None,
+        why: Optional[str] = None,
+    ) -> Dict:
+        # Return the method doing the work.
+        return await self.invalidate_soakdb3_head_rows(visitid=visitid, why=why)
+
+    # ----------------------------------------------------------------------------------------
+    @mutating
+    async def invalidate_soakdb3_head_rows(
+        self,
+        visitid: Optional[str] = None,
+        why: Optional[str] = None,
+    ) -> Dict:
+        """
+        Forget the cached head row values so the next injection reads them again.
+
+        Call this after changing the Protein or DropVolume of a visit.
+        Only the values read from this dataface's soakdb3 service are forgotten.
+
+        Args:
+            visitid (str): the visit to forget, or None for all visits
+        """
+
+        self.__establish_soakdb3_dataface_client()
+
+        keys = [
+            key
+            for key in self.__head_rows
+            if key[0] == self.__soakdb3_key and (visitid is None or key[1] == visitid)
+        ]
+        for key in keys:
+            self.__head_rows.pop(key)
+
+        return {"count": len(keys)}
+
     # ----------------------------------------------------------------------------------------
+    @remote
     async def inject_soakdb3_crystal_wells_serialized(
         self,
         visitid: str,
         records: List[Dict],
+        reconcile: bool = False,
         why: Optional[str] = None,
     ) -> Dict:
         # We are being given json, so parse it into models.
         models = [Soakdb3CrystalWellModel(**record) for record in records]
         # Return the method doing the work.
-        return await self.inject_soakdb3_crystal_wells(visitid, models, why=why)
+        return await self.inject_soakdb3_crystal_wells(
+            visitid,
+            models,
+            reconcile=reconcile,
+            why=why,
+        )
 
     # ----------------------------------------------------------------------------------------
     async def disconnect_soakdb3_crystal_wells_mixin(self):
@@ -38,17 +151,111 @@ class DirectSoakdb3CrystalWells(DirectBase):
         Called from base class disconnect.
         """
 
-        if (
-            hasattr(self, "soakdb3_dataface_client")
-            and self.soakdb3_dataface_client is not None
-        ):
+        if self.soakdb3_dataface_client is not None:
             await self.soakdb3_dataface_client.close_client_session()
 
     # ----------------------------------------------------------------------------------------
+    @remote
+    async def inject_soakdb3_crystal_wells_for_visits_serialized(
+        self,
+        records_by_visitid: Dict[str, List[Dict]],
+        concurrency: Optional[int] = None,
+        reconcile: bool = False,
+        why: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        # We are being given json, so parse it into models.
+        models_by_visitid = {
+            visitid: [Soakdb3CrystalWellModel(**record) for record in records]
+            for visitid, records in records_by_visitid.items()
+        }
+        # Return the method doing the work.
+        return await self.inject_soakdb3_crystal_wells_for_visits(
+            models_by_visitid,
+            concurrency=concurrency,
+            reconcile=reconcile,
+            why=why,
+        )
+
+    # ----------------------------------------------------------------------------------------
+    @remote
+    async def inject_soakdb3_crystal_wells_for_visits(
+        self,
+        models_by_visitid: Dict[str, List[Soakdb3CrystalWellModel]],
+        concurrency: Optional[int] = None,
+        reconcile: bool = False,
+        why="inject_soakdb3_crystal_wells_for_visits",
+    ) -> Dict[str, Dict]:
+        """
+        Inject crystal wells into the soakdb3 databases of several visits.
+
+        Each visit is a separate soakdb3 database, so the visits are injected concurrently,
+        no more than concurrency of them at a time.
+
+        Through the server, the local bookkeeping of each visit is committed as soon as
+        that visit is done, whether or not the other visits fail.
+        Otherwise the bookkeeping is left in the caller's transaction.
+        Bookkeeping which is rolled back only makes the next injection read more of soakdb3,
+        since everything above the old watermark is read again.
+
+        Returns:
+            Dict[str, Dict]: the counts from inject_soakdb3_crystal_wells keyed by visitid
+
+        Raises:
+            RuntimeError: some visits failed, naming each one with its error,
+                after the others have been injected
+        """
+
+        if concurrency is None:
+            concurrency = self.DEFAULT_VISIT_CONCURRENCY
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def inject_visit(visitid: str) -> Dict:
+            async with semaphore:
+                return await self.__inject_soakdb3_crystal_wells_locked(
+                    visitid,
+                    models_by_visitid[visitid],
+                    reconcile,
+                    why=why,
+                )
+
+        visitids = list(models_by_visitid.keys())
+
+        # Let all the visits finish before reporting any failure.
+        results = await asyncio.gather(
+            *[inject_visit(visitid) for visitid in visitids],
+            return_exceptions=True,
+        )
+
+        counts_by_visitid = {}
+        failures: List[Tuple[str, BaseException]] = []
+        for visitid, result in zip(visitids, results):
+            if isinstance(result, BaseException):
+                failures.append((visitid, result))
+            else:
+                counts_by_visitid[visitid] = result
+
+        if len(failures) > 0:
+            raise RuntimeError(
+                f"failed to inject soakdb3 crystal wells for {len(failures)}"
+                f" of {len(visitids)} visits: "
+                + "; ".join(
+                    [
+                        explain2(exception, f"injecting visit {visitid}")
+                        for visitid, exception in failures
+                    ]
+                )
+            ) from failures[0][1]
+
+        return counts_by_visitid
+
+    # ----------------------------------------------------------------------------------------
+    @remote
     async def inject_soakdb3_crystal_wells(
         self,
         visitid,
         models: List[Soakdb3CrystalWellModel],
+        reconcile: bool = False,
         why="inject_soakdb3_crystal_wells",
     ) -> Dict:
         """
@@ -56,49 +263,90 @@ class DirectSoakdb3CrystalWells(DirectBase):
         into the soakdb3 database for the given visit.
 
         We don't insert the same CrystalPlate/CrystalWell twice.
+
+        The plate/well pairs already in the visit are kept in a local record,
+        so usually only the soakdb3 rows added since the last injection need to be read.
+        The whole soakdb3 body table is read, and the local record corrected from it,
+        on the first injection for a visit, every so many injections after that,
+        or when reconcile is True.
+        """
+
+        return await self.__inject_soakdb3_crystal_wells_locked(
+            visitid,
+            models,
+            reconcile,
+            why=why,
+        )
+
+    # ----------------------------------------------------------------------------------------
+    async def __inject_soakdb3_crystal_wells_locked(
+        self,
+        visitid: str,
+        models: List[Soakdb3CrystalWellModel],
+        reconcile: bool,
+        why=None,
+    ) -> Dict:
+        """
+        Do the injection into one visit, holding the visit's lock.
         """
 
         self.__establish_soakdb3_dataface_client()
 
+        # Holding the lock here keeps it in the weak dictionary until the injection is done.
+        key = (self.__soakdb3_key, visitid)
+        visit_lock = self.__visit_locks.get(key)
+        if visit_lock is None:
+            visit_lock = asyncio.Lock()
+            self.__visit_locks[key] = visit_lock
+
+        async with visit_lock:
+            return await self.__inject_soakdb3_crystal_wells(
+                visitid,
+                models,
+                reconcile,
+                why=why,
+            )
+
+    # ----------------------------------------------------------------------------------------
+    async def __inject_soakdb3_crystal_wells(
+        self,
+        visitid: str,
+        models: List[Soakdb3CrystalWellModel],
+        reconcile: bool,
+        why=None,
+    ) -> Dict:
+        """
+        Do the injection into one visit while holding its lock.
+
+        Soakdb3 is read and written first, then the local bookkeeping is written,
+        so a server reader holds the writer only for the bookkeeping.
+        """
+
         # Get the necessary values from the (single) head table row.
-        head_rows = await self.soakdb3_dataface_client.query_for_dictionary(  # type: ignore
-            visitid,
-            f"SELECT Protein, DropVolume FROM {Tablenames.HEAD}",
-        )
-        protein = head_rows[0]["Protein"]
-        drop_volume = head_rows[0]["DropVolume"]
+        head_row = await self.__get_head_row(visitid)
+        protein = head_row["Protein"]
+        drop_volume = head_row["DropVolume"]
 
         logger.debug(describe("head row protein", protein))
         logger.debug(describe("head row drop_volume", drop_volume))
 
-        # Get rows of all existing plate/well pairs in the soakdb3 database.
-        plate_well_rows = await self.soakdb3_dataface_client.query(  # type: ignore
-            visitid,
-            f"SELECT ID, CrystalPlate, CrystalWell FROM {Tablenames.BODY} ORDER BY ID ASC",
-        )
-
-        # Flatten the plate_well values into a list of combine plate/well records.
-        plate_wells = []
-        blank_row_ids = []
-        for plate_well_row in plate_well_rows:
-            # This is a row with empty or blank CrystalPlate?
-            if plate_well_row[1] is None or plate_well_row[1] == "":
-                # Remember the ID of this row so we can update it.
-                blank_row_ids.append(plate_well_row[0])
-            else:
-                plate_wells.append(
-                    self.__plate_well(plate_well_row[1], plate_well_row[2]),
-                )
+        # Get the existing plate/well pairs and the blank rows which can be reused.
+        (
+            plate_wells,
+            blank_row_ids,
+            recorded_plate_wells,
+            is_reconciling,
+        ) = await self.__read_soakdb3_body(visitid, reconcile, why=why)
 
         updated_count = 0
         inserted_count = 0
         skipped_count = 0
 
         # Loop over all the models to be appended.
-        id_to_insert = 0
-        fields = []
+        inserted_rows: List[Dict] = []
+        updated_rows_by_id: Dict[int, Dict] = {}
         for model in models:
-            # Make combined plate/well name for this model.
+            # Make combined plate/well key for this model.
             plate_well = self.__plate_well(
                 model.CrystalPlate,
                 model.CrystalWell,
@@ -107,42 +355,50 @@ class DirectSoakdb3CrystalWells(DirectBase):
             if plate_well in plate_wells:
                 skipped_count += 1
                 continue
-            plate_wells.append(plate_well)
+            plate_wells.add(plate_well)
+
+            # Make a single row holding all the fields in the model.
+            row = model.dict()
+            # The ID from the model is of indeterminate value at this point.
+            row.pop("ID", None)
+            # Certain fields on the row come from the current head row field values.
+            if "ProteinName" in row:
+                row["ProteinName"] = protein
+            if "DropVolume" in row:
+                row["DropVolume"] = drop_volume
 
             if len(blank_row_ids) == 0:
-                # ID for this row is next negative number, causing insert.
-                id_to_insert = id_to_insert - 1
-                id = id_to_insert
+                # New row, which soakdb3 gives the next ID when it is inserted.
+                inserted_rows.append(row)
                 inserted_count += 1
             else:
-                # ID for this row is one of the empty rows.
-                id = int(blank_row_ids.pop(0))
+                # Row goes into one of the empty rows.
+                updated_rows_by_id[int(blank_row_ids.popleft())] = row
                 updated_count += 1
-            # Make a row for each field in the model.
-            record = model.dict()
-            for field in list(record.keys()):
-                # Ignore the ID from the model since it is of indeterminate value at this point.
-                if field == "ID":
-                    continue
-                # Certain fields on the row come from the current head row field values.
-                if field == "ProteinName":
-                    value = protein
-                elif field == "DropVolume":
-                    value = drop_volume
-                else:
-                    value = record[field]
-                fields.append(
-                    {
-                        "id": str(id),
-                        "field": field,
-                        "value": value,
-                    }
-                )
 
-        await self.soakdb3_dataface_client.update_body_fields(  # type: ignore
+        if len(inserted_rows) > 0 or len(updated_rows_by_id) > 0:
+            await self.__write_body_rows(visitid, inserted_rows, updated_rows_by_id)
+
+        # The watermark moves up to the highest body ID now in soakdb3.
+        max_id_rows = await self.soakdb3_dataface_client.query_for_dictionary(
             visitid,
-            fields,
+            f"SELECT MAX(ID) AS max_id FROM {Tablenames.BODY}",
         )
+        body_id_watermark = 0
+        if len(max_id_rows) > 0 and max_id_rows[0]["max_id"] is not None:
+            body_id_watermark = int(max_id_rows[0]["max_id"])
+
+        # Remember what is now in the soakdb3 body table.
+        async with self.__bookkeeping_dataface() as dataface:
+            await dataface.__record_soakdb3_body(
+                visitid,
+                plate_wells,
+                blank_row_ids,
+                recorded_plate_wells,
+                is_reconciling,
+                body_id_watermark,
+                why=why,
+            )
 
         return {
             "updated_count": updated_count,
@@ -151,6 +407,260 @@ class DirectSoakdb3CrystalWells(DirectBase):
         }
 
     # ----------------------------------------------------------------------------------------
+    @contextlib.asynccontextmanager
+    async def __bookkeeping_dataface(
+        self,
+    ) -> AsyncIterator["DirectSoakdb3CrystalWells"]:
+        """
+        Give the dataface to write the bookkeeping of an injection on.
+
+        On a server reader this is the writer it was lent, and the bookkeeping is committed on exit.
+        Otherwise this is the dataface itself, and the bookkeeping is left in the caller's transaction.
+        """
+
+        if self.__write_transaction is None:
+            yield self
+        else:
+            async with self.__write_transaction() as dataface:
+                yield dataface
+
+    # ----------------------------------------------------------------------------------------
+    async def __get_head_row(self, visitid: str) -> Dict:
+        """
+        Get the values from the visit's head table row which go on injected rows.
+
+        The values are cached for a while since they rarely change during a visit.
+        """
+
+        now = time.monotonic()
+
+        key = (self.__soakdb3_key, visitid)
+        cached = self.__head_rows.get(key)
+        if cached is not None and now - cached[0] < self.HEAD_ROW_CACHE_SECONDS:
+            return cached[1]
+
+        head_rows = await self.soakdb3_dataface_client.query_for_dictionary(
+            visitid,
+            f"SELECT Protein, DropVolume FROM {Tablenames.HEAD}",
+        )
+        head_row = {
+            "Protein": head_rows[0]["Protein"],
+            "DropVolume": head_rows[0]["DropVolume"],
+        }
+
+        self.__head_rows[key] = (now, head_row)
+
+        return head_row
+
+    # ----------------------------------------------------------------------------------------
+    async def __read_soakdb3_body(
+        self,
+        visitid: str,
+        reconcile: bool,
+        why=None,
+    ) -> Tuple[Set[Tuple[str, str]], Deque[int], Set[Tuple[str, str]], bool]:
+        """
+        Find the plate/well pairs in the soakdb3 body table and its blank rows.
+
+        Normally only the rows above the watermark, and the rows which were blank, are read from soakdb3.
+        The rest of the pairs come from the local record.
+
+        Returns:
+            the plate/well pairs,
+            the blank row IDs in ascending order,
+            the plate/well pairs in the local record,
+            and whether the whole body table was read
+        """
+
+        records = await self.query(
+            "SELECT * FROM soakdb3_visit_syncs WHERE visitid = ?",
+            subs=[visitid],
+            why=why,
+        )
+        sync = records[0] if len(records) > 0 else None
+
+        is_reconciling = (
+            reconcile
+            or sync is None
+            or sync["incremental_count"] >= self.__RECONCILE_EVERY
+        )
+
+        sql = f"SELECT ID, CrystalPlate, CrystalWell FROM {Tablenames.BODY}"
+        subs: List = []
+        if sync is None:
+            # Never seen this visit before, so the whole body table is read.
+            pass
+        elif not is_reconciling:
+            # Only rows added since last time, or which were blank last time.
+            wheres = ["ID > ?"]
+            subs.append(sync["body_id_watermark"])
+            previous_blank_row_ids = json.loads(sync["blank_row_ids"])
+            if len(previous_blank_row_ids) > 0:
+                wheres.append(
+                    "ID IN (%s)" % (", ".join(["?"] * len(previous_blank_row_ids)))
+                )
+                subs.extend(previous_blank_row_ids)
+            sql += "\nWHERE " + " OR ".join(wheres)
+        sql += "\nORDER BY ID ASC"
+
+        # The dictionary form has no extra first row holding the field names.
+        plate_well_rows = await self.soakdb3_dataface_client.query_for_dictionary(
+            visitid,
+            sql,
+            subs=subs,
+        )
+
+        # Gather the plate/well pairs into a set for constant-time lookups.
+        # The blank rows are consumed from the front in ID order.
+        plate_wells: Set[Tuple[str, str]] = set()
+        blank_row_ids: Deque[int] = deque()
+        for plate_well_row in plate_well_rows:
+            # This is a row with empty or blank CrystalPlate?
+            if (
+                plate_well_row["CrystalPlate"] is None
+                or plate_well_row["CrystalPlate"] == ""
+            ):
+                # Remember the ID of this row so we can update it.
+                blank_row_ids.append(int(plate_well_row["ID"]))
+            else:
+                plate_wells.add(
+                    self.__plate_well(
+                        plate_well_row["CrystalPlate"], plate_well_row["CrystalWell"]
+                    ),
+                )
+
+        records = await self.query(
+            "SELECT crystal_plate, crystal_well FROM soakdb3_exported_crystal_wells"
+            " WHERE visitid = ?",
+            subs=[visitid],
+            why=why,
+        )
+        recorded_plate_wells = set(
+            self.__plate_well(record["crystal_plate"], record["crystal_well"])
+            for record in records
+        )
+
+        if is_reconciling:
+            # Report where the local record had drifted from soakdb3.
+            missing_count = len(recorded_plate_wells - plate_wells)
+            unrecorded_count = len(plate_wells - recorded_plate_wells)
+            if sync is not None and (missing_count > 0 or unrecorded_count > 0):
+                logger.warning(
+                    f"[SOAKSYNC] visit {visitid} has {missing_count} recorded plate/wells"
+                    f" no longer in soakdb3 and {unrecorded_count} in soakdb3 not recorded"
+                )
+        else:
+            plate_wells.update(recorded_plate_wells)
+
+        return plate_wells, blank_row_ids, recorded_plate_wells, is_reconciling
+
+    # ----------------------------------------------------------------------------------------
+    async def __record_soakdb3_body(
+        self,
+        visitid: str,
+        plate_wells: Set[Tuple[str, str]],
+        blank_row_ids: Deque[int],
+        recorded_plate_wells: Set[Tuple[str, str]],
+        is_reconciling: bool,
+        body_id_watermark: int,
+        why=None,
+    ) -> None:
+        """
+        Update the local record of the soakdb3 body table after an injection.
+
+        Only the local database is written, soakdb3 has already been read.
+        """
+
+        if is_reconciling:
+            # The local record is replaced by what was read from soakdb3.
+            await self.execute(
+                "DELETE FROM soakdb3_exported_crystal_wells WHERE visitid = ?",
+                subs=[visitid],
+                why=why,
+            )
+            recorded_plate_wells = set()
+
+        await self.insert(
+            "soakdb3_exported_crystal_wells",
+            [
+                {
+                    "visitid": visitid,
+                    "crystal_plate": plate_well[0],
+                    "crystal_well": plate_well[1],
+                }
+                for plate_well in plate_wells - recorded_plate_wells
+            ],
+            why=why,
+        )
+
+        blank_row_ids_json = json.dumps(list(blank_row_ids))
+
+        if is_reconciling:
+            await self.upsert(
+                "soakdb3_visit_syncs",
+                [
+                    {
+                        "visitid": visitid,
+                        "body_id_watermark": body_id_watermark,
+                        "blank_row_ids": blank_row_ids_json,
+                        "incremental_count": 0,
+                        "reconciled_on": datetime.now().strftime(
+                            "%Y-%m-%d %H:%M:%S.%f"
+                        ),
+                    }
+                ],
+                "visitid",
+                why=why,
+            )
+        else:
+            # Count up from the last reconciliation.
+            await self.execute(
+                "UPDATE soakdb3_visit_syncs SET"
+                "\n  body_id_watermark = ?,"
+                "\n  blank_row_ids = ?,"
+                "\n  incremental_count = incremental_count + 1"
+                "\nWHERE visitid = ?",
+                subs=[body_id_watermark, blank_row_ids_json, visitid],
+                why=why,
+            )
+
+    # ----------------------------------------------------------------------------------------
+    async def __write_body_rows(
+        self,
+        visitid: str,
+        inserted_rows: List[Dict],
+        updated_rows_by_id: Dict[int, Dict],
+    ) -> None:
+        """
+        Write whole rows to the soakdb3 body table, and commit them together.
+
+        The new rows are inserted in one call, each reused blank row is updated in one call.
+
+        Soakdb3's insert and update leave their writes uncommitted,
+        so the commit, or the rollback if a write fails, is done here.
+        """
+
+        client = self.soakdb3_dataface_client
+
+        try:
+            if len(inserted_rows) > 0:
+                await client.insert(visitid, Tablenames.BODY, inserted_rows)
+
+            for id, row in updated_rows_by_id.items():
+                # Soakdb3's update doesn't pass on subs, but the id is an int so is safe in the where.
+                await client.update(visitid, Tablenames.BODY, row, f"ID = {int(id)}")
+        except Exception:
+            # Don't leave the partial write for the next commit in soakdb3 to publish.
+            try:
+                await client.execute(visitid, "ROLLBACK")
+            except Exception as exception:
+                logger.warning(explain2(exception, "rolling back soakdb3 body rows"))
+            raise
+
+        await client.execute(visitid, "COMMIT")
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_soakdb3_crystal_wells_serialized(
         self,
         visitid: str,
@@ -172,28 +682,79 @@ class DirectSoakdb3CrystalWells(DirectBase):
         return records
 
     # ----------------------------------------------------------------------------------------
+    @read_only
     async def fetch_soakdb3_crystal_wells(
         self,
         visitid: str,
         why: Optional[str] = None,
     ) -> List[Soakdb3CrystalWellModel]:
-        """"""
+        """
+        Fetch the rows of the soakdb3 body table in ID order, each parsed into a model.
+
+        Use fetch_soakdb3_crystal_well_fields to read only some of the columns.
+        """
 
         self.__establish_soakdb3_dataface_client()
 
         # Get rows of all existing plate/well pairs in the soakdb3 database.
-        records = await self.soakdb3_dataface_client.query_for_dictionary(  # type: ignore
+        records = await self.soakdb3_dataface_client.query_for_dictionary(
             visitid,
             f"SELECT * FROM {Tablenames.BODY} ORDER BY ID ASC",
         )
 
         # Dicts are returned, so parse them into models.
         # Fields which came from the query which are not defined in the model are ignored.
-        # TODO: Fetch only desired fields when querying in fetch_soakdb3_crystal_wells.
         models = [Soakdb3CrystalWellModel(**record) for record in records]
 
         return models
 
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_soakdb3_crystal_well_fields_serialized(
+        self,
+        visitid: str,
+        fields: List[str],
+        why=None,
+    ) -> List[Dict]:
+        """ """
+
+        # Records are already plain dicts, ready for the response.
+        return await self.fetch_soakdb3_crystal_well_fields(visitid, fields, why=why)
+
+    # ----------------------------------------------------------------------------------------
+    @read_only
+    async def fetch_soakdb3_crystal_well_fields(
+        self,
+        visitid: str,
+        fields: List[str],
+        why: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Fetch only some columns of the rows of the soakdb3 body table in ID order.
+
+        Each row is returned as a plain dict, holding the values as soakdb3 stores them.
+
+        Raises:
+            RuntimeError: a field is not one of the model's fields
+        """
+
+        self.__establish_soakdb3_dataface_client()
+
+        # Only allow the model's own fields into the sql.
+        unknown_fields = [
+            field for field in fields if field not in Soakdb3CrystalWellModel.__fields__
+        ]
+        if len(unknown_fields) > 0:
+            raise RuntimeError(f"unknown soakdb3 crystal well fields {unknown_fields}")
+        columns = ", ".join([f"`{field}`" for field in fields])
+
+        records = await self.soakdb3_dataface_client.query_for_dictionary(
+            visitid,
+            f"SELECT {columns} FROM {Tablenames.BODY} ORDER BY ID ASC",
+        )
+
+        return records
+
     # ----------------------------------------------------------------------------------------
     def __establish_soakdb3_dataface_client(self) -> None:
         """
@@ -203,10 +764,6 @@ class DirectSoakdb3CrystalWells(DirectBase):
         and the same one used as return for subsequent calls.
         """
 
-        # TODO: Solve problem of DirectSoakdb3CrystalWells mixin constructor not getting called, and remove several # type: ignore.
-        if not hasattr(self, "soakdb3_dataface_client"):
-            self.soakdb3_dataface_client = None
-
         if self.soakdb3_dataface_client is not None:
             return
 
@@ -220,17 +777,20 @@ class DirectSoakdb3CrystalWells(DirectBase):
             soakdb3_specification
         )
 
+        # The whole specification, since it might name a service or a database.
+        self.__soakdb3_key = json.dumps(soakdb3_specification, sort_keys=True)
+
     # ----------------------------------------------------------------------------------------
-    def __plate_well(self, plate: str, well: str) -> str:
+    def __plate_well(self, plate: str, well: str) -> Tuple[str, str]:
         """
-        Make a combined string out of the plate and well pair.
+        Make a hashable key out of the plate and well pair.
 
         Args:
             plate (str): plate name
             well (str): well name
 
         Returns:
-            str: plate/well combined
+            Tuple[str, str]: plate/well combined
         """
 
-        return f"{plate}.{well}"
+        return (plate, well)
@@ -13,6 +13,28 @@ from dls_logformatter.dls_logformatter import DlsLogformatter
 logger = logging.getLogger(__name__)
 
 
+# --------------------------------------------------------------------------------
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="also run the benchmarks, which assert on timings",
+    )
+
+
+# --------------------------------------------------------------------------------
+def pytest_collection_modifyitems(config, items):
+    # Timings depend on the machine, so benchmarks don't run unless asked for.
+    if config.getoption("--benchmark"):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason="benchmark, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 # --------------------------------------------------------------------------------
 @pytest.fixture(scope="session")
 def constants(request):
@@ -0,0 +1,64 @@
+import inspect
+import logging
+
+from xchembku_lib.datafaces.access import ACCESS_ATTRIBUTE, AccessTypes, get_access
+from xchembku_lib.datafaces.direct import Direct
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestAccess:
+    """
+    Test the read/write classification of the dataface methods.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        # Every serialized method, i.e. those called through the server, must be explicitly classified.
+        for name, function in inspect.getmembers(Direct, inspect.iscoroutinefunction):
+            if name.endswith("_serialized"):
+                assert hasattr(function, ACCESS_ATTRIBUTE), f"{name} is not classified"
+
+        # Fetches and reports are read-only.
+        for name in [
+            "fetch_crystal_plates_serialized",
+            "report_crystal_plates_serialized",
+            "fetch_crystal_wells_filenames_serialized",
+            "fetch_crystal_wells_needing_autolocation_serialized",
+            "fetch_crystal_wells_needing_droplocation_serialized",
+            "fetch_crystal_wells_filenames_columns_serialized",
+            "fetch_crystal_wells_needing_droplocation_columns_serialized",
+            "fetch_soakdb3_crystal_wells_serialized",
+            "fetch_soakdb3_crystal_well_fields_serialized",
+        ]:
+            assert get_access(getattr(Direct, name)) == AccessTypes.READ_ONLY, name
+
+        # Writes are mutating, as is query since it runs whatever sql it is given,
+        # and forgetting cached soakdb3 values since it changes the dataface's state.
+        for name in [
+            "query",
+            "execute",
+            "insert",
+            "update",
+            "upsert_crystal_plates_serialized",
+            "upsert_crystal_wells_serialized",
+            "originate_crystal_well_autolocations_serialized",
+            "upsert_crystal_well_droplocations_serialized",
+            "invalidate_soakdb3_head_rows_serialized",
+        ]:
+            assert get_access(getattr(Direct, name)) == AccessTypes.MUTATING, name
+
+        # Injections wait on soakdb3, and write only their bookkeeping at the end.
+        for name in [
+            "inject_soakdb3_crystal_wells_serialized",
+            "inject_soakdb3_crystal_wells_for_visits_serialized",
+        ]:
+            assert get_access(getattr(Direct, name)) == AccessTypes.REMOTE, name
+
+        # Methods which are not marked are presumed mutating.
+        assert get_access(Direct.establish_database_connection) == AccessTypes.MUTATING
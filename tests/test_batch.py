@@ -0,0 +1,275 @@
+import asyncio
+import logging
+
+import pytest
+
+# Base class for the tester.
+from tests.base import Base
+
+# Types which the CrystalPlateObjects factory can use to build an instance.
+from xchembku_api.crystal_plate_objects.constants import (
+    ThingTypes as CrystalPlateThingTypes,
+)
+
+# Dataface protocolj things.
+from xchembku_api.datafaces.constants import Commands, Keywords
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+from xchembku_api.models.crystal_plate_filter_model import CrystalPlateFilterModel
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestBatchServiceSqlite:
+    """
+    Test batches of calls through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        BatchTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestBatchServiceMysql:
+    """
+    Test batches of calls through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_mysql.yaml"
+        BatchTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class BatchTester(Base):
+    """
+    Class to test sending several calls to the dataface in one request.
+
+    Batches are a feature of the network client, so there is no direct version of this test.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Make the server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the xchembku server context which includes the direct or network-addressable service.
+        async with xchembku_server_context:
+            # Start the matching xchembku client context.
+            async with xchembku_client_context:
+                await self.__run_the_test(constants, output_directory)
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, constants, output_directory):
+        """ """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        # Upsert a plate and its wells, then fetch them back, all in one transaction.
+        crystal_plate_model = self.__make_plate(1, "xyz1")
+        crystal_well_models = self.__make_wells(crystal_plate_model, 4)
+        async with dataface.batch(as_transaction=True) as batch:
+            batch.upsert_crystal_plates([crystal_plate_model])
+            upserted_wells = batch.upsert_crystal_wells(crystal_well_models)
+            fetched_plates = batch.fetch_crystal_plates(
+                CrystalPlateFilterModel(barcode="xyz1")
+            )
+            fetched_wells = batch.fetch_crystal_wells_filenames()
+
+        # Each call gives the same result as it would have on its own.
+        assert upserted_wells.result()["inserted_count"] == 4
+        assert len(fetched_plates.result()) == 1
+        assert fetched_plates.result()[0].uuid == crystal_plate_model.uuid
+        assert [m.filename for m in fetched_wells.result()] == [
+            m.filename for m in crystal_well_models
+        ]
+
+        # An empty batch sends nothing.
+        async with dataface.batch():
+            pass
+
+        # A failure in a transaction rolls back the calls before it.
+        crystal_plate_model = self.__make_plate(2, "xyz2")
+        with pytest.raises(RuntimeError):
+            async with dataface.batch(as_transaction=True) as batch:
+                upserted_plates = batch.upsert_crystal_plates([crystal_plate_model])
+                batch.query("SELECT * FROM no_such_table")
+        with pytest.raises(RuntimeError):
+            upserted_plates.result()
+        models = await dataface.fetch_crystal_plates(
+            CrystalPlateFilterModel(barcode="xyz2")
+        )
+        assert len(models) == 0
+
+        # Without a transaction, the calls before the failure are kept.
+        with pytest.raises(RuntimeError):
+            async with dataface.batch() as batch:
+                batch.upsert_crystal_plates([crystal_plate_model])
+                batch.query("SELECT * FROM no_such_table")
+        models = await dataface.fetch_crystal_plates(
+            CrystalPlateFilterModel(barcode="xyz2")
+        )
+        assert len(models) == 1
+
+        # A call sent without asking for a transaction leaves none of its writes behind when it fails,
+        # not even once a later call has committed.
+        record = {
+            "uuid": "plate-4",
+            "formulatrix__plate__id": 4,
+            "barcode": "xyz4",
+            "visit": "cm00001-1",
+            "thing_type": CrystalPlateThingTypes.SWISS3,
+        }
+        with pytest.raises(Exception):
+            await dataface.send_protocolj_batch(
+                [
+                    {
+                        "function": "insert",
+                        "args": ["crystal_plates", [record, record]],
+                        "kwargs": {},
+                    }
+                ]
+            )
+        await dataface.upsert_crystal_plates([self.__make_plate(5, "xyz5")])
+        records = await dataface.query(
+            "SELECT uuid FROM crystal_plates WHERE barcode = 'xyz4'"
+        )
+        assert len(records) == 0
+
+        # Private dataface methods can't be called from a request, alone or in a batch.
+        call = {
+            "function": "_refresh_crystal_plate_counters_for_plates",
+            "args": [[crystal_plate_model.uuid]],
+            "kwargs": {},
+        }
+        with pytest.raises(RuntimeError, match="cannot be called from a request"):
+            await dataface.client_protocolj(
+                {Keywords.COMMAND: Commands.EXECUTE, Keywords.PAYLOAD: call}
+            )
+        with pytest.raises(RuntimeError, match="cannot be called from a request"):
+            await dataface.send_protocolj_batch([call], as_transaction=True)
+
+        # Nothing is sent when the block itself fails.
+        crystal_plate_model = self.__make_plate(3, "xyz3")
+        with pytest.raises(ValueError):
+            async with dataface.batch() as batch:
+                batch.upsert_crystal_plates([crystal_plate_model])
+                raise ValueError("block failed")
+        models = await dataface.fetch_crystal_plates(
+            CrystalPlateFilterModel(barcode="xyz3")
+        )
+        assert len(models) == 0
+
+        # A batch can't be added to once sent.
+        with pytest.raises(RuntimeError):
+            batch.fetch_crystal_wells_filenames()
+
+        # Only methods which finish with a single request can be batched.
+        async with dataface.batch() as batch:
+            with pytest.raises(RuntimeError):
+                batch.iterate_crystal_well_changes()
+
+        # A call which waits on something else before it sends is still in the batch.
+        async def query_later(sql):
+            await asyncio.sleep(0.1)
+            return await dataface.query(sql)
+
+        # A call which sends twice fails rather than waiting forever.
+        async def query_twice(sql):
+            await dataface.query(sql)
+            return await dataface.query(sql)
+
+        async def query_twice_at_once(sql):
+            return await asyncio.gather(dataface.query(sql), dataface.query(sql))
+
+        dataface.query_later = query_later
+        dataface.query_twice = query_twice
+        dataface.query_twice_at_once = query_twice_at_once
+        try:
+            async with dataface.batch() as batch:
+                queried = batch.query_later("SELECT uuid FROM crystal_plates")
+            assert len(queried.result()) == 3
+
+            with pytest.raises(RuntimeError, match="after the batch has been sent"):
+                async with dataface.batch() as batch:
+                    batch.query_twice("SELECT uuid FROM crystal_plates")
+
+            with pytest.raises(RuntimeError, match="cannot send twice"):
+                async with dataface.batch() as batch:
+                    batch.query_twice_at_once("SELECT uuid FROM crystal_plates")
+        finally:
+            del dataface.query_later
+            del dataface.query_twice
+            del dataface.query_twice_at_once
+
+    # ----------------------------------------------------------------------------------------
+
+    def __make_plate(self, formulatrix__plate__id: int, barcode: str):
+        """ """
+
+        return CrystalPlateModel(
+            formulatrix__plate__id=formulatrix__plate__id,
+            barcode=barcode,
+            visit="cm00001-1",
+            thing_type=CrystalPlateThingTypes.SWISS3,
+        )
+
+    # ----------------------------------------------------------------------------------------
+
+    def __make_wells(self, crystal_plate_model: CrystalPlateModel, count: int):
+        """ """
+
+        return [
+            CrystalWellModel(
+                position="%02d" % (i),
+                crystal_plate_uuid=crystal_plate_model.uuid,
+                filename="%02d.jpg" % (i),
+            )
+            for i in range(count)
+        ]
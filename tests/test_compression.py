@@ -0,0 +1,189 @@
+import gzip
+import json
+import logging
+
+import aiohttp
+
+# Base class for the tester.
+from tests.base import Base
+
+# Types which the CrystalPlateObjects factory can use to build an instance.
+from xchembku_api.crystal_plate_objects.constants import (
+    ThingTypes as CrystalPlateThingTypes,
+)
+
+# Dataface protocolj things.
+from xchembku_api.datafaces.constants import Commands, Keywords
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+from xchembku_api.models.crystal_plate_filter_model import CrystalPlateFilterModel
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCompressionServiceSqlite:
+    """
+    Test compressed responses through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        CompressionTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCompressionServiceMysql:
+    """
+    Test compressed responses through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_mysql.yaml"
+        CompressionTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class CompressionTester(Base):
+    """
+    Class to test the compression of large responses.
+
+    Compression is done by the server, so there is no direct version of this test.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Responses are compressed above the default threshold.
+        aiohttp_specification = xchembku_dataface_specification["type_specific_tbd"][
+            "aiohttp_specification"
+        ]
+        self.__protocolj_url = f"{aiohttp_specification['client']}/protocolj"
+
+        # Make the server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the xchembku server context which includes the direct or network-addressable service.
+        async with xchembku_server_context:
+            # Start the matching xchembku client context.
+            async with xchembku_client_context:
+                await self.__run_the_test(constants, output_directory)
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, constants, output_directory):
+        """ """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        crystal_plate_models = [
+            CrystalPlateModel(
+                formulatrix__plate__id=i,
+                barcode=f"xyz{i}",
+                visit="cm00001-1",
+                thing_type=CrystalPlateThingTypes.SWISS3,
+            )
+            for i in range(30)
+        ]
+        await dataface.upsert_crystal_plates(crystal_plate_models)
+
+        # The client decompresses without the caller knowing.
+        models = await dataface.fetch_crystal_plates(CrystalPlateFilterModel())
+        assert [m.uuid for m in models] == [m.uuid for m in crystal_plate_models]
+
+        # Large response is compressed when the client accepts it.
+        content_encoding, records = await self.__fetch_raw(
+            CrystalPlateFilterModel(), "gzip"
+        )
+        assert content_encoding == "gzip"
+        assert len(records) == 30
+
+        # Not when the client doesn't accept it.
+        content_encoding, records = await self.__fetch_raw(
+            CrystalPlateFilterModel(), "identity"
+        )
+        assert content_encoding is None
+        assert len(records) == 30
+
+        # Small response is not compressed.
+        content_encoding, records = await self.__fetch_raw(
+            CrystalPlateFilterModel(barcode="xyz1"), "gzip"
+        )
+        assert content_encoding is None
+        assert len(records) == 1
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __fetch_raw(self, filter: CrystalPlateFilterModel, accept_encoding: str):
+        """
+        Fetch plates as a client would which decompresses for itself.
+        """
+
+        request = {
+            Keywords.COMMAND: Commands.EXECUTE,
+            Keywords.PAYLOAD: {
+                "function": "fetch_crystal_plates_serialized",
+                "args": [],
+                "kwargs": {"filter": filter.dict()},
+            },
+        }
+
+        async with aiohttp.ClientSession(auto_decompress=False) as session:
+            async with session.post(
+                self.__protocolj_url,
+                json=request,
+                headers={"Accept-Encoding": accept_encoding},
+            ) as response:
+                assert response.status == 200
+                content_encoding = response.headers.get("Content-Encoding")
+                body = await response.read()
+
+        if content_encoding == "gzip":
+            compressed_length = len(body)
+            body = gzip.decompress(body)
+            logger.info(
+                f"[COMPRESSION] gzip {compressed_length} bytes from {len(body)} bytes"
+            )
+
+        return content_encoding, json.loads(body)
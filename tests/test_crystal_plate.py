@@ -283,6 +283,30 @@ class CrystalPlateTester(Base):
         assert x_microns == int(0.5 + 2.837 * 50)
         assert y_microns == int(0.5 + 2.837 * -50)
 
+        # Converting a batch gives the same as converting each well.
+        targets_x = [150, 90, None, 100.4, 37]
+        targets_y = [51, 111, 50, 99.6, None]
+        centroids_x = [100, 100, 100, 100, 100]
+        centroids_y = [101, 101, 101, 101, 101]
+        xs, ys = crystal_plate_model.compute_drop_locations_microns(
+            targets_x, targets_y, centroids_x, centroids_y
+        )
+        for i in range(len(targets_x)):
+            assert (xs[i], ys[i]) == crystal_plate_model.compute_drop_location_microns(
+                {
+                    "confirmed_target_x": targets_x[i],
+                    "confirmed_target_y": targets_y[i],
+                    "well_centroid_x": centroids_x[i],
+                    "well_centroid_y": centroids_y[i],
+                }
+            ), f"well {i}"
+        assert xs[2] is None and ys[4] is None
+
+        # The cached plate object is shared between callers.
+        assert CrystalPlateObjects().build_cached_object(
+            upserted_models[0].thing_type
+        ) is CrystalPlateObjects().build_cached_object(upserted_models[0].thing_type)
+
     # ----------------------------------------------------------------------------------------
 
     async def __check(
@@ -1,6 +1,8 @@
 import logging
 from typing import List, Optional
 
+import pytest
+
 # Base class for the tester.
 from tests.base import Base
 
@@ -14,7 +16,10 @@ from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientCont
 
 # Object managing datafaces.
 from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
-from xchembku_api.models.crystal_plate_filter_model import CrystalPlateFilterModel
+from xchembku_api.models.crystal_plate_filter_model import (
+    CrystalPlateFilterModel,
+    CrystalPlateReportSourceEnum,
+)
 from xchembku_api.models.crystal_plate_model import CrystalPlateModel
 from xchembku_api.models.crystal_plate_report_model import CrystalPlateReportModel
 from xchembku_api.models.crystal_well_autolocation_model import (
@@ -240,6 +245,79 @@ class CrystalPlateReportTester(Base):
         assert len(crystal_plate_report_models) == 1
         assert crystal_plate_report_models[0].formulatrix__plate__id == 2
 
+        # ----------------------------------------------------------------------
+        # The live report counts the same as the counters table.
+        for filter in [
+            CrystalPlateFilterModel(direction=-1),
+            CrystalPlateFilterModel(visit=self.__visit),
+            CrystalPlateFilterModel(barcode="xyzw"),
+            CrystalPlateFilterModel(needing_intervention=True),
+            CrystalPlateFilterModel(needing_intervention=False),
+        ]:
+            counters_models = await dataface.report_crystal_plates(filter)
+            filter.report_source = CrystalPlateReportSourceEnum.LIVE
+            live_models = await dataface.report_crystal_plates(filter)
+            assert [m.dict() for m in live_models] == [
+                m.dict() for m in counters_models
+            ], str(filter)
+
+            # The direct dataface serializes the same records without making the models.
+            if hasattr(dataface, "report_crystal_plates_serialized"):
+                records = await dataface.report_crystal_plates_serialized(filter.dict())
+                assert records == [m.dict() for m in live_models], str(filter)
+
+        if hasattr(dataface, "fetch_crystal_plates_serialized"):
+            filter = CrystalPlateFilterModel(direction=-1)
+            records = await dataface.fetch_crystal_plates_serialized(filter.dict())
+            models = await dataface.fetch_crystal_plates(filter)
+            assert records == [m.dict() for m in models]
+
+        # ----------------------------------------------------------------------
+        # The same plates and reports come as compact rows, which make the same models.
+        filter = CrystalPlateFilterModel(direction=-1)
+        rows = await dataface.report_crystal_plates_rows(filter)
+        models = await dataface.report_crystal_plates(filter)
+        assert [row.to_model() for row in rows] == models
+        assert rows[0].collected_count == 11
+        rows = await dataface.fetch_crystal_plates_rows(filter)
+        models = await dataface.fetch_crystal_plates(filter)
+        assert [row.to_model() for row in rows] == models
+
+        # Compact rows can't be changed.
+        with pytest.raises(AttributeError):
+            rows[0].barcode = "abcd"
+
+        # ----------------------------------------------------------------------
+        # Lose the counters, then rebuild them from the wells.
+        await dataface.execute("DELETE FROM crystal_plate_counters")
+        crystal_plate_report_models = await dataface.report_crystal_plates(
+            CrystalPlateFilterModel(direction=-1)
+        )
+        assert crystal_plate_report_models[0].collected_count == 0
+
+        # The live report does not depend on the counters table.
+        crystal_plate_report_models = await dataface.report_crystal_plates(
+            CrystalPlateFilterModel(
+                barcode="xyzw", report_source=CrystalPlateReportSourceEnum.LIVE
+            )
+        )
+        assert len(crystal_plate_report_models) == 1
+        assert crystal_plate_report_models[0].collected_count == 11
+        assert crystal_plate_report_models[0].undecided_count == 4
+
+        result = await dataface.rebuild_crystal_plate_counters()
+        assert result["plate_count"] == 2
+
+        crystal_plate_report_models = await dataface.report_crystal_plates(
+            CrystalPlateFilterModel(direction=-1)
+        )
+        crystal_plate_report_model = crystal_plate_report_models[0]
+        assert crystal_plate_report_model.collected_count == 11
+        assert crystal_plate_report_model.chimped_count == 9
+        assert crystal_plate_report_model.undecided_crystals_count == 2
+        assert crystal_plate_report_model.decided_usable_count == 3
+        assert crystal_plate_report_model.exported_count == 1
+
     # ----------------------------------------------------------------------------------------
 
     async def __inject(
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+
+# Base class for the tester.
+from tests.base import Base
+
+# Types which the CrystalPlateObjects factory can use to build an instance.
+from xchembku_api.crystal_plate_objects.constants import (
+    ThingTypes as CrystalPlateThingTypes,
+)
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+from xchembku_api.models.crystal_well_autolocation_model import (
+    CrystalWellAutolocationModel,
+)
+from xchembku_api.models.crystal_well_droplocation_model import (
+    CrystalWellDroplocationModel,
+)
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellDirectSqlite:
+    """
+    Test dataface interface by direct call.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_sqlite.yaml"
+        CrystalWellTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellDirectMysql:
+    """
+    Test dataface interface by direct call.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_mysql.yaml"
+        CrystalWellTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellServiceSqlite:
+    """
+    Test dataface interface through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        CrystalWellTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellServiceMysql:
+    """
+    Test dataface interface through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_mysql.yaml"
+        CrystalWellTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellTester(Base):
+    """
+    Class to test the dataface crystal well upsert.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Make the server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the xchembku server context which includes the direct or network-addressable service.
+        async with xchembku_server_context:
+            # Start the matching xchembku client context.
+            async with xchembku_client_context:
+                await self.__run_the_test(constants, output_directory)
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, constants, output_directory):
+        """ """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        # Make a plate for the wells we will create.
+        crystal_plate_model = CrystalPlateModel(
+            formulatrix__plate__id=1,
+            barcode="xyzw",
+            visit="cm00001-1",
+            thing_type=CrystalPlateThingTypes.SWISS3,
+        )
+        await dataface.upsert_crystal_plates([crystal_plate_model])
+
+        # A full plate's worth of wells in one batch.
+        well_count = 288
+        models = []
+        for i in range(well_count):
+            models.append(
+                CrystalWellModel(
+                    position=f"{i:03d}",
+                    crystal_plate_uuid=crystal_plate_model.uuid,
+                    filename=f"{i:03d}.jpg",
+                    width=100,
+                )
+            )
+
+        # The same filename appearing again in the batch is an update, not an insert.
+        models.append(
+            CrystalWellModel(
+                position="000",
+                crystal_plate_uuid=crystal_plate_model.uuid,
+                filename="000.jpg",
+                width=200,
+            )
+        )
+
+        result = await dataface.upsert_crystal_wells(models)
+        assert result["inserted_count"] == well_count
+        assert result["updated_count"] == 1
+
+        crystal_well_models = await dataface.fetch_crystal_wells_filenames()
+        assert len(crystal_well_models) == well_count
+
+        # The same wells come as columns, one list per field.
+        columns = await dataface.fetch_crystal_wells_filenames_columns()
+        assert list(columns.keys()) == list(CrystalWellModel.__fields__.keys())
+        assert columns["filename"] == [m.filename for m in crystal_well_models]
+        assert columns["uuid"] == [m.uuid for m in crystal_well_models]
+
+        # Upsert the whole plate again with new widths and one new well.
+        for model in models:
+            model.width = 300
+        models.append(
+            CrystalWellModel(
+                position="999",
+                crystal_plate_uuid=crystal_plate_model.uuid,
+                filename="999.jpg",
+            )
+        )
+        result = await dataface.upsert_crystal_wells(models)
+        assert result["inserted_count"] == 1
+        assert result["updated_count"] == well_count + 1
+
+        records = await dataface.query(
+            "SELECT filename, width FROM crystal_wells ORDER BY filename"
+        )
+        assert len(records) == well_count + 1
+        assert records[0]["filename"] == "000.jpg"
+        assert records[0]["width"] == 300
+        assert records[-1]["filename"] == "999.jpg"
+        assert records[-1]["width"] is None
+
+        # Empty batch is harmless.
+        result = await dataface.upsert_crystal_wells([])
+        assert result["inserted_count"] == 0
+        assert result["updated_count"] == 0
+
+        # Concurrent upserts of the same wells cannot make duplicate records.
+        await asyncio.gather(
+            dataface.upsert_crystal_wells(models),
+            dataface.upsert_crystal_wells(models),
+        )
+        crystal_well_models = await dataface.fetch_crystal_wells_filenames()
+        assert len(crystal_well_models) == well_count + 1
+
+        # Concurrent reads each get the full set of wells.
+        results = await asyncio.gather(
+            *[dataface.fetch_crystal_wells_filenames() for _ in range(10)]
+        )
+        for crystal_well_models in results:
+            assert len(crystal_well_models) == well_count + 1
+
+        # Autolocate the whole plate.
+        well_models = models[0:well_count]
+        await dataface.originate_crystal_well_autolocations(
+            [
+                CrystalWellAutolocationModel(
+                    crystal_well_uuid=model.uuid,
+                    number_of_crystals=1,
+                    well_centroid_x=100,
+                    well_centroid_y=100,
+                )
+                for model in well_models
+            ]
+        )
+
+        # Droplocations for the whole plate in one batch get their microns computed.
+        droplocation_models = [
+            CrystalWellDroplocationModel(
+                crystal_well_uuid=model.uuid,
+                confirmed_target_x=100 + i % 10,
+                confirmed_target_y=90,
+            )
+            for i, model in enumerate(well_models)
+        ]
+        result = await dataface.upsert_crystal_well_droplocations(droplocation_models)
+        assert result["inserted_count"] == well_count
+        assert result["updated_count"] == 0
+        await self.__check_microns(dataface, well_models, 0, -27)
+
+        # Updating only the decision leaves the microns alone.
+        for model in droplocation_models:
+            model.is_usable = True
+            model.confirmed_target_x = 0
+        result = await dataface.upsert_crystal_well_droplocations(
+            droplocation_models, only_fields=["is_usable"]
+        )
+        assert result["inserted_count"] == 0
+        assert result["updated_count"] == well_count
+        await self.__check_microns(dataface, well_models, 0, -27)
+
+        # Updating the targets recomputes the microns.
+        for model in droplocation_models:
+            model.confirmed_target_x = 110
+        result = await dataface.upsert_crystal_well_droplocations(droplocation_models)
+        assert result["updated_count"] == well_count
+        await self.__check_microns(dataface, well_models, 28, -27)
+
+        records = await dataface.query(
+            "SELECT COUNT(*) AS count FROM crystal_well_droplocations WHERE is_usable = True"
+        )
+        assert records[0]["count"] == well_count
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __check_microns(self, dataface, well_models, first_x, first_y):
+        """ """
+
+        records = await dataface.query(
+            "SELECT crystal_wells.position, confirmed_microns_x, confirmed_microns_y"
+            " FROM crystal_well_droplocations"
+            " JOIN crystal_wells ON crystal_wells.uuid = crystal_well_droplocations.crystal_well_uuid"
+            " ORDER BY crystal_wells.position"
+        )
+        assert len(records) == len(well_models)
+        assert records[0]["confirmed_microns_x"] == first_x
+        assert records[0]["confirmed_microns_y"] == first_y
@@ -210,3 +210,39 @@ class CrystalWellAutolocationTester(Base):
 
         # Now there are no more needing autolocation.
         assert len(crystal_well_models) == 0
+
+        # Upserting a well again does not put it back in the queue.
+        await dataface.upsert_crystal_wells([crystal_well_model1])
+        crystal_well_models = await dataface.fetch_crystal_wells_needing_autolocation(
+            limit=100
+        )
+        assert len(crystal_well_models) == 0
+
+        records = await dataface.query(
+            "SELECT * FROM crystal_well_pending_autolocations"
+        )
+        assert len(records) == 0
+
+        # Autolocations for more wells than fit in one statement take them all off the queue.
+        crystal_well_models = [
+            CrystalWellModel(
+                position="%04d" % (i),
+                crystal_plate_uuid=crystal_plate_model.uuid,
+                filename="%04d.jpg" % (i),
+            )
+            for i in range(1200)
+        ]
+        await dataface.upsert_crystal_wells(crystal_well_models)
+        await dataface.originate_crystal_well_autolocations(
+            [
+                CrystalWellAutolocationModel(
+                    crystal_well_uuid=model.uuid,
+                    number_of_crystals=1,
+                )
+                for model in crystal_well_models
+            ]
+        )
+        records = await dataface.query(
+            "SELECT * FROM crystal_well_pending_autolocations"
+        )
+        assert len(records) == 0
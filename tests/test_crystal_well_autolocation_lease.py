@@ -0,0 +1,269 @@
+import asyncio
+import logging
+
+# Base class for the tester.
+from tests.base import Base
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+from xchembku_api.models.crystal_well_autolocation_model import (
+    CrystalWellAutolocationModel,
+)
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellAutolocationLeaseDirectSqlite:
+    """
+    Test dataface interface by direct call.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_sqlite.yaml"
+        CrystalWellAutolocationLeaseTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellAutolocationLeaseDirectMysql:
+    """
+    Test dataface interface by direct call.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_mysql.yaml"
+        CrystalWellAutolocationLeaseTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellAutolocationLeaseServiceSqlite:
+    """
+    Test dataface interface through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        CrystalWellAutolocationLeaseTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellAutolocationLeaseServiceMysql:
+    """
+    Test dataface interface through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_mysql.yaml"
+        CrystalWellAutolocationLeaseTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellAutolocationLeaseTester(Base):
+    """
+    Class to test the dataface autolocation lease endpoints.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Make the server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the xchembku server context which includes the direct or network-addressable service.
+        async with xchembku_server_context:
+            # Start the matching xchembku client context.
+            async with xchembku_client_context:
+                await self.__run_the_test(constants, output_directory)
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, constants, output_directory):
+        """ """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        # Make a plate for the wells we will create.
+        crystal_plate_model = CrystalPlateModel(
+            formulatrix__plate__id=1,
+            barcode="xyzw",
+            visit="cm00001-1",
+        )
+        await dataface.upsert_crystal_plates([crystal_plate_model])
+
+        # Write some well records.
+        crystal_well_models = []
+        for i in range(10):
+            crystal_well_models.append(
+                CrystalWellModel(
+                    position="%02dA_1" % (i),
+                    crystal_plate_uuid=crystal_plate_model.uuid,
+                    filename="%02d.jpg" % (i),
+                )
+            )
+        await dataface.upsert_crystal_wells(crystal_well_models)
+        all_uuids = set([m.uuid for m in crystal_well_models])
+
+        # Two workers claim disjoint batches.
+        claimed_a = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_a", limit=3
+        )
+        claimed_b = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_b", limit=3
+        )
+        uuids_a = set([m.uuid for m in claimed_a])
+        uuids_b = set([m.uuid for m in claimed_b])
+        assert len(uuids_a) == 3
+        assert len(uuids_b) == 3
+        assert len(uuids_a & uuids_b) == 0
+
+        # Workers claiming at the same time also get disjoint batches.
+        claimed = await asyncio.gather(
+            dataface.claim_crystal_wells_needing_autolocation("worker_c", limit=2),
+            dataface.claim_crystal_wells_needing_autolocation("worker_d", limit=2),
+        )
+        uuids_c = set([m.uuid for m in claimed[0]])
+        uuids_d = set([m.uuid for m in claimed[1]])
+        assert len(uuids_c) + len(uuids_d) == 4
+        assert len(uuids_c | uuids_d | uuids_a | uuids_b) == 10
+
+        # Everything is claimed now.
+        claimed = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_e", limit=10
+        )
+        assert len(claimed) == 0
+
+        # Claims don't change what needs autolocation.
+        needing = await dataface.fetch_crystal_wells_needing_autolocation(limit=100)
+        assert set([m.uuid for m in needing]) == all_uuids
+
+        # Only the claimant can renew its leases.
+        result = await dataface.renew_crystal_well_autolocation_leases(
+            "worker_a", list(uuids_a)
+        )
+        assert result["count"] == 3
+        result = await dataface.renew_crystal_well_autolocation_leases(
+            "worker_b", list(uuids_a)
+        )
+        assert result["count"] == 0
+
+        # Long lists of wells are renewed and released in chunks.
+        unknown_uuids = ["unknown-%04d" % (i) for i in range(1200)]
+        result = await dataface.renew_crystal_well_autolocation_leases(
+            "worker_a", unknown_uuids + list(uuids_a) + unknown_uuids
+        )
+        assert result["count"] == 3
+        await dataface.release_crystal_well_autolocation_leases(
+            "worker_a", unknown_uuids
+        )
+        result = await dataface.renew_crystal_well_autolocation_leases(
+            "worker_a", list(uuids_a)
+        )
+        assert result["count"] == 3
+
+        # Only the claimant can release its leases.
+        await dataface.release_crystal_well_autolocation_leases(
+            "worker_b", list(uuids_a)
+        )
+        claimed = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_e", limit=10
+        )
+        assert len(claimed) == 0
+
+        # Released wells can be claimed again straight away.
+        await dataface.release_crystal_well_autolocation_leases(
+            "worker_a", list(uuids_a)
+        )
+        claimed = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_e", limit=10
+        )
+        assert set([m.uuid for m in claimed]) == uuids_a
+
+        # Wells whose lease has expired can be claimed again.
+        await dataface.release_crystal_well_autolocation_leases(
+            "worker_e", list(uuids_a)
+        )
+        claimed = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_e", limit=10, lease_seconds=-1.0
+        )
+        assert set([m.uuid for m in claimed]) == uuids_a
+        claimed = await dataface.claim_crystal_wells_needing_autolocation(
+            "worker_f", limit=10
+        )
+        assert set([m.uuid for m in claimed]) == uuids_a
+
+        # Originating the autolocations finishes with the wells and their leases.
+        await dataface.originate_crystal_well_autolocations(
+            [
+                CrystalWellAutolocationModel(
+                    crystal_well_uuid=uuid,
+                    number_of_crystals=1,
+                )
+                for uuid in uuids_b
+            ]
+        )
+        needing = await dataface.fetch_crystal_wells_needing_autolocation(limit=100)
+        assert set([m.uuid for m in needing]) == all_uuids - uuids_b
+
+        records = await dataface.query(
+            "SELECT crystal_well_uuid FROM crystal_well_autolocation_leases"
+        )
+        assert set([r["crystal_well_uuid"] for r in records]) == all_uuids - uuids_b
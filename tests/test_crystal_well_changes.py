@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+# Base class for the tester.
+from tests.base import Base
+
+# Types which the CrystalPlateObjects factory can use to build an instance.
+from xchembku_api.crystal_plate_objects.constants import (
+    ThingTypes as CrystalPlateThingTypes,
+)
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+from xchembku_api.models.crystal_well_autolocation_model import (
+    CrystalWellAutolocationModel,
+)
+from xchembku_api.models.crystal_well_droplocation_model import (
+    CrystalWellDroplocationModel,
+)
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellChangesDirectSqlite:
+    """
+    Test dataface interface by direct call.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_sqlite.yaml"
+        CrystalWellChangesTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellChangesDirectMysql:
+    """
+    Test dataface interface by direct call.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_mysql.yaml"
+        CrystalWellChangesTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellChangesServiceSqlite:
+    """
+    Test dataface interface through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        CrystalWellChangesTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class TestCrystalWellChangesServiceMysql:
+    """
+    Test dataface interface through network interface.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_mysql.yaml"
+        CrystalWellChangesTester().main(constants, configuration_file, output_directory)
+
+
+# ----------------------------------------------------------------------------------------
+class CrystalWellChangesTester(Base):
+    """
+    Class to test the dataface change feed.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Make the server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the xchembku server context which includes the direct or network-addressable service.
+        async with xchembku_server_context:
+            # Start the matching xchembku client context.
+            async with xchembku_client_context:
+                await self.__run_the_test(constants, output_directory)
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, constants, output_directory):
+        """ """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        # Make a plate for the wells we will create.
+        crystal_plate_model = CrystalPlateModel(
+            formulatrix__plate__id=1,
+            barcode="xyzw",
+            visit="cm00001-1",
+            thing_type=CrystalPlateThingTypes.SWISS3,
+        )
+        await dataface.upsert_crystal_plates([crystal_plate_model])
+
+        # Write some well records.
+        crystal_well_models = []
+        for i in range(3):
+            crystal_well_models.append(
+                CrystalWellModel(
+                    position="%02dA_1" % (i),
+                    crystal_plate_uuid=crystal_plate_model.uuid,
+                    crystal_plate_thing_type=crystal_plate_model.thing_type,
+                    filename="%02d.jpg" % (i),
+                )
+            )
+        await dataface.upsert_crystal_wells(crystal_well_models)
+
+        # Everything so far comes from the beginning.
+        changes = await dataface.fetch_crystal_well_changes()
+        assert len(changes.crystal_wells) == 3
+        assert len(changes.crystal_well_autolocations) == 0
+        cursor = changes.cursor
+
+        # Nothing after the cursor.
+        changes = await dataface.fetch_crystal_well_changes(cursor)
+        assert changes.is_empty()
+
+        # Changes are paged by the limit, which ties in created_on don't upset.
+        changes = await dataface.fetch_crystal_well_changes(limit=2)
+        assert len(changes.crystal_wells) == 2
+        changes = await dataface.fetch_crystal_well_changes(changes.cursor, limit=2)
+        assert len(changes.crystal_wells) == 1
+        changes = await dataface.fetch_crystal_well_changes(changes.cursor, limit=2)
+        assert changes.is_empty()
+
+        # Waiting with nothing arriving gives nothing after the timeout.
+        start_time = time.time()
+        changes = await dataface.wait_for_crystal_well_changes(
+            cursor, timeout_seconds=0.5
+        )
+        assert changes.is_empty()
+        assert time.time() - start_time >= 0.5
+
+        # Iterate over the changes while they are being made.
+        async def consume():
+            autolocations = []
+            droplocations = []
+            async for changes in dataface.iterate_crystal_well_changes(
+                cursor, timeout_seconds=5.0
+            ):
+                assert len(changes.crystal_wells) == 0
+                autolocations.extend(changes.crystal_well_autolocations)
+                droplocations.extend(changes.crystal_well_droplocations)
+                if len(autolocations) > 0 and len(droplocations) > 0:
+                    return autolocations, droplocations
+
+        async def produce():
+            await asyncio.sleep(0.2)
+            await dataface.originate_crystal_well_autolocations(
+                [
+                    CrystalWellAutolocationModel(
+                        crystal_well_uuid=crystal_well_models[0].uuid,
+                        number_of_crystals=1,
+                        well_centroid_x=100,
+                        well_centroid_y=100,
+                    )
+                ]
+            )
+            await dataface.upsert_crystal_well_droplocations(
+                [
+                    CrystalWellDroplocationModel(
+                        crystal_well_uuid=crystal_well_models[0].uuid,
+                        confirmed_target_x=150,
+                        confirmed_target_y=50,
+                        is_usable=True,
+                    )
+                ]
+            )
+
+        (autolocations, droplocations), _ = await asyncio.wait_for(
+            asyncio.gather(consume(), produce()), 10.0
+        )
+        assert len(autolocations) == 1
+        assert autolocations[0].crystal_well_uuid == crystal_well_models[0].uuid
+        assert len(droplocations) == 1
+        assert droplocations[0].crystal_well_uuid == crystal_well_models[0].uuid
+
+        # Catch up to the end of the feed.
+        changes = await dataface.fetch_crystal_well_changes(cursor)
+        assert len(changes.crystal_well_autolocations) == 1
+        assert len(changes.crystal_well_droplocations) == 1
+        cursor = changes.cursor
+
+        # A well inserted with an earlier created_on than those already seen is not missed.
+        late_model = CrystalWellModel(
+            position="99A_1",
+            crystal_plate_uuid=crystal_plate_model.uuid,
+            crystal_plate_thing_type=crystal_plate_model.thing_type,
+            filename="99.jpg",
+            created_on="2000-01-01 00:00:00.000000",
+        )
+        await dataface.upsert_crystal_wells([late_model])
+        changes = await dataface.fetch_crystal_well_changes(cursor)
+        assert [m.uuid for m in changes.crystal_wells] == [late_model.uuid]
+        cursor = changes.cursor
+
+        # The feed is insert-only, so updates are not in it.
+        await dataface.upsert_crystal_well_droplocations(
+            [
+                CrystalWellDroplocationModel(
+                    crystal_well_uuid=crystal_well_models[0].uuid,
+                    confirmed_target_x=150,
+                    confirmed_target_y=50,
+                    is_usable=False,
+                )
+            ]
+        )
+        changes = await dataface.fetch_crystal_well_changes(cursor)
+        assert changes.is_empty()
+
+        # The limit is over all the tables together.
+        changes = await dataface.fetch_crystal_well_changes(limit=4)
+        assert len(changes.crystal_wells) == 3
+        assert len(changes.crystal_well_autolocations) == 1
+        assert len(changes.crystal_well_droplocations) == 0
+
+        # A cursor which the feed did not give is refused.
+        with pytest.raises(RuntimeError):
+            await dataface.fetch_crystal_well_changes('{"crystal_wells": []}')
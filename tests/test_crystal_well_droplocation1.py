@@ -23,6 +23,9 @@ from xchembku_api.models.crystal_well_droplocation_model import (
 )
 from xchembku_api.models.crystal_well_filter_model import CrystalWellFilterModel
 from xchembku_api.models.crystal_well_model import CrystalWellModel
+from xchembku_api.models.crystal_well_needing_droplocation_model import (
+    CrystalWellNeedingDroplocationModel,
+)
 from xchembku_lib.crystal_plate_objects.crystal_plate_objects import CrystalPlateObjects
 
 # Server context creator.
@@ -435,6 +438,30 @@ class CrystalWellDroplocation1Tester(Base):
         # Make sure we got enough.
         assert len(crystal_well_models) == expected, note
 
+        # The direct dataface serializes the same records without making the models.
+        serialized = getattr(
+            dataface, "fetch_crystal_wells_needing_droplocation_serialized", None
+        )
+        if serialized is not None:
+            records = await serialized(filter.dict())
+            assert records == [m.dict() for m in crystal_well_models], note
+
+        # The same wells come as compact rows, which make the same models.
+        rows = await dataface.fetch_crystal_wells_needing_droplocation_rows(filter)
+        assert [row.to_model() for row in rows] == crystal_well_models, note
+        assert [row.dict() for row in rows] == [
+            m.dict() for m in crystal_well_models
+        ], note
+
+        # The same wells come as columns, one list per field.
+        columns = await dataface.fetch_crystal_wells_needing_droplocation_columns(
+            filter
+        )
+        assert columns == {
+            field_name: [getattr(m, field_name) for m in crystal_well_models]
+            for field_name in CrystalWellNeedingDroplocationModel.__fields__
+        }, note
+
         if filename is not None:
             assert crystal_well_models[0].filename == filename, f"{note} filename"
 
@@ -1,8 +1,6 @@
 import logging
 from typing import List
 
-import pytest
-
 # Base class for the tester.
 from tests.base import Base
 
@@ -217,19 +215,18 @@ class CrystalWellDroplocation2Tester(Base):
             "anchored, single",
         )
 
-        with pytest.raises(RuntimeError):
-            # Does not work without a visit.
-            await self.__check(
-                dataface,
-                CrystalWellFilterModel(
-                    anchor=models[1].uuid,
-                    sortby=CrystalWellFilterSortbyEnum.NUMBER_OF_CRYSTALS,
-                    direction=-1,
-                    limit=1,
-                ),
-                [],
-                "anchored, no visit",
-            )
+        # Also works without a visit.
+        await self.__check(
+            dataface,
+            CrystalWellFilterModel(
+                anchor=models[1].uuid,
+                sortby=CrystalWellFilterSortbyEnum.NUMBER_OF_CRYSTALS,
+                direction=-1,
+                limit=1,
+            ),
+            [4],
+            "anchored, no visit",
+        )
 
         await self.__check(
             dataface,
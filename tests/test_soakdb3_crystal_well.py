@@ -1,5 +1,9 @@
+import copy
 import logging
 from pathlib import Path
+from typing import List, Tuple
+
+import pytest
 
 # Soakdb3 database.
 from soakdb3_api.databases.constants import Tablenames
@@ -30,9 +34,32 @@ from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
 # Server context creator.
 from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
 
+# Dataface used when not going through the service.
+from xchembku_lib.datafaces.direct import Direct as XchembkuDirect
+
 logger = logging.getLogger(__name__)
 
 
+# ----------------------------------------------------------------------------------------
+class RecordingSoakdb3Client:
+    """
+    Passes calls on to a soakdb3 dataface client, keeping the name and args of each.
+    """
+
+    def __init__(self, client):
+        self.__client = client
+        self.calls: List[Tuple[str, Tuple]] = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self.__client, name)
+
+        async def record(*args, **kwargs):
+            self.calls.append((name, args))
+            return await method(*args, **kwargs)
+
+        return record
+
+
 # ----------------------------------------------------------------------------------------
 class TestSoakdb3CrystalWellDirectSqlite:
     """
@@ -261,9 +288,34 @@ class Soakdb3CrystalWellTester(Base):
             )
         )
 
+        # Directly, the calls made to soakdb3 can be watched.
+        soakdb3_calls = None
+        if isinstance(xchembku_dataface, XchembkuDirect):
+            # Reading makes the dataface's soakdb3 client.
+            await xchembku_dataface.fetch_soakdb3_crystal_well_fields(visitid, ["ID"])
+            soakdb3_client = RecordingSoakdb3Client(
+                xchembku_dataface.soakdb3_dataface_client
+            )
+            xchembku_dataface.soakdb3_dataface_client = soakdb3_client
+            soakdb3_calls = soakdb3_client.calls
+
         # Write crystal well records.
         await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
 
+        # The new well is inserted as a whole row and the blank row updated with another,
+        # rather than each field being sent as its own record.
+        if soakdb3_calls is not None:
+            writes = [
+                call
+                for call in soakdb3_calls
+                if call[0] in ["insert", "update", "update_body_fields"]
+            ]
+            assert [call[0] for call in writes] == ["insert", "update"]
+            assert len(writes[0][1][2]) == 1
+            assert writes[0][1][2][0]["CrystalWell"] == "01A2"
+            assert writes[1][1][2]["CrystalWell"] == "01A1"
+            assert writes[1][1][3].startswith("ID = ")
+
         # Check the results
         queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
         assert len(queried_models) == 3
@@ -316,3 +368,260 @@ class Soakdb3CrystalWellTester(Base):
 
         # Make sure the original location is not overwritten.
         assert queried_models[0].EchoX == 100
+
+        # Injecting only wells which are already there writes nothing.
+        result = await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
+        assert result["skipped_count"] == 4
+        assert result["inserted_count"] == 0
+        assert result["updated_count"] == 0
+
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
+        assert len(queried_models) == 4
+
+        # ----------------------------------------------------------------
+        # A well added to soakdb3 by someone else is seen above the watermark.
+        await soakdb3_dataface.update_body_fields(  # type: ignore
+            visitid,
+            [
+                {"id": "-1", "field": "CrystalPlate", "value": injected_crystal_plate},
+                {"id": "-1", "field": "CrystalWell", "value": "01A4"},
+            ],
+        )
+        models.append(
+            Soakdb3CrystalWellModel(
+                LabVisit=visit,
+                CrystalPlate=injected_crystal_plate,
+                CrystalWell="01A4",
+                EchoX=400,
+                EchoY=500,
+            )
+        )
+        result = await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
+        assert result["skipped_count"] == 5
+
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
+        assert len(queried_models) == 5
+        assert queried_models[4].EchoX is None
+
+        # ----------------------------------------------------------------
+        # Someone else blanks out an injected row below the watermark.
+        await soakdb3_dataface.update_body_fields(  # type: ignore
+            visitid,
+            [{"id": "3", "field": "CrystalPlate", "value": ""}],
+        )
+
+        # The local record still has the well, so the incremental injection skips it.
+        result = await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
+        assert result["skipped_count"] == 5
+        assert result["updated_count"] == 0
+
+        # Reconciling reads the whole body table and puts the well back in the blank row.
+        result = await xchembku_dataface.inject_soakdb3_crystal_wells(
+            visitid, models, reconcile=True
+        )
+        assert result["skipped_count"] == 4
+        assert result["updated_count"] == 1
+        assert result["inserted_count"] == 0
+
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
+        assert len(queried_models) == 5
+        assert queried_models[2].ID == "3"
+        assert queried_models[2].CrystalPlate == injected_crystal_plate
+        assert queried_models[2].CrystalWell == "01A2"
+        assert queried_models[2].EchoX == 200
+
+        # The local record holds each plate/well only once per visit.
+        with pytest.raises(Exception, match="UNIQUE|Duplicate"):
+            await xchembku_dataface.execute(
+                "INSERT INTO soakdb3_exported_crystal_wells"
+                " (visitid, crystal_plate, crystal_well) VALUES (?, ?, ?)",
+                subs=[visitid, injected_crystal_plate, "01A2"],
+            )
+
+        # ----------------------------------------------------------------
+        # Fetch only some of the fields.
+        records = await xchembku_dataface.fetch_soakdb3_crystal_well_fields(
+            visitid, ["CrystalPlate", "CrystalWell"]
+        )
+        assert len(records) == 5
+        assert records[0] == {
+            "CrystalPlate": injected_crystal_plate,
+            "CrystalWell": "01A1",
+        }
+        assert records[1]["CrystalPlate"] == seeded_crystal_plate
+
+        # Only the model's fields can be asked for.
+        with pytest.raises(RuntimeError):
+            await xchembku_dataface.fetch_soakdb3_crystal_well_fields(
+                visitid, ["CrystalWell`, `ID"]
+            )
+
+        # ----------------------------------------------------------------
+        # Inject into several visits at once.
+        models_by_visitid = {}
+        for i in range(3):
+            other_visit = f"cm00001-{i + 2}"
+            other_visit_directory = Path(output_directory) / "visits" / other_visit
+            other_visit_directory.mkdir(parents=True)
+            other_visitid = str(other_visit_directory)
+
+            await soakdb3_dataface.insert(  # type: ignore
+                other_visitid,
+                Tablenames.HEAD,
+                [head_record],
+            )
+            # Seed a blank row, which also commits the head row.
+            await soakdb3_dataface.update_body_fields(  # type: ignore
+                other_visitid,
+                [{"id": "-1", "field": "ProteinName", "value": "something"}],
+            )
+
+            models_by_visitid[other_visitid] = [
+                Soakdb3CrystalWellModel(
+                    LabVisit=other_visit,
+                    CrystalPlate=injected_crystal_plate,
+                    CrystalWell=f"01A{j + 1}",
+                    EchoX=j,
+                    EchoY=j,
+                )
+                for j in range(i + 1)
+            ]
+
+        results = await xchembku_dataface.inject_soakdb3_crystal_wells_for_visits(
+            models_by_visitid, concurrency=2
+        )
+        assert list(results.keys()) == list(models_by_visitid.keys())
+
+        for i, other_visitid in enumerate(models_by_visitid.keys()):
+            # The blank row takes the first well and the rest are inserted.
+            assert results[other_visitid]["updated_count"] == 1
+            assert results[other_visitid]["inserted_count"] == i
+            assert results[other_visitid]["skipped_count"] == 0
+
+            queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(
+                other_visitid
+            )
+            assert len(queried_models) == i + 1
+            assert queried_models[-1].CrystalWell == f"01A{i + 1}"
+            assert queried_models[-1].ProteinName == protein
+
+        # A visit which fails doesn't undo the bookkeeping of the others.
+        failing_visitid = str(Path(output_directory) / "visits" / "cm00001-9")
+        with pytest.raises(RuntimeError) as excinfo:
+            await xchembku_dataface.inject_soakdb3_crystal_wells_for_visits(
+                {
+                    other_visitid: models_by_visitid[other_visitid]
+                    + [
+                        Soakdb3CrystalWellModel(
+                            LabVisit=other_visit,
+                            CrystalPlate=injected_crystal_plate,
+                            CrystalWell="01A9",
+                        )
+                    ],
+                    failing_visitid: models_by_visitid[other_visitid],
+                }
+            )
+        assert failing_visitid in str(excinfo.value)
+        assert other_visitid not in str(excinfo.value)
+        records = await xchembku_dataface.query(
+            "SELECT crystal_well FROM soakdb3_exported_crystal_wells"
+            " WHERE visitid = ? AND crystal_well = '01A9'",
+            subs=[other_visitid],
+        )
+        assert len(records) == 1
+
+        # ----------------------------------------------------------------
+        # Within a transaction, the bookkeeping goes with the rest of the transaction.
+        transaction_models_by_visitid = {
+            other_visitid: models_by_visitid[other_visitid]
+            + [
+                Soakdb3CrystalWellModel(
+                    LabVisit=other_visit,
+                    CrystalPlate=injected_crystal_plate,
+                    CrystalWell="01A8",
+                )
+            ]
+        }
+        if isinstance(xchembku_dataface, XchembkuDirect):
+            await xchembku_dataface.begin()
+            await xchembku_dataface.inject_soakdb3_crystal_wells_for_visits(
+                transaction_models_by_visitid
+            )
+            await xchembku_dataface.rollback()
+        else:
+            with pytest.raises(RuntimeError):
+                async with xchembku_dataface.batch(as_transaction=True) as batch:
+                    batch.inject_soakdb3_crystal_wells_for_visits(
+                        transaction_models_by_visitid
+                    )
+                    batch.query("SELECT * FROM no_such_table")
+
+        # Soakdb3 has the well, but the local record of it was rolled back.
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(
+            other_visitid
+        )
+        assert queried_models[-1].CrystalWell == "01A8"
+        records = await xchembku_dataface.query(
+            "SELECT crystal_well FROM soakdb3_exported_crystal_wells"
+            " WHERE visitid = ? AND crystal_well = '01A8'",
+            subs=[other_visitid],
+        )
+        assert len(records) == 0
+
+        # The next injection reads above the old watermark, so still finds the well.
+        results = await xchembku_dataface.inject_soakdb3_crystal_wells_for_visits(
+            transaction_models_by_visitid
+        )
+        assert results[other_visitid]["skipped_count"] == len(
+            transaction_models_by_visitid[other_visitid]
+        )
+        assert results[other_visitid]["inserted_count"] == 0
+
+        # ----------------------------------------------------------------
+        # Change the protein in the head row.
+        await soakdb3_dataface.update_head_fields(  # type: ignore
+            visitid,
+            [{"field": "Protein", "value": "P2"}],
+        )
+        # Updating the body commits the head change.
+        await soakdb3_dataface.update_body_fields(  # type: ignore
+            visitid,
+            [{"id": "2", "field": "ProteinName", "value": None}],
+        )
+
+        # The head row values are still cached, so the old protein is used.
+        models.append(
+            Soakdb3CrystalWellModel(
+                LabVisit=visit,
+                CrystalPlate=injected_crystal_plate,
+                CrystalWell="01A5",
+            )
+        )
+        await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
+        assert queried_models[-1].CrystalWell == "01A5"
+        assert queried_models[-1].ProteinName == protein
+
+        # A dataface on another soakdb3 service has head rows of its own to forget.
+        if isinstance(xchembku_dataface, XchembkuDirect):
+            other_specification = copy.deepcopy(xchembku_dataface.specification())
+            other_specification["soakdb3_dataface_specification"]["other"] = True
+            other_dataface = XchembkuDirect(other_specification)
+            result = await other_dataface.invalidate_soakdb3_head_rows(visitid)
+            assert result["count"] == 0
+
+        # Once invalidated, the head row is read again.
+        result = await xchembku_dataface.invalidate_soakdb3_head_rows(visitid)
+        assert result["count"] == 1
+
+        models.append(
+            Soakdb3CrystalWellModel(
+                LabVisit=visit,
+                CrystalPlate=injected_crystal_plate,
+                CrystalWell="01A6",
+            )
+        )
+        await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
+        assert queried_models[-1].CrystalWell == "01A6"
+        assert queried_models[-1].ProteinName == "P2"
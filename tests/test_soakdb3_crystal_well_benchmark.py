@@ -0,0 +1,245 @@
+import logging
+import time
+from pathlib import Path
+
+import pytest
+
+# Soakdb3 database.
+from soakdb3_api.databases.constants import Tablenames
+
+# Client for direct access to the soakdb3 database for seeding it.
+from soakdb3_api.datafaces.context import Context as Soakdb3DatafaceClientContext
+from soakdb3_api.datafaces.datafaces import (
+    datafaces_get_default as soakdb3_datafaces_get_default,
+)
+
+# The model which describes the crystal wells to be injected into soakdb3.
+from soakdb3_api.models.crystal_well_model import (
+    CrystalWellModel as Soakdb3CrystalWellModel,
+)
+
+# The service process startup/teardown context.
+from soakdb3_lib.datafaces.context import Context as Soakdb3DatafaceServerContext
+
+# Base class for the tester.
+from tests.base import Base
+
+# Client context creator.
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+@pytest.mark.benchmark
+class TestSoakdb3CrystalWellBenchmarkDirectSqlite:
+    """
+    Benchmark dataface interface by direct call.
+
+    Skipped unless pytest is run with --benchmark.
+
+    Only direct calls are benchmarked, so the network transport does not dominate the timing.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_sqlite.yaml"
+        Soakdb3CrystalWellBenchmarkTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+@pytest.mark.benchmark
+class TestSoakdb3CrystalWellBenchmarkDirectMysql:
+    """
+    Benchmark dataface interface by direct call.
+
+    Skipped unless pytest is run with --benchmark.
+
+    Only direct calls are benchmarked, so the network transport does not dominate the timing.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        configuration_file = "tests/configurations/direct_mysql.yaml"
+        Soakdb3CrystalWellBenchmarkTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class Soakdb3CrystalWellBenchmarkTester(Base):
+    """
+    Class to test that injecting crystal wells into soakdb3 scales linearly.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the soakdb3 dataface.
+        soakdb3_dataface_specification = multiconf_dict[
+            "soakdb3_dataface_specification"
+        ]
+
+        # Make the soakdb3 server context.
+        soakdb3_server_context = Soakdb3DatafaceServerContext(
+            soakdb3_dataface_specification
+        )
+
+        # Make the soakdb3 CLIENT context.
+        soakdb3_client_context = Soakdb3DatafaceClientContext(
+            soakdb3_dataface_specification
+        )
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Make the xchembku server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the xchembku client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the soakdb3 server context which includes the direct or network-addressable service.
+        async with soakdb3_server_context:
+            # Client for direct access to the soakdb3 database for seeding it.
+            async with soakdb3_client_context:
+                # Start the xchembku server context which includes the direct or network-addressable service.
+                async with xchembku_server_context:
+                    # Start the matching xchembku client context.
+                    async with xchembku_client_context:
+                        await self.__run_the_test(constants, output_directory)
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, constants, output_directory):
+        """ """
+
+        # A small run gives the baseline for the large one.
+        small_seconds = await self.__inject(output_directory, "cm00001-1", 1000)
+        large_seconds = await self.__inject(output_directory, "cm00001-2", 10000)
+
+        logger.info(
+            f"[INJBENCH] 1000 wells took {small_seconds:0.3f} seconds,"
+            f" 10000 wells took {large_seconds:0.3f} seconds"
+        )
+
+        # Ten times the wells should take about ten times as long, not a hundred.
+        # The generous margin allows for the fixed costs in the small run and for noisy machines.
+        assert large_seconds < 25 * small_seconds
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __inject(self, output_directory, visit: str, count: int) -> float:
+        """
+        Inject count wells into a visit which already holds count rows.
+
+        A tenth of the existing rows are blank and a tenth of the injected wells are already there.
+
+        Returns:
+            float: seconds taken by the injection
+        """
+
+        # Reference the soakdb3 dataface object which the context has set up as the default.
+        soakdb3_dataface = soakdb3_datafaces_get_default()
+
+        # Reference the xchembku dataface object which the context has set up as the default.
+        xchembku_dataface = xchembku_datafaces_get_default()
+
+        visit_directory = Path(output_directory) / "visits" / visit
+        visit_directory.mkdir(parents=True)
+
+        # Soakdb3 expects visitid to be a visit directory.
+        visitid = str(visit_directory)
+
+        crystal_plate = "98aa_2021-09-13_RI1000-0276-3drop"
+
+        # Insert the (single) row in the soakdb3 database's head table.
+        await soakdb3_dataface.insert(  # type: ignore
+            visitid,
+            Tablenames.HEAD,
+            [{"Protein": "P1", "DropVolume": 3.1}],
+        )
+
+        # Seed the body table with existing rows, every tenth one blank.
+        # Updating the body also commits the head row.
+        seed_fields = []
+        for i in range(count):
+            if i % 10 == 0:
+                crystal_plate_value = ""
+            else:
+                crystal_plate_value = crystal_plate
+            seed_fields.append(
+                {
+                    "id": str(-(i + 1)),
+                    "field": "CrystalPlate",
+                    "value": crystal_plate_value,
+                }
+            )
+            seed_fields.append(
+                {"id": str(-(i + 1)), "field": "CrystalWell", "value": "%06d" % (i)}
+            )
+        await soakdb3_dataface.update_body_fields(  # type: ignore
+            visitid,
+            seed_fields,
+        )
+
+        # Make the wells to inject, the first tenth of which are already seeded.
+        blank_count = count // 10
+        duplicate_count = count // 10
+        models = []
+        for i in range(count):
+            if i < duplicate_count:
+                crystal_well = "%06d" % (10 * i + 1)
+            else:
+                crystal_well = "%06d" % (count + i)
+            models.append(
+                Soakdb3CrystalWellModel(
+                    LabVisit=visit,
+                    CrystalPlate=crystal_plate,
+                    CrystalWell=crystal_well,
+                    EchoX=i,
+                    EchoY=i,
+                )
+            )
+
+        start_time = time.time()
+        result = await xchembku_dataface.inject_soakdb3_crystal_wells(visitid, models)
+        seconds = time.time() - start_time
+
+        assert result["skipped_count"] == duplicate_count
+        assert result["updated_count"] == blank_count
+        assert result["inserted_count"] == count - duplicate_count - blank_count
+
+        # Check the injected wells all landed.
+        queried_models = await xchembku_dataface.fetch_soakdb3_crystal_wells(visitid)
+        assert len(queried_models) == 2 * count - duplicate_count - blank_count
+
+        return seconds
@@ -0,0 +1,151 @@
+import json
+import logging
+import time
+import tracemalloc
+from decimal import Decimal
+
+from xchembku_api.models.compact_rows import (
+    CrystalWellNeedingDroplocationRow,
+    load_compact_rows,
+)
+from xchembku_api.models.crystal_plate_report_model import CrystalPlateReportModel
+from xchembku_api.models.crystal_well_needing_droplocation_model import (
+    CrystalWellNeedingDroplocationModel,
+)
+from xchembku_api.models.trusted_loader import (
+    columnize_trusted,
+    load_trusted,
+    normalize_trusted,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestTrustedLoader:
+    """
+    Test loading models from trusted database rows, and benchmark it against validation.
+
+    The timings are only logged, since they depend on the machine.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        # Rows as sqlite gives them, with booleans as 0 or 1 and a column not in the model.
+        records = []
+        for i in range(100000):
+            records.append(
+                {
+                    "uuid": f"uuid{i}",
+                    "crystal_plate_uuid": "plate",
+                    "position": "A01a",
+                    "filename": f"{i}.jpg",
+                    "width": 1024,
+                    "height": 768,
+                    "error": None,
+                    "created_on": "2023-01-01 00:00:00.000000",
+                    "visit": "cm00001-1",
+                    "crystal_plate_thing_type": "xchembku_lib.crystal_plate_objects.swiss3",
+                    "auto_target_x": i,
+                    "auto_target_y": i,
+                    "well_centroid_x": 100,
+                    "well_centroid_y": 100,
+                    "drop_detected": 1,
+                    "number_of_crystals": i % 3,
+                    "crystal_well_droplocation_uuid": None,
+                    "is_usable": i % 2,
+                    "is_exported_to_soakdb3": None,
+                    "not_in_model": "ignored",
+                }
+            )
+
+        start_time = time.time()
+        validated_models = [
+            CrystalWellNeedingDroplocationModel(**record) for record in records
+        ]
+        validated_seconds = time.time() - start_time
+
+        start_time = time.time()
+        trusted_models = load_trusted(CrystalWellNeedingDroplocationModel, records)
+        trusted_seconds = time.time() - start_time
+
+        logger.info(
+            f"[TRUSTBENCH] per row validated {validated_seconds * 10:0.2f} microseconds,"
+            f" trusted {trusted_seconds * 10:0.2f} microseconds"
+        )
+
+        # The trusted models are the same as the validated ones.
+        assert len(trusted_models) == len(validated_models)
+        for i in [0, 1, 2, 99999]:
+            assert trusted_models[i].dict() == validated_models[i].dict()
+            assert trusted_models[i].json() == validated_models[i].json()
+        assert trusted_models[1].is_usable is True
+        assert trusted_models[0].rockminer_collected_stem is None
+
+        # Columns hold the same values as the models, and are smaller as json.
+        columns = columnize_trusted(CrystalWellNeedingDroplocationModel, records)
+        assert columns["is_usable"][0:2] == [False, True]
+        for i in [0, 99999]:
+            assert {
+                field_name: values[i] for field_name, values in columns.items()
+            } == validated_models[i].dict()
+        rows_json = json.dumps(
+            normalize_trusted(CrystalWellNeedingDroplocationModel, records)
+        )
+        columns_json = json.dumps(columns)
+        logger.info(
+            f"[TRUSTBENCH] json rows {len(rows_json)} bytes, columns {len(columns_json)} bytes"
+        )
+        assert len(columns_json) < len(rows_json) / 2
+
+        # Compact rows hold the same values in much less memory than the models.
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            models = load_trusted(CrystalWellNeedingDroplocationModel, records[0:10000])
+            models_bytes = tracemalloc.get_traced_memory()[0] - before
+
+            before = tracemalloc.get_traced_memory()[0]
+            rows = load_compact_rows(
+                CrystalWellNeedingDroplocationRow, records[0:10000]
+            )
+            rows_bytes = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+        logger.info(
+            f"[TRUSTBENCH] per row models {models_bytes / 10000:0.0f} bytes,"
+            f" compact rows {rows_bytes / 10000:0.0f} bytes"
+        )
+        assert len(rows) == len(models)
+        assert rows_bytes < models_bytes / 2
+        assert rows[1].dict() == validated_models[1].dict()
+        assert rows[1].to_model() == validated_models[1]
+        assert rows[1].is_usable is True
+
+        # Mysql gives sums as decimals.
+        record = {
+            "uuid": "uuid",
+            "formulatrix__plate__id": 1,
+            "formulatrix__experiment__name": None,
+            "barcode": "98ab",
+            "visit": "cm00001-1",
+            "thing_type": "xchembku_lib.crystal_plate_objects.swiss3",
+            "created_on": "2023-01-01 00:00:00.000000",
+            "collected_count": Decimal(3),
+            "chimped_count": Decimal(2),
+            "undecided_count": 1,
+            "undecided_crystals_count": 0,
+            "decided_count": 1,
+            "decided_usable_count": 1,
+            "decided_unusable_count": 0,
+            "exported_count": 0,
+            "usable_unexported_count": 1,
+        }
+        trusted_model = load_trusted(CrystalPlateReportModel, [record])[0]
+        assert trusted_model.dict() == CrystalPlateReportModel(**record).dict()
+        assert trusted_model.collected_count.__class__ is int
@@ -0,0 +1,368 @@
+import copy
+import json
+import logging
+import time
+
+import aiohttp
+import pytest
+
+# Base class for the tester.
+from tests.base import Base
+
+# Types which the CrystalPlateObjects factory can use to build an instance.
+from xchembku_api.crystal_plate_objects.constants import (
+    ThingTypes as CrystalPlateThingTypes,
+)
+
+# Client context creator.
+from xchembku_api.datafaces.constants import Commands, Keywords
+from xchembku_api.datafaces.context import Context as XchembkuDatafaceClientContext
+
+# Object managing datafaces.
+from xchembku_api.datafaces.datafaces import xchembku_datafaces_get_default
+from xchembku_api.models.crystal_plate_filter_model import CrystalPlateFilterModel
+from xchembku_api.models.crystal_plate_model import CrystalPlateModel
+from xchembku_api.models.crystal_well_autolocation_model import (
+    CrystalWellAutolocationModel,
+)
+from xchembku_api.models.crystal_well_filter_model import CrystalWellFilterModel
+from xchembku_api.models.crystal_well_model import CrystalWellModel
+from xchembku_api.models.crystal_well_needing_droplocation_model import (
+    CrystalWellNeedingDroplocationModel,
+)
+from xchembku_api.models.trusted_loader import normalize_trusted
+from xchembku_api.wire_encodings import (
+    WireEncodings,
+    decode_wire,
+    encode_wire,
+    resolve_wire_encoding,
+)
+
+# Server context creator.
+from xchembku_lib.datafaces.context import Context as XchembkuDatafaceServerContext
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------
+class TestWireEncodingCodecs:
+    """
+    Test the wire encodings give the same json.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        # Records as the server gives them for wells needing droplocation.
+        records = normalize_trusted(
+            CrystalWellNeedingDroplocationModel,
+            [
+                {
+                    "uuid": f"uuid{i}",
+                    "crystal_plate_uuid": "plate",
+                    "position": "A01a",
+                    "filename": f"/dls/i04-1/data/2023/cm00001-1/{i}.jpg",
+                    "width": 1024,
+                    "height": 768,
+                    "created_on": "2023-01-01 00:00:00.000000",
+                    "visit": "cm00001-1",
+                    "crystal_plate_thing_type": "xchembku_lib.crystal_plate_objects.swiss3",
+                    "auto_target_x": i,
+                    "auto_target_y": i,
+                    "well_centroid_x": 100,
+                    "well_centroid_y": 100,
+                    "drop_detected": True,
+                    "number_of_crystals": i % 3,
+                    "is_usable": i % 2 == 0,
+                }
+                for i in range(100)
+            ],
+        )
+
+        for encoding in [WireEncodings.JSON, WireEncodings.ORJSON]:
+            body = encode_wire(encoding, records)
+            assert decode_wire(encoding, body) == records, encoding
+
+        # Orjson is the same json, only faster.
+        assert json.loads(encode_wire(WireEncodings.ORJSON, records)) == records
+
+        # Unknown encodings are refused.
+        with pytest.raises(RuntimeError):
+            resolve_wire_encoding("xml")
+
+
+# ----------------------------------------------------------------------------------------
+@pytest.mark.benchmark
+class TestWireEncodingBenchmarkServiceSqlite:
+    """
+    Compare the wire encodings on a 5k well fetch through the network interface.
+
+    Skipped unless pytest is run with --benchmark.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        WireEncodingBenchmarkTester().main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class TestWireEncodingOrjsonServiceSqlite:
+    """
+    Test dataface interface through network interface with faster json.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_sqlite.yaml"
+        WireEncodingTester(WireEncodings.ORJSON).main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class TestWireEncodingOrjsonServiceMysql:
+    """
+    Test dataface interface through network interface with faster json.
+    """
+
+    def test(
+        self,
+        constants,
+        logging_setup,
+        output_directory,
+    ):
+        """ """
+
+        configuration_file = "tests/configurations/service_mysql.yaml"
+        WireEncodingTester(WireEncodings.ORJSON).main(
+            constants, configuration_file, output_directory
+        )
+
+
+# ----------------------------------------------------------------------------------------
+class WireEncodingTester(Base):
+    """
+    Class to test the dataface with the wire encoding configured.
+    """
+
+    def __init__(self, encoding: str):
+        Base.__init__(self)
+
+        self.__encoding = encoding
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        # Reference the dict entry for the xchembku dataface.
+        xchembku_dataface_specification = multiconf_dict[
+            "xchembku_dataface_specification"
+        ]
+
+        # Both client and server get the encoding.
+        xchembku_dataface_specification["type_specific_tbd"]["aiohttp_specification"][
+            "encoding"
+        ] = self.__encoding
+
+        # Make the server context.
+        xchembku_server_context = XchembkuDatafaceServerContext(
+            xchembku_dataface_specification
+        )
+
+        # Make the client context.
+        xchembku_client_context = XchembkuDatafaceClientContext(
+            xchembku_dataface_specification
+        )
+
+        # Start the xchembku server context which includes the direct or network-addressable service.
+        async with xchembku_server_context:
+            # Start the matching xchembku client context.
+            async with xchembku_client_context:
+                await self.__run_the_test(
+                    xchembku_dataface_specification["type_specific_tbd"][
+                        "aiohttp_specification"
+                    ]["client"]
+                )
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __run_the_test(self, client_url: str):
+        """ """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        crystal_plate_models = [
+            CrystalPlateModel(
+                formulatrix__plate__id=i,
+                barcode=f"xyz{i}",
+                visit="cm00001-1",
+                thing_type=CrystalPlateThingTypes.SWISS3,
+            )
+            for i in range(10)
+        ]
+        await dataface.upsert_crystal_plates(crystal_plate_models)
+
+        assert dataface.wire_encoding() == WireEncodings.ORJSON
+
+        # Models come back the same as they went in.
+        models = await dataface.fetch_crystal_plates(CrystalPlateFilterModel())
+        assert [(m.uuid, m.barcode) for m in models] == [
+            (m.uuid, m.barcode) for m in crystal_plate_models
+        ]
+
+        # Errors come back the same as with json.
+        with pytest.raises(RuntimeError):
+            await dataface.query("SELECT * FROM no_such_table")
+
+        # The server encodes its response with orjson,
+        # which leaves out the spaces the standard json codec puts after separators.
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                f"{client_url}/protocolj",
+                json={
+                    Keywords.COMMAND: Commands.EXECUTE,
+                    Keywords.PAYLOAD: {
+                        "function": "fetch_crystal_plates_serialized",
+                        "args": [{}],
+                        "kwargs": {},
+                    },
+                },
+            ) as response:
+                assert response.status == 200
+                body = await response.read()
+        assert json.loads(body)[0]["barcode"] == "xyz0"
+        assert b'": ' not in body
+
+
+# ----------------------------------------------------------------------------------------
+class WireEncodingBenchmarkTester(Base):
+    """
+    Class to time fetching many wells through the server in each wire encoding.
+    """
+
+    async def _main_coroutine(self, constants, output_directory):
+        """ """
+
+        # Get the multiconf from the testing configuration yaml.
+        multiconf = self.get_multiconf()
+
+        # Load the multiconf into a dict.
+        multiconf_dict = await multiconf.load()
+
+        fetch_seconds = {}
+        for encoding in [WireEncodings.JSON, WireEncodings.ORJSON]:
+            # Reference the dict entry for the xchembku dataface.
+            xchembku_dataface_specification = copy.deepcopy(
+                multiconf_dict["xchembku_dataface_specification"]
+            )
+
+            # Both client and server get the encoding.
+            xchembku_dataface_specification["type_specific_tbd"][
+                "aiohttp_specification"
+            ]["encoding"] = encoding
+
+            # Make the server context.
+            xchembku_server_context = XchembkuDatafaceServerContext(
+                xchembku_dataface_specification
+            )
+
+            # Make the client context.
+            xchembku_client_context = XchembkuDatafaceClientContext(
+                xchembku_dataface_specification
+            )
+
+            # The database file is kept from one server to the next.
+            async with xchembku_server_context:
+                async with xchembku_client_context:
+                    fetch_seconds[encoding] = await self.__time_the_fetch(
+                        encoding == WireEncodings.JSON
+                    )
+
+        logger.info(
+            f"[WIREBENCH] 5000 well fetch took {fetch_seconds[WireEncodings.JSON] * 1000:0.1f} ms"
+            f" with json and {fetch_seconds[WireEncodings.ORJSON] * 1000:0.1f} ms with orjson"
+        )
+
+        assert fetch_seconds[WireEncodings.ORJSON] < fetch_seconds[WireEncodings.JSON]
+
+    # ----------------------------------------------------------------------------------------
+
+    async def __time_the_fetch(self, should_seed: bool) -> float:
+        """
+        Fetch the wells several times, giving the best time of one fetch.
+        """
+
+        # Reference the dataface object which the context has set up as the default.
+        dataface = xchembku_datafaces_get_default()
+
+        if should_seed:
+            crystal_plate_model = CrystalPlateModel(
+                formulatrix__plate__id=1,
+                barcode="xyz1",
+                visit="cm00001-1",
+                thing_type=CrystalPlateThingTypes.SWISS3,
+            )
+            await dataface.upsert_crystal_plates([crystal_plate_model])
+
+            crystal_well_models = [
+                CrystalWellModel(
+                    position=f"{i}",
+                    crystal_plate_uuid=crystal_plate_model.uuid,
+                    filename=f"/dls/i04-1/data/2023/cm00001-1/{i}.jpg",
+                )
+                for i in range(5000)
+            ]
+            crystal_well_autolocation_models = [
+                CrystalWellAutolocationModel(
+                    crystal_well_uuid=crystal_well_model.uuid,
+                    number_of_crystals=i % 3,
+                    well_centroid_x=100,
+                    well_centroid_y=100,
+                )
+                for i, crystal_well_model in enumerate(crystal_well_models)
+            ]
+
+            # Seed in chunks, since aiohttp warns about sending very large requests.
+            for i in range(0, 5000, 1000):
+                await dataface.upsert_crystal_wells(crystal_well_models[i : i + 1000])
+                await dataface.originate_crystal_well_autolocations(
+                    crystal_well_autolocation_models[i : i + 1000]
+                )
+
+        filter = CrystalWellFilterModel()
+
+        # The first fetch warms up the connection.
+        rows = await dataface.fetch_crystal_wells_needing_droplocation_rows(filter)
+        assert len(rows) == 5000
+
+        fetch_seconds = []
+        for _ in range(5):
+            start_time = time.time()
+            await dataface.fetch_crystal_wells_needing_droplocation_rows(filter)
+            fetch_seconds.append(time.time() - start_time)
+
+        return min(fetch_seconds)